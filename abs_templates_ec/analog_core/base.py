@@ -9,6 +9,8 @@ import bisect
 import numbers
 from itertools import chain
 
+import numpy as np
+
 from bag.math import lcm
 from bag.util.cache import DesignMaster
 from bag.util.interval import IntervalSet
@@ -18,6 +20,7 @@ from bag.layout.routing import TrackID, WireArray
 from bag.layout.util import BBox
 from bag.layout.objects import Instance
 
+from ..cache import LRUCache
 from ..analog_mos.core import MOSTech
 from ..analog_mos.mos import AnalogMOSBase, AnalogMOSExt
 from ..analog_mos.substrate import AnalogSubstrate
@@ -25,11 +28,19 @@ from ..analog_mos.edge import AnalogEdge, AnalogEndRow
 from ..analog_mos.conn import AnalogMOSConn, AnalogMOSDecap, AnalogMOSDummy, AnalogSubstrateConn
 
 from .placement import WireGroup, WireTree
+from .dummy import intervals_to_mask, get_runs, remove_overlapping_runs
+from .dummy import get_dummy_connections, select_dummy_connections
 
 if TYPE_CHECKING:
     from bag.layout.template import TemplateDB
     from bag.layout.routing import RoutingGrid
 
+# process-wide table of AnalogBase row placement plans.  Entries are keyed by technology
+# configuration, row stack geometry, wire tree signature, and routing grid signature.
+_placement_plan_cache = LRUCache(max_size=256)
+# process-wide table of first placement pass states, keyed by the row keys of a row prefix.
+_placement_row_cache = LRUCache(max_size=2048)
+
 
 class AnalogBaseEdgeInfo(object):
     """The edge information object for AnalogBase."""
@@ -472,8 +483,11 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         self._capp_intvs = None
         self._capp_wires = {-1: [], 1: []}
         self._capn_wires = {-1: [], 1: []}
-        self._n_netmap = None
-        self._p_netmap = None
+        # net names of source/drain columns on connection boundaries, keyed by column index.
+        self._n_netmap = None  # type: List[Dict[int, str]]
+        self._p_netmap = None  # type: List[Dict[int, str]]
+        # dummy transistor index used by get_sch_dummy_info().  Cleared when rows change.
+        self._dum_index = None
         self._row_layout_info = None
 
         # track calculation parameters
@@ -495,6 +509,41 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         tech_cls = tech_info.tech_params['layout']['mos_tech_class']
         return tech_cls.get_mos_conn_layer()
 
+    @classmethod
+    def get_placement_plan_cache_stats(cls):
+        # type: () -> Dict[str, Any]
+        """Returns hit/miss statistics of the shared row placement plan table.
+
+        Returns
+        -------
+        stats : Dict[str, Any]
+            the cache statistics dictionary.
+        """
+        return _placement_plan_cache.get_stats()
+
+    @classmethod
+    def get_placement_row_cache_stats(cls):
+        # type: () -> Dict[str, Any]
+        """Returns hit/miss statistics of the shared row prefix placement table.
+
+        Every placement pass looks up its rows in order until the first miss, so hits count
+        rows whose placement is reused, and misses count placement passes that recompute
+        some rows.
+
+        Returns
+        -------
+        stats : Dict[str, Any]
+            the cache statistics dictionary.
+        """
+        return _placement_row_cache.get_stats()
+
+    @classmethod
+    def clear_placement_plan_cache(cls):
+        # type: () -> None
+        """Clears the shared row placement plan and row prefix placement tables."""
+        _placement_plan_cache.clear()
+        _placement_row_cache.clear()
+
     @property
     def mos_conn_layer(self):
         """Returns the MOSFET connection layer ID."""
@@ -761,10 +810,86 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         cur_fg = dum_tran_info.get(dum_key, 0)
         dum_tran_info[dum_key] = cur_fg + dum_fg
 
+    @classmethod
+    def _register_dummy_run(cls, dum_tran_info, key_base, net_map, start, stop):
+        # type: (Dict[Any, int], Tuple[Any, ...], Dict[int, str], int, int) -> None
+        """Register dummy transistors in the given column interval."""
+        tot_dum_fg = stop - start
+        # get left/right net names
+        net_left = net_map.get(start, '')
+        net_right = net_map.get(stop, '')
+
+        if tot_dum_fg == 1:
+            if not net_right:
+                # makes sure source net is supply if possible
+                net_left, net_right = net_right, net_left
+            cls._register_dummy_info(dum_tran_info, key_base + (net_left, net_right), 1)
+        else:
+            if net_left:
+                cls._register_dummy_info(dum_tran_info, key_base + ('', net_left), 1)
+                tot_dum_fg -= 1
+            if net_right:
+                cls._register_dummy_info(dum_tran_info, key_base + ('', net_right), 1)
+                tot_dum_fg -= 1
+            if tot_dum_fg > 0:
+                cls._register_dummy_info(dum_tran_info, key_base + ('', ''), tot_dum_fg)
+
+    def _get_dummy_index(self):
+        # type: () -> List[Tuple[Any, ...]]
+        """Returns the dummy transistor index of all transistor rows.
+
+        Each entry describes the dummy runs of one row, as a tuple of dummy key prefix, net map,
+        run start columns, run stop columns, and a dictionary from dummy key to the indices of
+        runs that contain it and the cumulative finger counts.  The index is built on demand,
+        and cleared whenever transistor or decap connections are drawn.
+        """
+        if self._dum_index is not None:
+            return self._dum_index
+
+        total_intv = (0, self._fg_tot)
+        dum_index = []
+        for mos_type, intvs, cap_intvs, net_maps in (
+                ('pch', self._p_intvs, self._capp_intvs, self._p_netmap),
+                ('nch', self._n_intvs, self._capn_intvs, self._n_netmap)):
+            for row_idx, (intv_set, cap_intv_set, net_map) in enumerate(zip(intvs, cap_intvs,
+                                                                            net_maps)):
+                ridx = self._ridx_lookup[mos_type][row_idx]
+                w = self._row_prop_list[ridx]['w']
+                th = self._row_prop_list[ridx]['threshold']
+                key_base = (mos_type, w, self._lch, th)
+
+                # substrate decap transistors from dummies
+                temp_intv = intv_set.get_complement(total_intv)
+                for intv in cap_intv_set:
+                    temp_intv.subtract(intv)
+
+                starts, stops = [], []
+                key_table = {}
+                for run_idx, (start, stop) in enumerate(temp_intv):
+                    starts.append(start)
+                    stops.append(stop)
+                    run_info = {}
+                    self._register_dummy_run(run_info, key_base, net_map, start, stop)
+                    for dum_key, dum_fg in run_info.items():
+                        if dum_key not in key_table:
+                            key_table[dum_key] = ([], [0])
+                        idx_list, cum_list = key_table[dum_key]
+                        idx_list.append(run_idx)
+                        cum_list.append(cum_list[-1] + dum_fg)
+
+                if starts:
+                    dum_index.append((key_base, net_map, starts, stops, key_table))
+
+        self._dum_index = dum_index
+        return dum_index
+
     def get_sch_dummy_info(self, col_start=0, col_stop=None):
         # type: (int, Optional[int]) -> List[Tuple[Tuple[Any], int]]
         """Returns a list of all dummies in the given range.
 
+        Queries use a dummy index that is shared by all column ranges, so each query only
+        inspects the dummy runs on the range boundaries.
+
         Parameters
         ----------
         col_start : int
@@ -779,58 +904,30 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         if col_stop is None:
             col_stop = self._fg_tot
 
-        # get dummy transistor intervals
-        total_intv = (0, self._fg_tot)
-        p_intvs = [intv_set.get_complement(total_intv) for intv_set in self._p_intvs]
-        n_intvs = [intv_set.get_complement(total_intv) for intv_set in self._n_intvs]
-
         # record dummies
         dum_info = {}
-        for mos_type, intvs, cap_intvs in (('pch', p_intvs, self._capp_intvs),
-                                           ('nch', n_intvs, self._capn_intvs)):
-            for row_idx, (intv_set, cap_intv_set) in enumerate(zip(intvs, cap_intvs)):
-                if mos_type == 'pch':
-                    net_map = self._p_netmap[row_idx]
-                else:
-                    net_map = self._n_netmap[row_idx]
-
-                ridx = self._ridx_lookup[mos_type][row_idx]
-                w = self._row_prop_list[ridx]['w']
-                th = self._row_prop_list[ridx]['threshold']
-
-                # substrate decap transistors from dummies
-                temp_intv = intv_set.copy()
-                for intv in cap_intv_set:
-                    temp_intv.subtract(intv)
+        for key_base, net_map, starts, stops, key_table in self._get_dummy_index():
+            # runs [idx0, idx1) overlap the given range
+            idx0 = bisect.bisect_right(stops, col_start)
+            idx1 = bisect.bisect_left(starts, col_stop)
+            if idx0 >= idx1:
+                continue
 
-                for start, stop in temp_intv:
-                    # limit dummies to those in range
-                    start = max(start, col_start)
-                    stop = min(stop, col_stop)
-                    tot_dum_fg = stop - start
-                    if tot_dum_fg > 0:
-                        # get left/right net names
-                        net_left = net_map[start]
-                        net_right = net_map[stop]
-
-                        if tot_dum_fg == 1:
-                            if not net_right:
-                                # makes sure source net is supply if possible
-                                net_left, net_right = net_right, net_left
-                            dum_key = (mos_type, w, self._lch, th, net_left, net_right)
-                            self._register_dummy_info(dum_info, dum_key, 1)
-                        else:
-                            if net_left:
-                                dum_key = (mos_type, w, self._lch, th, '', net_left)
-                                self._register_dummy_info(dum_info, dum_key, 1)
-                                tot_dum_fg -= 1
-                            if net_right:
-                                dum_key = (mos_type, w, self._lch, th, '', net_right)
-                                self._register_dummy_info(dum_info, dum_key, 1)
-                                tot_dum_fg -= 1
-                            if tot_dum_fg > 0:
-                                dum_key = (mos_type, w, self._lch, th, '', '')
-                                self._register_dummy_info(dum_info, dum_key, tot_dum_fg)
+            # runs [full0, full1) are inside the given range
+            full0 = idx0 if starts[idx0] >= col_start else idx0 + 1
+            full1 = idx1 if stops[idx1 - 1] <= col_stop else idx1 - 1
+            # limit dummies in partially covered runs to those in range
+            for run_idx in sorted({idx0, idx1 - 1}):
+                if run_idx < full0 or run_idx >= full1:
+                    start = max(starts[run_idx], col_start)
+                    stop = min(stops[run_idx], col_stop)
+                    self._register_dummy_run(dum_info, key_base, net_map, start, stop)
+            if full0 < full1:
+                for dum_key, (idx_list, cum_list) in key_table.items():
+                    num = (cum_list[bisect.bisect_left(idx_list, full1)] -
+                           cum_list[bisect.bisect_left(idx_list, full0)])
+                    if num > 0:
+                        self._register_dummy_info(dum_info, dum_key, num)
 
         # return final result, sort by keys so that we get a consistent output.
         # Good for using as identifier.
@@ -964,6 +1061,7 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
                 msg = 'Cannot connect %s row %d [%d, %d); some are already connected.'
                 raise ValueError(msg % (mos_type, row_idx, intv[0], intv[1]))
             net_map[intv[0]] = net_map[intv[1]] = ''
+        self._dum_index = None
 
         ridx = self._ridx_lookup[mos_type][row_idx]
         row_info = self._row_prop_list[ridx]
@@ -1022,7 +1120,8 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         d_net : str
             the drain net name.  Defaults to empty string, which means the supply.
         **kwargs :
-            optional arguments for AnalogMosConn.
+            optional arguments for AnalogMosConn.  If tile_conn is False, the connection is
+            always drawn with one AnalogMosConn master.
         Returns
         -------
         ports : Dict[str, WireArray]
@@ -1030,6 +1129,7 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         """
         stack = kwargs.get('stack', 1)
         flip_lr = kwargs.pop('flip_lr', False)
+        tile_conn = kwargs.pop('tile_conn', True)
         flip_gate = kwargs.get('flip_gate', False)
 
         # sanity checking
@@ -1075,6 +1175,7 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
 
         net_map[intv[0]] = s_net
         net_map[intv[1]] = s_net if seg % 2 == 0 else d_net
+        self._dum_index = None
 
         sd_pitch = self.sd_pitch_unit
         ridx = self._ridx_lookup[mos_type][row_idx]
@@ -1113,9 +1214,17 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         )
         conn_params.update(kwargs)
 
-        conn_master = self.new_template(params=conn_params, temp_cls=AnalogMOSConn)
         if flip_lr:
             orient = 'MY' if orient == 'R0' else 'R180'
+
+        # draw long connections with arrays of unit masters if the technology supports it, so
+        # the number of connection masters does not depend on finger counts.
+        tile_fg = self._tech_cls.get_mos_conn_tile_fg(lch_unit, conn_params) if tile_conn else 0
+        if 0 < tile_fg <= fg // 2:
+            return self._add_mos_conn_tiles(conn_params, tile_fg, xc, yc, orient, flip_lr)
+
+        conn_master = self.new_template(params=conn_params, temp_cls=AnalogMOSConn)
+        if flip_lr:
             xc += fg * sd_pitch
         loc = xc, yc
         conn_inst = self.add_instance(conn_master, loc=loc, orient=orient, unit_mode=True)
@@ -1123,6 +1232,76 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         return {key: conn_inst.get_pin(name=key, layer=self.mos_conn_layer)
                 for key in conn_inst.port_names_iter()}
 
+    def _add_mos_conn_tiles(self, conn_params, tile_fg, xc, yc, orient, flip_lr):
+        # type: (Dict[str, Any], int, int, int, str, bool) -> Dict[str, WireArray]
+        """Draw a transistor connection as an array of unit masters followed by an end master.
+
+        Parameters
+        ----------
+        conn_params : Dict[str, Any]
+            the AnalogMOSConn parameters of the whole connection.
+        tile_fg : int
+            number of fingers of the unit master.
+        xc : int
+            the X coordinate of the left-most source/drain.
+        yc : int
+            the Y coordinate of the source/drain center.
+        orient : str
+            the connection orientation.
+        flip_lr : bool
+            True if the connection is flipped left/right.
+
+        Returns
+        -------
+        ports : Dict[str, WireArray]
+            a dictionary of ports as WireArrays.
+        """
+        fg = conn_params['fg']
+        sd_pitch = self.sd_pitch_unit
+        num_unit = fg // tile_fg - 1
+        end_fg = fg - num_unit * tile_fg
+
+        # source parity is defined on master columns.  Column 0 of every piece lines up with a
+        # column of the single master that is a multiple of tile_fg, with or without flip_lr,
+        # and tile_fg is a multiple of conn_mod, so all pieces keep the source parity.
+        unit_params = self._get_mos_conn_tile_params(conn_params, tile_fg)
+        end_params = self._get_mos_conn_tile_params(conn_params, end_fg)
+        unit_master = self.new_template(params=unit_params, temp_cls=AnalogMOSConn)
+        end_master = self.new_template(params=end_params, temp_cls=AnalogMOSConn)
+
+        spx = tile_fg * sd_pitch
+        if flip_lr:
+            # mirrored connection; the end master is on the left.
+            end_loc = xc + end_fg * sd_pitch, yc
+            unit_loc = end_loc[0] + spx, yc
+        else:
+            unit_loc = xc, yc
+            end_loc = xc + num_unit * spx, yc
+        inst_list = [self.add_instance(unit_master, loc=unit_loc, orient=orient, nx=num_unit,
+                                       spx=spx, unit_mode=True),
+                     self.add_instance(end_master, loc=end_loc, orient=orient, unit_mode=True)]
+
+        # adjacent masters share the source/drain wire on their boundary.
+        conn_layer = self.mos_conn_layer
+        ports = {}
+        for key in end_master.port_names_iter():
+            pin_table = {}
+            for inst in inst_list:
+                for warr in inst.get_all_port_pins(key, layer=conn_layer):
+                    for wire in warr.to_warr_list():
+                        pin_table[wire.track_id.base_index] = wire
+            ports[key] = WireArray.list_to_warr([pin_table[idx] for idx in sorted(pin_table)])
+        return ports
+
+    @staticmethod
+    def _get_mos_conn_tile_params(conn_params, fg):
+        # type: (Dict[str, Any], int) -> Dict[str, Any]
+        """Returns the parameters of one piece of a tiled transistor connection."""
+        params = conn_params.copy()
+        params['fg'] = fg
+        params['options'] = conn_params['options'].copy()
+        return params
+
     def get_substrate_box(self, bottom=True):
         # type: (bool) -> Tuple[Optional[BBox], Optional[BBox]]
         """Returns the substrate tap bounding box."""
@@ -1353,23 +1532,49 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
                                master.get_ext_top_info(), master.get_ext_bot_info()))
             self._ridx_lookup[sub_type].append(row_offset)
 
-    def _place_helper(self, bot_ext_w, rinfo_list, pinfo_list, lch_unit, fg_tot, hm_layer,
-                      mos_pitch, tot_height_pitch, ybot, guard_ring_nf, min_htot, wire_tree):
+    def _place_helper(self, bot_ext_w, rinfo_list, pinfo_list, lch_unit, hm_layer,
+                      mos_pitch, tot_height_pitch, ybot, min_htot, wire_tree, base_key=None,
+                      row_keys=None):
         tcls = self._tech_cls
         grid = self.grid
         wire_tree = wire_tree.copy()
 
         vm_layer = hm_layer - 1
         num_master = len(pinfo_list)
-        ext_options = dict(guard_ring_nf=guard_ring_nf)
         vm_le_sp = grid.get_line_end_space(vm_layer, 1, unit_mode=True)
         ytop_vm_prev = None
         ytop = ytop_prev = ycur = ybot
         row_y = []
         prev_ext_info = None
-        ext_info_list = []
-        for idx, (bot2_conn_y, bot_conn_y, top_conn_y, top2_conn_y, blk_height,
-                  ext_bot_info, ext_top_info) in enumerate(pinfo_list):
+        ext_w_list = []
+
+        # the first pass state after each row only depends on the keys of rows up to it, so
+        # resume from the longest row prefix placed before.
+        prefix_keys = []
+        start_idx = 0
+        if row_keys is not None:
+            prefix = [base_key]
+            for idx, row_key in enumerate(row_keys):
+                prefix.append((bot_ext_w, row_key) if idx == 1 else row_key)
+                prefix_keys.append(tuple(prefix))
+            state = None
+            for prefix_key in prefix_keys:
+                cur_state = _placement_row_cache.find(prefix_key)
+                if cur_state is None:
+                    break
+                state = cur_state
+                start_idx += 1
+            if state is not None:
+                ycur, ytop_prev, ytop_vm_prev, row_y, ext_w_list, tr_offs = state
+                row_y = list(row_y)
+                ext_w_list = list(ext_w_list)
+                ytop = ycur
+                prev_ext_info = pinfo_list[start_idx - 1][6]
+                wire_tree.set_prefix_offsets(wire_tree.get_level_index((start_idx, 2)), tr_offs)
+
+        for idx in range(start_idx, num_master):
+            (bot2_conn_y, bot_conn_y, top_conn_y, top2_conn_y, blk_height,
+             ext_bot_info, ext_top_info) = pinfo_list[idx]
 
             update_ytop = True
             if idx + 1 < num_master - 1:
@@ -1403,8 +1608,8 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
                     ycur = -(-ycur // mos_pitch) * mos_pitch
 
                 # make sure extension constraints is met
-                valid_widths = tcls.get_valid_extension_widths(lch_unit, ext_bot_info,
-                                                               prev_ext_info)
+                valid_widths = tcls.get_valid_extension_widths_cached(lch_unit, ext_bot_info,
+                                                                      prev_ext_info)
                 ext_h = (ycur - ytop_prev) // mos_pitch
                 if ext_h < valid_widths[-1] and ext_h not in valid_widths:
                     # make sure extension height is valid
@@ -1465,22 +1670,17 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
             # record information
             row_y.append(ycur)
             if idx > 0:
-                ext_h = (ycur - ytop_prev) // mos_pitch
-                ext_params = dict(
-                    lch=self._lch,
-                    w=ext_h,
-                    fg=fg_tot,
-                    top_ext_info=ext_bot_info,
-                    bot_ext_info=prev_ext_info,
-                    options=ext_options,
-                    tech_cls_name=self._tech_cls_name,
-                )
-                ext_info_list.append((ext_h, ext_params))
+                ext_w_list.append((ycur - ytop_prev) // mos_pitch)
 
             ytop_prev = ycur + blk_height
             ycur = ytop
             ytop_vm_prev = ytop_vm
             prev_ext_info = ext_top_info
+            if prefix_keys:
+                tr_offs = wire_tree.get_prefix_offsets(wire_tree.get_level_index((idx + 1, 2)))
+                _placement_row_cache.put(prefix_keys[idx], (ycur, ytop_prev, ytop_vm_prev,
+                                                            tuple(row_y), tuple(ext_w_list),
+                                                            tr_offs))
 
         # second pass: move tracks to minimize resistance
         for idx in range(num_master - 1, -1, -1):
@@ -1500,7 +1700,127 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
                             wg.move_up(idx_max - tr_idx)
 
         # return placement result.
-        return row_y, ext_info_list, ytop, wire_tree
+        return row_y, ext_w_list, ytop, wire_tree
+
+    def _get_grid_signature(self, hm_layer, wire_tree):
+        # type: (int, WireTree) -> Tuple[Any, ...]
+        """Returns a hashable tuple of the routing grid quantities used by _place_helper().
+
+        Track locations are linear in track index, so wire bounds at track 0 and 0.5 determine
+        the horizontal track offset and pitch for each track width.
+        """
+        grid = self.grid
+        vm_layer = hm_layer - 1
+        tr_w_set = {1}
+        for _, wg_sig_list in wire_tree.get_signature()[1]:
+            for wg_sig in wg_sig_list:
+                tr_w_set.add(wg_sig[3][2])
+                tr_w_set.add(wg_sig[4][2])
+
+        tr_info = tuple((tr_w,
+                         grid.get_wire_bounds(hm_layer, 0, width=tr_w, unit_mode=True),
+                         grid.get_wire_bounds(hm_layer, 0.5, width=tr_w, unit_mode=True),
+                         grid.get_via_extensions(vm_layer, 1, tr_w, unit_mode=True)[0])
+                        for tr_w in sorted(tr_w_set))
+        return grid.get_line_end_space(vm_layer, 1, unit_mode=True), tr_info
+
+    def _get_row_keys(self, rprop_list, pinfo_list, tot_pitch, min_height, wire_tree):
+        # type: (...) -> Tuple[Tuple[Any, ...], ...]
+        """Returns a hashable tuple for each row that determines how the row is placed.
+
+        The first placement pass of the first k rows only depends on the first k row keys.
+        Extension information is converted with MOSTech.get_ext_width_key(), so row keys
+        do not depend on the number of fingers.
+        """
+        tech_cls = self._tech_cls
+        num_master = len(pinfo_list)
+        row_keys = []
+        lev_start = 0
+        for idx, pinfo in enumerate(pinfo_list):
+            # top tracks are drawn over guard ring rows, see _place_helper().
+            update_ytop = (idx + 1 >= num_master - 1 or
+                           rprop_list[idx + 1]['mos_type'] not in ('ptap', 'ntap'))
+            ext_keys = (tech_cls.get_ext_width_key(pinfo[5]),
+                        tech_cls.get_ext_width_key(pinfo[6]))
+            # wire groups moved by the first placement pass of this row.
+            lev_stop = wire_tree.get_level_index((idx + 1, 2))
+            lev_sigs = tuple((wire_tree.get_level_signature(lev)
+                              for lev in range(lev_start, lev_stop)))
+            lev_start = lev_stop
+            last_info = (tot_pitch, min_height) if idx == num_master - 1 else None
+            row_keys.append((pinfo[:5], ext_keys, update_ytop, lev_sigs, last_info))
+        return tuple(row_keys)
+
+    def _get_placement_plan(self, rprop_list, pinfo_list, lch_unit, hm_layer, mos_pitch,
+                            tot_pitch, dy, min_height, wire_tree):
+        # type: (...) -> Tuple[List[int], List[int], int, Tuple[Tuple[Union[float, int], ...], ...]]
+        """Returns the row placement plan, computing it if necessary.
+
+        The plan only depends on the row stack geometry and the wire tree, not on the number of
+        fingers, so it is shared between AnalogBase instances that only differ in finger count.
+        When the plan is computed, rows are placed starting from the longest row prefix
+        placed before, so changing the tracks of one row only places that row and the rows
+        above it again.
+
+        Returns
+        -------
+        row_y : List[int]
+            the bottom Y coordinate of each row.
+        ext_w_list : List[int]
+            the extension width between each pair of adjacent rows, in mos pitches.
+        ytop : int
+            the top Y coordinate of the row stack.
+        tr_off_list : Tuple[Tuple[Union[float, int], ...], ...]
+            the placed wire tree track offsets.
+        """
+        base_key = (self._tech_cls.get_config_key(), lch_unit, hm_layer, mos_pitch, dy,
+                    self._get_grid_signature(hm_layer, wire_tree))
+        row_keys = self._get_row_keys(rprop_list, pinfo_list, tot_pitch, min_height, wire_tree)
+        key = (base_key, row_keys)
+
+        def _compute_plan():
+            # find bot_ext_w such that we place blocks as close to center as possible,
+            # use binary search to shorten search.
+            # run first iteration out of the while loop to get minimum bottom extension.
+            tmp_result = self._place_helper(0, rprop_list, pinfo_list, lch_unit, hm_layer,
+                                            mos_pitch, tot_pitch, dy, min_height, wire_tree,
+                                            base_key=base_key, row_keys=row_keys)
+            _, ext_list, ytop, _ = tmp_result
+            ext_first, ext_last = ext_list[0], ext_list[-1]
+            print('ext_w0 = %d, ext_wend=%d, ytop=%d' % (ext_first, ext_last, ytop))
+            ytop_best = ytop
+            bot_ext_w_iter = BinaryIterator(ext_first, None)
+            bot_ext_w_iter.save_info(tmp_result)
+            bot_ext_w_iter.up()
+            if ext_first < ext_last:
+                while bot_ext_w_iter.has_next():
+                    bot_ext_w = bot_ext_w_iter.get_next()
+                    tmp_result = self._place_helper(bot_ext_w, rprop_list, pinfo_list, lch_unit,
+                                                    hm_layer, mos_pitch, tot_pitch, dy,
+                                                    min_height, wire_tree, base_key=base_key,
+                                                    row_keys=row_keys)
+                    _, ext_list, ytop, _ = tmp_result
+                    ext_first, ext_last = ext_list[0], ext_list[-1]
+                    print('ext_w0 = %d, ext_wend=%d, ytop=%d' % (ext_first, ext_last, ytop))
+
+                    if ytop > ytop_best:
+                        bot_ext_w_iter.down()
+                    else:
+                        ytop_best = ytop
+                        if ext_first == ext_last:
+                            bot_ext_w_iter.save_info(tmp_result)
+                            break
+                        elif ext_first < ext_last:
+                            bot_ext_w_iter.save_info(tmp_result)
+                            bot_ext_w_iter.up()
+                        else:
+                            bot_ext_w_iter.down()
+
+            row_y, ext_w_list, ytop, best_tree = bot_ext_w_iter.get_last_save_info()
+            return tuple(row_y), tuple(ext_w_list), ytop, best_tree.get_track_offsets()
+
+        row_y, ext_w_list, ytop, tr_off_list = _placement_plan_cache.get(key, _compute_plan)
+        return list(row_y), list(ext_w_list), ytop, tr_off_list
 
     def _place(self, fg_tot, rprop_list, pinfo_list, master_list, guard_ring_nf, top_layer,
                left_end, right_end, bot_end, top_end, tr_manager, min_height, wire_tree):
@@ -1544,45 +1864,30 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         h_top = top_end_master.array_box.height_unit
         min_height -= h_top
 
-        # find bot_ext_w such that we place blocks as close to center as possible,
-        # use binary search to shorten search.
-        # run first iteration out of the while loop to get minimum bottom extension.
-        tmp_result = self._place_helper(0, rprop_list, pinfo_list, lch_unit, fg_tot, hm_layer,
-                                        mos_pitch, tot_pitch, dy, guard_ring_nf, min_height,
-                                        wire_tree)
-        _, ext_list, ytop, _ = tmp_result
-        ext_first, ext_last = ext_list[0][0], ext_list[-1][0]
-        print('ext_w0 = %d, ext_wend=%d, ytop=%d' % (ext_first, ext_last, ytop))
-        ytop_best = ytop
-        bot_ext_w_iter = BinaryIterator(ext_first, None)
-        bot_ext_w_iter.save_info(tmp_result)
-        bot_ext_w_iter.up()
-        if ext_first < ext_last:
-            while bot_ext_w_iter.has_next():
-                bot_ext_w = bot_ext_w_iter.get_next()
-                tmp_result = self._place_helper(bot_ext_w, rprop_list, pinfo_list, lch_unit, fg_tot,
-                                                hm_layer, mos_pitch, tot_pitch, dy, guard_ring_nf,
-                                                min_height, wire_tree)
-                _, ext_list, ytop, _ = tmp_result
-                ext_first, ext_last = ext_list[0][0], ext_list[-1][0]
-                print('ext_w0 = %d, ext_wend=%d, ytop=%d' % (ext_first, ext_last, ytop))
-
-                if ytop > ytop_best:
-                    bot_ext_w_iter.down()
-                else:
-                    ytop_best = ytop
-                    if ext_first == ext_last:
-                        bot_ext_w_iter.save_info(tmp_result)
-                        break
-                    elif ext_first < ext_last:
-                        bot_ext_w_iter.save_info(tmp_result)
-                        bot_ext_w_iter.up()
-                    else:
-                        bot_ext_w_iter.down()
+        # find row Y coordinates and extension widths.  The placement plan is independent of
+        # fg_tot, so finger count sweeps reuse previously computed plans.
+        y_list, ext_w_list, ytop, tr_off_list = self._get_placement_plan(rprop_list, pinfo_list,
+                                                                         lch_unit, hm_layer,
+                                                                         mos_pitch, tot_pitch, dy,
+                                                                         min_height, wire_tree)
+        print('final: ext_w0 = %d, ext_wend=%d, ytop=%d' % (ext_w_list[0], ext_w_list[-1], ytop))
+        wire_tree = wire_tree.copy()
+        wire_tree.set_track_offsets(tr_off_list)
 
-        y_list, ext_list, ytop, wire_tree = bot_ext_w_iter.get_last_save_info()
-        ext_first, ext_last = ext_list[0][0], ext_list[-1][0]
-        print('final: ext_w0 = %d, ext_wend=%d, ytop=%d' % (ext_first, ext_last, ytop))
+        # make extension parameters
+        ext_options = dict(guard_ring_nf=guard_ring_nf)
+        ext_list = []
+        for idx, ext_h in enumerate(ext_w_list):
+            ext_params = dict(
+                lch=self._lch,
+                w=ext_h,
+                fg=fg_tot,
+                top_ext_info=pinfo_list[idx + 1][5],
+                bot_ext_info=pinfo_list[idx][6],
+                options=ext_options,
+                tech_cls_name=self._tech_cls_name,
+            )
+            ext_list.append((ext_h, ext_params))
 
         # at this point we've found the optimal placement.  Place instances
         place_info = self._layout_info.get_placement_info(fg_tot)
@@ -2012,8 +2317,9 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         self._p_intvs = [IntervalSet() for _ in range(nump)]
         self._capn_intvs = [IntervalSet() for _ in range(numn)]
         self._capp_intvs = [IntervalSet() for _ in range(nump)]
-        self._n_netmap = [[''] * (fg_tot + 1) for _ in range(numn)]
-        self._p_netmap = [[''] * (fg_tot + 1) for _ in range(nump)]
+        self._n_netmap = [{} for _ in range(numn)]
+        self._p_netmap = [{} for _ in range(nump)]
+        self._dum_index = None
 
         self._ridx_lookup = dict(nch=[], pch=[], ntap=[], ptap=[])
 
@@ -2238,10 +2544,9 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         if sup_tids is None:
             sup_tids = [None, None]
 
-        # invert PMOS/NMOS IntervalSet to get unconnected dummies
-        total_intv = (0, self._fg_tot)
-        p_intvs = [intv_set.get_complement(total_intv) for intv_set in self._p_intvs]
-        n_intvs = [intv_set.get_complement(total_intv) for intv_set in self._n_intvs]
+        # invert PMOS/NMOS usage to get unconnected dummies
+        p_unused = ~intervals_to_mask(self._p_intvs, self._fg_tot)
+        n_unused = ~intervals_to_mask(self._n_intvs, self._fg_tot)
 
         # connect NMOS dummies
         top_tracks = None
@@ -2252,7 +2557,7 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
             if len(self._ptap_list) > 1:
                 top_sub_inst = self._ptap_list[1]
                 top_tracks = self._ptap_exports[1]
-            self._fill_dummy_helper('nch', n_intvs, self._capn_intvs, self._capn_wires,
+            self._fill_dummy_helper('nch', n_unused, self._capn_intvs, self._capn_wires,
                                     bot_sub_inst, top_sub_inst, bot_tracks,
                                     top_tracks, not self._ntap_list)
 
@@ -2265,7 +2570,7 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
             if len(self._ntap_list) > 1:
                 bot_sub_inst = self._ntap_list[0]
                 bot_tracks = self._ntap_exports[0]
-            self._fill_dummy_helper('pch', p_intvs, self._capp_intvs, self._capp_wires,
+            self._fill_dummy_helper('pch', p_unused, self._capp_intvs, self._capp_wires,
                                     bot_sub_inst, top_sub_inst, bot_tracks,
                                     top_tracks, not self._ptap_list)
 
@@ -2308,7 +2613,7 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
 
     def _fill_dummy_helper(self,  # type: AnalogBase
                            mos_type,  # type: str
-                           intv_set_list,  # type: List[IntervalSet]
+                           unused_mat,  # type: np.ndarray
                            cap_intv_set_list,  # type: List[IntervalSet]
                            cap_wires_dict,  # type: Dict[int, List[WireArray]]
                            bot_sub_inst,  # type: Optional[Instance]
@@ -2324,8 +2629,9 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         ----------
         mos_type: str
             the transistor type.  Either 'pch' or 'nch'.
-        intv_set_list : List[IntervalSet]
-            list of used transistor finger intervals on each transistor row.  Index 0 is bottom row.
+        unused_mat : np.ndarray
+            boolean matrix of unused transistor fingers on each transistor row.
+            Index 0 is bottom row.
         cap_intv_set_list : List[IntervalSet]
             list of used decap transistor finger intervals on each transistor row.
             Index 0 is bottom row.
@@ -2343,58 +2649,51 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
         export_both : bool
             True if both bottom and top substrate should draw port on mos_conn_layer.
         """
-        num_rows = len(intv_set_list)
-        bot_conn = top_conn = []
+        num_rows = unused_mat.shape[0]
+        empty_mat = np.zeros((0, self._fg_tot), dtype=bool)
+        bot_conn = top_conn = empty_mat
 
         # step 1: find dummy connection intervals to bottom/top substrates
         num_sub = 0
         if bot_sub_inst is not None:
             num_sub += 1
-            bot_conn = self._get_dummy_connections(intv_set_list)
+            bot_conn = get_dummy_connections(unused_mat)
         if top_sub_inst is not None:
             num_sub += 1
-            top_conn = self._get_dummy_connections(intv_set_list[::-1])
-
-        # steo 2: make list of dummy transistor intervals and unused dummy track intervals
-        unconnected_intv_list = []
-        dum_tran_intv_list = []
-        # subtract cap interval sets.
-        for intv_set, cap_intv_set in zip(intv_set_list, cap_intv_set_list):
-            unconnected_intv_list.append(intv_set.copy())
-            temp_intv = intv_set.copy()
-            for intv in cap_intv_set:
-                temp_intv.subtract(intv)
-            dum_tran_intv_list.append(temp_intv)
+            top_conn = get_dummy_connections(unused_mat[::-1])
+
+        # steo 2: make dummy transistor masks and unused dummy track masks
+        # subtract cap intervals.
+        unconnected_mat = unused_mat.copy()
+        dum_tran_mat = unused_mat & ~intervals_to_mask(cap_intv_set_list, self._fg_tot)
 
         # step 3: determine if there are tracks that can connect both substrates and all dummies
         if num_sub == 2:
             # we have both top and bottom substrate, so we can connect all dummies together
-            all_conn_set = bot_conn[-1]
-            del bot_conn[-1]
-            del top_conn[-1]
-
-            # remove all intervals connected by all_conn_list.
-            for all_conn_intv in all_conn_set:
-                for intv_set in unconnected_intv_list:
-                    intv_set.remove_all_overlaps(all_conn_intv)
+            all_conn_mask = bot_conn[-1]
+            bot_conn = bot_conn[:-1]
+            top_conn = top_conn[:-1]
+
+            # remove all intervals connected by all_conn_mask.
+            remove_overlapping_runs(unconnected_mat, all_conn_mask)
         else:
-            all_conn_set = None
+            all_conn_mask = None
 
         # step 4: select dummy tracks
         bot_dum_only = top_dum_only = False
         if mos_type == 'nch':
             # for NMOS, prioritize connection to bottom substrate.
             port_name = 'VSS'
-            bot_dhtr = self._select_dummy_connections(bot_conn, unconnected_intv_list, all_conn_set)
-            top_dhtr = self._select_dummy_connections(top_conn, unconnected_intv_list[::-1],
-                                                      all_conn_set)
+            bot_dhtr = self._select_dummy_connections(bot_conn, unconnected_mat, all_conn_mask)
+            top_dhtr = self._select_dummy_connections(top_conn, unconnected_mat[::-1],
+                                                      all_conn_mask)
             top_dum_only = not export_both
         else:
             # for PMOS, prioritize connection to top substrate.
             port_name = 'VDD'
-            top_dhtr = self._select_dummy_connections(top_conn, unconnected_intv_list[::-1],
-                                                      all_conn_set)
-            bot_dhtr = self._select_dummy_connections(bot_conn, unconnected_intv_list, all_conn_set)
+            top_dhtr = self._select_dummy_connections(top_conn, unconnected_mat[::-1],
+                                                      all_conn_mask)
+            bot_dhtr = self._select_dummy_connections(bot_conn, unconnected_mat, all_conn_mask)
             bot_dum_only = not export_both
 
         # step 5: create dictionary from dummy half-track index to Y coordinates
@@ -2440,7 +2739,7 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
                         top_dum_tracks.append(tid)
 
         # step 6: draw dummy connections
-        for ridx, dum_tran_intv in enumerate(dum_tran_intv_list):
+        for ridx, dum_tran_mask in enumerate(dum_tran_mat):
             bot_dist = ridx
             top_dist = num_rows - 1 - ridx
             htr_list_tot = set()
@@ -2453,7 +2752,7 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
                 htr_list_tot.update(top_htr_set)
             dum_htr = sorted(htr_list_tot)
 
-            for start, stop in dum_tran_intv:
+            for start, stop in get_runs(dum_tran_mask):
                 used_tracks, yb, yt = self._draw_dummy_sep_conn(mos_type, ridx, start,
                                                                 stop, dum_htr)
                 for htr in used_tracks:
@@ -2482,9 +2781,9 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
             self._export_supplies(port_name, top_dum_tracks, top_tracks, top_sub_inst, top_dum_only)
 
     def _select_dummy_connections(self,  # type: AnalogBase
-                                  conn_list,  # type: List[IntervalSet]
-                                  unconnected,  # type: List[IntervalSet]
-                                  all_conn_intv_set,  # type: Optional[IntervalSet]
+                                  conn_mat,  # type: np.ndarray
+                                  unconnected_mat,  # type: np.ndarray
+                                  all_conn_mask,  # type: Optional[np.ndarray]
                                   ):
         # type: (...) -> List[List[int]]
         """Helper method for selecting dummy tracks to connect dummies.
@@ -2495,13 +2794,13 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
 
         Parameters
         ----------
-        conn_list : List[IntervalSet]
-            list of dummy finger intervals.  conn_list[x] contains dummy finger intervals that
+        conn_mat : np.ndarray
+            boolean matrix of dummy fingers.  conn_mat[x] marks dummy fingers that
             connects exactly x+1 rows.
-        unconnected : List[IntervalSet]
-            list of unconnected dummy finger intervals on each row.
-        all_conn_intv_set : Optional[IntervalSet]
-            dummy finger intervals that connect all rows.
+        unconnected_mat : np.ndarray
+            boolean matrix of unconnected dummy fingers on each row.  Modified in place.
+        all_conn_mask : Optional[np.ndarray]
+            dummy fingers that connect all rows.
 
         Returns
         -------
@@ -2509,33 +2808,20 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
             dum_tracks_list[x] contains dummy half-track indices to draw on row X.
         """
         # step 1: find dummy tracks that connect all rows and both substrates
-        if all_conn_intv_set is not None:
+        if all_conn_mask is not None:
             dum_tracks = []
-            for intv in all_conn_intv_set:
+            for intv in get_runs(all_conn_mask):
                 dum_tracks.extend(self._fg_intv_to_dum_tracks(intv))
             dum_tracks_list = [dum_tracks]
         else:
             dum_tracks_list = [[]]
 
         # step 2: find dummy tracks that connects fewer rows
-        for idx in range(len(conn_list) - 1, -1, -1):
-            conn_intvs = conn_list[idx]
-            cur_select_list = []
-            # select finger intervals
-            for intv in conn_intvs:
-                select = False
-                for j in range(idx + 1):
-                    dummy_intv_set = unconnected[j]
-                    if dummy_intv_set.has_overlap(intv):
-                        select = True
-                        break
-                if select:
-                    cur_select_list.append(intv)
-            # remove connected dummy intervals, and convert finger intervals to tracks
+        select_list = select_dummy_connections(conn_mat, unconnected_mat)
+        for idx in range(len(select_list) - 1, -1, -1):
+            # convert finger intervals to tracks
             dum_tracks = []
-            for intv in cur_select_list:
-                for j in range(idx + 1):
-                    unconnected[j].remove_all_overlaps(intv)
+            for intv in select_list[idx]:
                 dum_tracks.extend(self._fg_intv_to_dum_tracks(intv))
 
             # merge with previously selected tracks
@@ -2591,39 +2877,6 @@ class AnalogBase(TemplateBase, metaclass=abc.ABCMeta):
 
         return list(range(start, stop, htr_pitch))
 
-    @classmethod
-    def _get_dummy_connections(cls, intv_set_list):
-        # type: (List[IntervalSet]) -> List[IntervalSet]
-        """Find all dummy tracks that connects one or more rows of dummies.
-
-        Parameters
-        ----------
-        intv_set_list : List[IntervalSet]
-            list of used transistor finger intervals on each transistor row.  Index 0 is bottom row.
-
-        Returns
-        -------
-        conn_list : List[IntervalSet]
-            list of dummy finger intervals.  conn_list[x] contains dummy finger intervals that
-            connects exactly x+1 rows of dummies.
-        """
-        # populate conn_list, such that conn_list[x] contains intervals where you can connect
-        # at least x+1 rows of dummies.
-        conn_list = []
-        for intv_set in intv_set_list:
-            if not conn_list:
-                conn_list.append(intv_set.copy())
-            else:
-                conn_list.append(intv_set.get_intersection(conn_list[-1]))
-
-        # subtract adjacent Intervalsets in conn_listconn
-        for idx in range(len(conn_list) - 1):
-            cur_intvs, next_intvs = conn_list[idx], conn_list[idx + 1]
-            for intv in next_intvs:
-                cur_intvs.subtract(intv)
-
-        return conn_list
-
     def _export_supplies(self, port_name, dum_tracks, port_tracks, sub_inst, dum_only):
         grid = self.grid
         mconn_layer = self.mos_conn_layer
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines column bitmap functions used by AnalogBase to fill dummies.
+
+Transistor usage of each AnalogBase row is represented as a boolean matrix with one row per
+transistor row and one column per finger.  Maximal runs of True entries in a row correspond
+to the finger intervals that AnalogBase used to store in lists of IntervalSet.
+"""
+
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+
+def intervals_to_mask(intv_set_list, num_col):
+    # type: (Iterable[Iterable[Tuple[int, int]]], int) -> np.ndarray
+    """Converts lists of finger intervals to a boolean matrix.
+
+    Parameters
+    ----------
+    intv_set_list : Iterable[Iterable[Tuple[int, int]]]
+        finger intervals of each row.
+    num_col : int
+        number of columns.
+
+    Returns
+    -------
+    mask : np.ndarray
+        the boolean matrix.  True if the finger is in an interval.
+    """
+    rows = []
+    for intv_set in intv_set_list:
+        delta = np.zeros(num_col + 1, dtype=int)
+        for start, stop in intv_set:
+            delta[start] += 1
+            delta[stop] -= 1
+        rows.append(np.cumsum(delta[:num_col]) > 0)
+    if not rows:
+        return np.zeros((0, num_col), dtype=bool)
+    return np.vstack(rows)
+
+
+def get_runs(mask):
+    # type: (np.ndarray) -> List[Tuple[int, int]]
+    """Returns all maximal runs of True in the given 1D boolean array.
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        the 1D boolean array.
+
+    Returns
+    -------
+    run_list : List[Tuple[int, int]]
+        list of [start, stop) intervals, sorted in increasing order.
+    """
+    delta = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(delta == 1)
+    stops = np.flatnonzero(delta == -1)
+    return [(int(start), int(stop)) for start, stop in zip(starts, stops)]
+
+
+def label_runs(mask):
+    # type: (np.ndarray) -> np.ndarray
+    """Labels maximal runs of True along the last axis of the given boolean array.
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        a 1D or 2D boolean array.
+
+    Returns
+    -------
+    labels : np.ndarray
+        integer array of the same shape.  Each run gets a unique positive label, and
+        False entries are labeled 0.
+    """
+    is_start = mask.copy()
+    is_start[..., 1:] &= ~mask[..., :-1]
+    labels = np.cumsum(is_start.ravel()).reshape(mask.shape)
+    return np.where(mask, labels, 0)
+
+
+def remove_overlapping_runs(mask, sel_mask):
+    # type: (np.ndarray, np.ndarray) -> None
+    """Removes all runs in the given boolean array that overlap the selection mask.
+
+    This is equivalent to calling IntervalSet.remove_all_overlaps() with every interval
+    in the selection on every row.  The array is modified in place, so views can be used to
+    operate on a subset of rows.
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        a 1D or 2D boolean array.
+    sel_mask : np.ndarray
+        the selection mask.  Must broadcast to the shape of mask.
+    """
+    labels = label_runs(mask)
+    hit_labels = np.unique(labels[mask & sel_mask])
+    if hit_labels.size > 0:
+        mask[np.isin(labels, hit_labels)] = False
+
+
+def get_dummy_connections(unused_mat):
+    # type: (np.ndarray) -> np.ndarray
+    """Find all columns where a dummy track connects one or more rows of dummies.
+
+    Parameters
+    ----------
+    unused_mat : np.ndarray
+        boolean matrix of unused transistor fingers.  Row 0 is the row closest to the
+        substrate.
+
+    Returns
+    -------
+    conn_mat : np.ndarray
+        boolean matrix.  conn_mat[x] marks columns that connects exactly x+1 rows of dummies,
+        except for the last row, which marks columns that connects all rows of dummies.
+    """
+    conn_mat = np.logical_and.accumulate(unused_mat, axis=0)
+    conn_mat[:-1] &= ~conn_mat[1:]
+    return conn_mat
+
+
+def select_dummy_connections(conn_mat, unconnected_mat):
+    # type: (np.ndarray, np.ndarray) -> List[List[Tuple[int, int]]]
+    """Selects dummy connection intervals.
+
+    First, look at the intervals that connect the most rows of dummy.  Select all intervals
+    that connect at least one unconnected dummy, then mark all dummies they touch as
+    connected.  When done, repeat on intervals that connect fewer rows.
+
+    Parameters
+    ----------
+    conn_mat : np.ndarray
+        boolean matrix.  conn_mat[x] marks columns that connects exactly x+1 rows.
+    unconnected_mat : np.ndarray
+        boolean matrix of unconnected dummies on each row.  This is modified in place.
+
+    Returns
+    -------
+    select_list : List[List[Tuple[int, int]]]
+        select_list[x] is the list of selected finger intervals that connect x+1 rows.
+    """
+    num_rows = conn_mat.shape[0]
+    select_list = [[] for _ in range(num_rows)]
+    for idx in range(num_rows - 1, -1, -1):
+        conn_row = conn_mat[idx]
+        if not conn_row.any():
+            continue
+        cur_unconnected = unconnected_mat[:idx + 1]
+        labels = label_runs(conn_row)
+        hit_labels = np.unique(labels[conn_row & cur_unconnected.any(axis=0)])
+        if hit_labels.size > 0:
+            sel_mask = np.isin(labels, hit_labels)
+            remove_overlapping_runs(cur_unconnected, sel_mask)
+            select_list[idx] = get_runs(sel_mask)
+    return select_list
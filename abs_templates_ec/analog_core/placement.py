@@ -2,7 +2,7 @@
 
 """This module contains transistor row placement methods and data structures."""
 
-from typing import TYPE_CHECKING, Optional, List, Union, Tuple
+from typing import TYPE_CHECKING, Optional, List, Union, Tuple, Any
 
 import bisect
 
@@ -11,7 +11,10 @@ if TYPE_CHECKING:
 
 
 class WireGroup(object):
-    """A group of horizontal wires associated with a transistor row."""
+    """A group of horizontal wires associated with a transistor row.
+
+    Once a wire group is added to a WireTree, its track offset is stored in the tree.
+    """
     def __init__(self,
                  layer_id,  # type: int
                  wire_type,  # type: str
@@ -30,20 +33,36 @@ class WireGroup(object):
             self._num_tr = num_tr
             self._locs = None
             self._names = None
+            self._first_info = (None, 0, 1)
+            self._last_info = (None, num_tr - 1, 1)
         else:
             self._names = name_list
             self._num_tr, self._locs = tr_manager.place_wires(layer_id, name_list)
+            self._first_info = (name_list[0], self._locs[0],
+                                tr_manager.get_width(layer_id, name_list[0]))
+            self._last_info = (name_list[-1], self._locs[-1],
+                               tr_manager.get_width(layer_id, name_list[-1]))
 
         if self._num_tr < 1:
             raise ValueError('Cannot create WireGroup with < 1 track.')
         self._tr_off = track_offset
-        self._children = []
+        # the wire tree that stores the track offset, and the index of this group in the tree.
+        self._tree = None  # type: Optional[WireTree]
+        self._idx = 0
+
+    def _get_view(self, tree):
+        # type: (Optional[WireTree]) -> WireGroup
+        """Returns a wire group that shares all wire information with this wire group."""
+        ans = WireGroup.__new__(WireGroup)
+        ans.__dict__.update(self.__dict__)
+        ans._tree = tree
+        if tree is None:
+            ans._tr_off = self.track_offset
+        return ans
 
     def copy(self):
         """Returns a copy of this wire group.  Note: children will not be copied."""
-        return WireGroup(self._layer, self._wire_type, num_tr=self._num_tr,
-                         space=self.space, tr_manager=self._tr_manager, name_list=self._names,
-                         track_offset=self._tr_off)
+        return self._get_view(None)
 
     @property
     def names(self):
@@ -53,7 +72,8 @@ class WireGroup(object):
     def locations(self):
         if self._locs is None:
             return None
-        return [l + self._tr_off for l in self._locs]
+        tr_off = self.track_offset
+        return [l + tr_off for l in self._locs]
 
     @property
     def type(self):
@@ -62,7 +82,8 @@ class WireGroup(object):
     @property
     def interval(self):
         # type: () -> Tuple[Union[float, int], Union[float, int]]
-        return self._tr_off, self._tr_off + self._num_tr
+        tr_off = self.track_offset
+        return tr_off, tr_off + self._num_tr
 
     @property
     def tr_manager(self):
@@ -72,7 +93,9 @@ class WireGroup(object):
     @property
     def track_offset(self):
         # type: () -> Union[float, int]
-        return self._tr_off
+        if self._tree is None:
+            return self._tr_off
+        return self._tree._offsets[self._idx]
 
     @property
     def num_track(self):
@@ -82,33 +105,19 @@ class WireGroup(object):
     @property
     def first_track(self):
         # type: () -> Tuple[Optional[str], Union[float, int], int]
-        if self._names is None:
-            return None, self._tr_off, 1
-
-        name = self._names[0]
-        idx = self._locs[0] + self._tr_off
-        width = self._tr_manager.get_width(self._layer, name)
-        return name, idx, width
+        name, loc, width = self._first_info
+        return name, loc + self.track_offset, width
 
     @property
     def last_track(self):
         # type: () -> Tuple[Optional[str], Union[float, int], int]
-        if self._names is None:
-            return None, self.last_used_track, 1
-
-        name = self._names[-1]
-        idx = self._locs[-1] + self._tr_off
-        width = self._tr_manager.get_width(self._layer, name)
-        return name, idx, width
+        name, loc, width = self._last_info
+        return name, loc + self.track_offset, width
 
     @property
     def last_used_track(self):
         # type: () -> Union[int, float]
-        return self._tr_off + self._num_tr - 1
-
-    def add_child(self, wire_grp):
-        # type: (WireGroup) -> None
-        self._children.append(wire_grp)
+        return self.track_offset + self._num_tr - 1
 
     def _get_space(self, wire_grp, name1, name2):
         # type: (WireGroup, str, str) -> Union[int, float]
@@ -129,57 +138,84 @@ class WireGroup(object):
     def get_mirror_space(self, wire_grp, first=True):
         # type: (WireGroup, bool) -> Union[int, float]
         if first:
-            return self._get_space(wire_grp, self.first_track[0], wire_grp.first_track[0])
-        return self._get_space(wire_grp, self.last_track[0], wire_grp.last_track[0])
+            return self._get_space(wire_grp, self._first_info[0], wire_grp._first_info[0])
+        return self._get_space(wire_grp, self._last_info[0], wire_grp._last_info[0])
 
-    def place_child(self, wire_grp):
+    def get_child_space(self, wire_grp):
         # type: (WireGroup) -> Union[int, float]
-        sp = self._get_space(wire_grp, self.last_track[0], wire_grp.first_track[0])
-        return self._tr_off + self._num_tr + sp
-
-    def set_parents(self, parents):
-        # type: (List[WireGroup]) -> None
+        """Returns the space between the last track of this group and the given child group."""
+        return self._get_space(wire_grp, self._last_info[0], wire_grp._first_info[0])
 
-        new_tr_off = -float('inf')
-        for parent_wg in parents:
-            cur_tr_off = parent_wg.place_child(self)
-            parent_wg.add_child(self)
-            new_tr_off = max(new_tr_off, cur_tr_off)
-
-        self._tr_off = new_tr_off
+    def place_child(self, wire_grp):
+        # type: (WireGroup) -> Union[int, float]
+        return self.track_offset + self._num_tr + self.get_child_space(wire_grp)
 
     def move_by(self, delta, propagate=True):
         # type: (Union[float, int], bool) -> None
         if delta != 0:
-            self._tr_off += delta
-            if propagate:
-                for child in self._children:
-                    cur_tr_off = child.track_offset
-                    new_tr_off = self.place_child(child)
-                    if new_tr_off > cur_tr_off:
-                        child.move_by(new_tr_off - cur_tr_off, propagate=True)
+            if self._tree is None:
+                self._tr_off += delta
+            else:
+                self._tree.move_group(self._idx, delta, propagate=propagate)
 
     def move_up(self, delta_max=0):
         # type: (Union[float, int]) -> None
-        delta = delta_max
-        for child in self._children:
-            child_idx = self.place_child(child)
-            delta = min(delta, child.track_offset - child_idx)
-        self._tr_off += delta
+        if self._tree is None:
+            self._tr_off += delta_max
+        else:
+            self._tree.move_group_up(self._idx, delta_max)
+
+    def get_signature(self):
+        # type: () -> Tuple[Any, ...]
+        """Returns a hashable tuple that determines how this wire group moves during placement.
+
+        The signature contains the track offset, track count, first/last track information, and
+        the spacing to each child wire group.
+        """
+        child_sp = () if self._tree is None else self._tree.get_child_spaces(self._idx)
+        return (self._wire_type, self.track_offset, self._num_tr, self.first_track,
+                self.last_track, child_sp)
 
 
 class WireTree(object):
+    """A tree of wire groups used for transistor row placement.
+
+    Wire groups are added level by level, and every wire group is a child of all wire groups
+    in the previous level.  The track offsets of all wire groups are stored in a flat list,
+    and the minimum offset difference between every parent and child is computed when the
+    child is added, so moving a wire group only updates offsets, one level at a time.
+
+    copy() returns a snapshot that shares wire group information, level structure, and the
+    offset list with this tree.  A tree copies the offset list on its first write.
+    """
     def __init__(self, mirror=False):
         # type: (bool) -> None
-        self._wire_list = []
-        self._wire_ids = []
+        self._wire_list = []  # type: List[List[WireGroup]]
+        self._wire_ids = []  # type: List[Tuple[int, int]]
         self._mirror = mirror
+        # track offset of each wire group
+        self._offsets = []  # type: List[Union[float, int]]
+        # level of each wire group, and the first wire group index of each level
+        self._level_list = []  # type: List[int]
+        self._level_start = []  # type: List[int]
+        # _gaps[lev][i][j] is the minimum offset from parent i to child j in level lev.
+        self._gaps = []  # type: List[List[List[Union[float, int]]]]
+        # True if the offset list or the structure lists are shared with another tree.
+        self._share_offsets = False
+        self._share_struct = False
 
     def copy(self):
+        # type: () -> WireTree
         new_tree = WireTree(mirror=self._mirror)
-        for wg, wid in zip(self._wire_list, self._wire_ids):
-            new_wg = [w.copy() for w in wg]
-            new_tree.add_wires(new_wg, wid)
+        new_tree._wire_ids = self._wire_ids
+        new_tree._offsets = self._offsets
+        new_tree._level_list = self._level_list
+        new_tree._level_start = self._level_start
+        new_tree._gaps = self._gaps
+        new_tree._wire_list = [[wg._get_view(new_tree) for wg in wire_groups]
+                               for wire_groups in self._wire_list]
+        self._share_offsets = self._share_struct = True
+        new_tree._share_offsets = new_tree._share_struct = True
         return new_tree
 
     @classmethod
@@ -192,24 +228,129 @@ class WireTree(object):
         else:
             return ((sp2 + 1) // 2) / 2
 
+    def _get_offsets_for_write(self):
+        # type: () -> List[Union[float, int]]
+        if self._share_offsets:
+            self._offsets = list(self._offsets)
+            self._share_offsets = False
+        return self._offsets
+
+    def _get_level_range(self, lev):
+        # type: (int) -> Tuple[int, int]
+        start = self._level_start[lev]
+        if lev + 1 < len(self._level_start):
+            return start, self._level_start[lev + 1]
+        return start, len(self._offsets)
+
     def add_wires(self, wire_groups, wire_id):
         # type: (List[WireGroup], Tuple[int, int]) -> None
+        if self._share_struct:
+            self._wire_ids = list(self._wire_ids)
+            self._level_list = list(self._level_list)
+            self._level_start = list(self._level_start)
+            self._gaps = list(self._gaps)
+            self._share_struct = False
+
+        offsets = self._get_offsets_for_write()
+        lev = len(self._wire_list)
+        start = len(offsets)
         if self._wire_list:
-            last_wg = self._wire_list[-1]
-            for wg in wire_groups:
-                wg.set_parents(last_wg)
-            self._wire_ids.append(wire_id)
-            self._wire_list.append(wire_groups)
+            parents = self._wire_list[-1]
+            pstart = self._level_start[-1]
+            gaps = [[p.num_track + p.get_child_space(wg) for wg in wire_groups] for p in parents]
+            tr_off_list = [max((offsets[pstart + pidx] + gap_row[cidx]
+                                for pidx, gap_row in enumerate(gaps)))
+                           for cidx in range(len(wire_groups))]
         else:
-            self._wire_ids.append(wire_id)
-            self._wire_list.append(wire_groups)
-            if self._mirror:
-                for w1 in wire_groups:
-                    sp = 0
-                    for w2 in wire_groups:
-                        sp = max(sp, w1.get_mirror_space(w2))
-
-                    w1.move_by(self._get_half_space(sp))
+            gaps = []
+            tr_off_list = [wg.track_offset for wg in wire_groups]
+
+        for cidx, (wg, tr_off) in enumerate(zip(wire_groups, tr_off_list)):
+            wg._tree = self
+            wg._idx = start + cidx
+            offsets.append(tr_off)
+            self._level_list.append(lev)
+        self._level_start.append(start)
+        self._gaps.append(gaps)
+        self._wire_ids.append(wire_id)
+        self._wire_list.append(wire_groups)
+
+        if lev == 0 and self._mirror:
+            for w1 in wire_groups:
+                sp = 0
+                for w2 in wire_groups:
+                    sp = max(sp, w1.get_mirror_space(w2))
+
+                w1.move_by(self._get_half_space(sp))
+
+    def get_child_spaces(self, idx):
+        # type: (int) -> Tuple[Union[float, int], ...]
+        """Returns the spaces between the given wire group and all its children."""
+        lev = self._level_list[idx]
+        if lev + 1 == len(self._level_start):
+            return ()
+        num_tr = self._wire_list[lev][idx - self._level_start[lev]].num_track
+        gap_row = self._gaps[lev + 1][idx - self._level_start[lev]]
+        return tuple((gap - num_tr for gap in gap_row))
+
+    def move_group(self, idx, delta, propagate=True):
+        # type: (int, Union[float, int], bool) -> None
+        """Moves the given wire group by delta tracks.
+
+        If propagate is True, children are pushed up so they do not overlap moved parents.
+        Children are updated one level at a time, and propagation stops at the first level
+        where no wire group moves.
+
+        Parameters
+        ----------
+        idx : int
+            the wire group index.
+        delta : Union[float, int]
+            number of tracks to move.
+        propagate : bool
+            True to push up children.
+        """
+        offsets = self._get_offsets_for_write()
+        offsets[idx] += delta
+        if not propagate:
+            return
+
+        lev = self._level_list[idx]
+        moved = [idx - self._level_start[lev]]
+        for lev in range(lev + 1, len(self._level_start)):
+            pstart = self._level_start[lev - 1]
+            cstart, cstop = self._get_level_range(lev)
+            gaps = self._gaps[lev]
+            next_moved = []
+            for cidx in range(cstop - cstart):
+                new_tr_off = max((offsets[pstart + pidx] + gaps[pidx][cidx] for pidx in moved))
+                if new_tr_off > offsets[cstart + cidx]:
+                    offsets[cstart + cidx] = new_tr_off
+                    next_moved.append(cidx)
+            if not next_moved:
+                break
+            moved = next_moved
+
+    def move_group_up(self, idx, delta_max=0):
+        # type: (int, Union[float, int]) -> None
+        """Moves the given wire group up by at most delta_max tracks, without moving children.
+
+        Parameters
+        ----------
+        idx : int
+            the wire group index.
+        delta_max : Union[float, int]
+            maximum number of tracks to move.
+        """
+        offsets = self._get_offsets_for_write()
+        lev = self._level_list[idx]
+        delta = delta_max
+        if lev + 1 < len(self._level_start):
+            cstart, cstop = self._get_level_range(lev + 1)
+            tr_off = offsets[idx]
+            for cidx, gap in enumerate(self._gaps[lev + 1][idx - self._level_start[lev]]):
+                delta = min(delta, offsets[cstart + cidx] - (tr_off + gap))
+        offsets[idx] += delta
 
     def get_wire_groups(self, wire_id, get_next=False):
         # type: (Tuple[int, int]) -> Optional[List[WireGroup]]
@@ -221,6 +362,90 @@ class WireTree(object):
         else:
             return None
 
+    def get_signature(self):
+        # type: () -> Tuple[Any, ...]
+        """Returns a hashable tuple that describes the wire groups of this tree.
+
+        Two trees with equal signatures yield identical track offsets when placed the same way,
+        so the signature is used to cache placement results.
+        """
+        return self._mirror, tuple((wid, tuple(wg.get_signature() for wg in wire_groups))
+                                   for wid, wire_groups in zip(self._wire_ids, self._wire_list))
+
+    def get_level_index(self, wire_id):
+        # type: (Tuple[int, int]) -> int
+        """Returns the number of wire group levels with wire ID less than the given ID."""
+        return bisect.bisect_left(self._wire_ids, wire_id)
+
+    def get_level_signature(self, lev):
+        # type: (int) -> Tuple[Any, ...]
+        """Returns a hashable tuple that describes the wire groups in the given level.
+
+        The signature contains the wire ID, the track information and current offset of each
+        wire group, and the minimum offsets from wire groups in the previous level.  Together
+        with the signatures of previous levels, it determines how wire groups in this level
+        move during placement.
+        """
+        start, stop = self._get_level_range(lev)
+        return (self._wire_ids[lev],
+                tuple(((wg.type, wg.num_track, wg._first_info, wg._last_info)
+                       for wg in self._wire_list[lev])),
+                tuple(self._offsets[start:stop]),
+                tuple((tuple(gap_row) for gap_row in self._gaps[lev])))
+
+    def get_prefix_offsets(self, num_lev):
+        # type: (int) -> Tuple[Union[float, int], ...]
+        """Returns the track offsets of wire groups in the first num_lev levels."""
+        stop = self._level_start[num_lev] if num_lev < len(self._level_start) else None
+        return tuple(self._offsets[:stop])
+
+    def set_prefix_offsets(self, num_lev, tr_off_list):
+        # type: (int, Tuple[Union[float, int], ...]) -> None
+        """Sets the track offsets of wire groups in the first num_lev levels.
+
+        Wire groups in later levels are pushed up so they do not overlap their parents, as if
+        the wire groups in the first num_lev levels were moved with propagation.
+
+        Parameters
+        ----------
+        num_lev : int
+            number of levels.
+        tr_off_list : Tuple[Union[float, int], ...]
+            the track offsets, as returned by get_prefix_offsets().
+        """
+        offsets = self._get_offsets_for_write()
+        offsets[:len(tr_off_list)] = tr_off_list
+        for lev in range(max(1, num_lev), len(self._level_start)):
+            pstart = self._level_start[lev - 1]
+            cstart, cstop = self._get_level_range(lev)
+            gaps = self._gaps[lev]
+            for cidx in range(cstop - cstart):
+                offsets[cstart + cidx] = max(offsets[cstart + cidx],
+                                             max((offsets[pstart + pidx] + gap_row[cidx]
+                                                  for pidx, gap_row in enumerate(gaps))))
+
+    def get_track_offsets(self):
+        # type: () -> Tuple[Tuple[Union[float, int], ...], ...]
+        """Returns the track offsets of all wire groups in this tree."""
+        return tuple(tuple(self._offsets[slice(*self._get_level_range(lev))])
+                     for lev in range(len(self._level_start)))
+
+    def set_track_offsets(self, tr_off_list):
+        # type: (Tuple[Tuple[Union[float, int], ...], ...]) -> None
+        """Moves all wire groups in this tree to the given track offsets.
+
+        Parameters
+        ----------
+        tr_off_list : Tuple[Tuple[Union[float, int], ...], ...]
+            the track offsets, as returned by get_track_offsets().
+        """
+        if len(tr_off_list) != len(self._wire_list):
+            raise ValueError('Track offsets does not match wire tree structure.')
+        offsets = self._get_offsets_for_write()
+        for start, wire_groups, tr_offs in zip(self._level_start, self._wire_list, tr_off_list):
+            num = min(len(wire_groups), len(tr_offs))
+            offsets[start:start + num] = tr_offs[:num]
+
     def get_top_tr(self):
         # type: () -> Optional[Union[float, int]]
         top_tr = None
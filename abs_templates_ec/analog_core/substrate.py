@@ -3,7 +3,7 @@
 """This module defines various substrate related classes."""
 # TODO: Add tech_cls switch support?
 
-from typing import TYPE_CHECKING, Dict, Any, Set, Tuple, Optional, Union
+from typing import TYPE_CHECKING, Dict, Any, Set, Tuple, Optional, Union, List
 
 from bag.util.search import BinaryIterator
 from bag.layout.template import TemplateBase
@@ -369,6 +369,7 @@ class SubstrateRing(TemplateBase):
             show_pins=False,
             dnw_mode='',
             half_blk_x=True,
+            tile_fg=0,
         )
 
     @classmethod
@@ -393,6 +394,7 @@ class SubstrateRing(TemplateBase):
             show_pins='True to show pin labels.',
             dnw_mode='deep N-well mode string.  Empty string to disable.',
             half_blk_x='True to allow half block width',
+            tile_fg='number of fingers of ring segment masters.  0 to disable tiling.',
         )
 
     def draw_layout(self):
@@ -407,6 +409,7 @@ class SubstrateRing(TemplateBase):
         show_pins = self.params['show_pins']
         dnw_mode = self.params['dnw_mode']
         half_blk_x = self.params.get('half_blk_x', True)
+        tile_fg = self.params.get('tile_fg', 0)
 
         sub_end_mode = 15
         lch = self._tech_cls.get_substrate_ring_lch()
@@ -430,35 +433,48 @@ class SubstrateRing(TemplateBase):
         if top_layer < mtop_lay:
             raise ValueError('top_layer = %d must be at least %d' % (top_layer, mtop_lay))
 
-        htot, master_list, edge_list = self._make_masters(top_layer, mtop_lay, lch, fg_tot, w,
-                                                          fg_side, sub_type, threshold, dnw_mode,
-                                                          box_h)
+        # each row and each vertical edge is a list of (master, array count) pieces.
+        if 0 < tile_fg <= fg_tot // 2:
+            htot, row_pieces, edge_pieces = self._make_tiled_masters(top_layer, mtop_lay, lch,
+                                                                     fg_tot, w, fg_side,
+                                                                     sub_type, threshold,
+                                                                     dnw_mode, box_h, tile_fg,
+                                                                     tile_fg * sd_pitch)
+        else:
+            htot, master_list, edge_list = self._make_masters(top_layer, mtop_lay, lch, fg_tot,
+                                                              w, fg_side, sub_type, threshold,
+                                                              dnw_mode, box_h)
+            row_pieces = [([(master, 1)], edge, edge)
+                          for master, edge in zip(master_list[:3], edge_list[:3])]
+            edge_pieces = [(edge_list[3], 1)]
 
         # arrange layout masters
         # first, compute edge margins so everything is quantized properly.
-        m_sub, m_end1, m_end2, m_ext = master_list
-        e_sub, e_end1, e_end2, e_ext = edge_list
-        e1_h = m_end1.bound_box.height_unit
-        e2_h = m_end2.bound_box.height_unit
-        sub_h = m_sub.bound_box.height_unit
-        sub_w = m_sub.bound_box.width_unit
+        (sub_pieces, e_sub, _), (end1_pieces, _, _), (end2_pieces, _, _) = row_pieces
+        e1_h = end1_pieces[0][0].bound_box.height_unit
+        e2_h = end2_pieces[0][0].bound_box.height_unit
+        sub_h = sub_pieces[0][0].bound_box.height_unit
+        sub_w = sum((master.bound_box.width_unit * nx for master, nx in sub_pieces))
         e_sub_w = e_sub.bound_box.width_unit
 
         # add masters at correct locations
-        m_list = [e_end1, m_end1, e_end1, e_sub, m_sub, e_sub, e_end2, m_end2, e_end2]
+        p_list = [row_pieces[1], row_pieces[0], row_pieces[2]]
         xl_list = [dx, dx + e_sub_w, dx + e_sub_w + sub_w]
         yl_list = [0, e1_h, e1_h + sub_h]
         o_list = ['R0', 'R0', 'MY']
         flip_ud_y = [False, False, True]
         self._blk_loc = ((wtot - box_w) // 2, (htot - box_h) // 2)
 
-        # substrate connection master
-        conn_params = dict(
-            layout_info=m_sub.get_edge_layout_info(),
-            layout_name=m_sub.get_layout_basename() + '_subconn',
-            is_laygo=False,
-        )
-        m_conn = self.new_template(params=conn_params, temp_cls=AnalogSubstrateConn)
+        # substrate connection masters
+        conn_masters = []
+        for m_sub, _ in sub_pieces:
+            conn_params = dict(
+                layout_info=m_sub.get_edge_layout_info(),
+                layout_name=m_sub.get_layout_basename() + '_subconn',
+                is_laygo=False,
+            )
+            conn_masters.append(self.new_template(params=conn_params,
+                                                  temp_cls=AnalogSubstrateConn))
 
         # add substrate row masters
         edge_inst_list = []
@@ -469,57 +485,57 @@ class SubstrateRing(TemplateBase):
             m_idx = 0
             for yidx, (yl, flip_ud2) in enumerate(zip(yl_list, flip_ud_y)):
                 flip_ud = (flip_ud1 != flip_ud2)
+                mid_pieces, e_left, e_right = p_list[yidx]
                 for xidx, (xl, orient) in enumerate(zip(xl_list, o_list)):
-                    master = m_list[m_idx]
+                    if xidx == 1:
+                        pieces = mid_pieces
+                    else:
+                        pieces = [(e_left if xidx == 0 else e_right, 1)]
                     cur_name = name_fmt % m_idx  # type: str
-                    if not master.is_empty:
-                        if flip_ud:
-                            orient = 'MX' if orient == 'R0' else 'R180'
-                        if orient == 'R0':
-                            if flip_ud1:
-                                loc = (xl, yoff - yl - master.bound_box.height_unit)
-                            else:
-                                loc = (xl, yl)
-                        elif orient == 'MY':
-                            if flip_ud1:
-                                loc = (xl + master.bound_box.width_unit, yoff - yl - master.bound_box.height_unit)
-                            else:
-                                loc = (xl + master.bound_box.width_unit, yl)
-                        elif orient == 'MX':
-                            if flip_ud1:
-                                loc = (xl, yoff - yl)
-                            else:
-                                loc = (xl, yl + master.bound_box.height_unit)
-                        elif orient == 'R180':
-                            if flip_ud1:
-                                loc = (xl + master.bound_box.width_unit, yoff - yl)
-                            else:
-                                loc = (xl + master.bound_box.width_unit, yl + master.bound_box.height_unit)
-                        else:
-                            raise ValueError('Unsupported orientation: %s' % orient)
-                        inst = self.add_instance(master, inst_name=cur_name, loc=loc,
-                                                 orient=orient, unit_mode=True)
-                        if xidx == 0 or xidx == 2:
-                            edge_inst_list.append(inst)
-                        elif xidx == 1 and yidx == 1:
-                            # get supply TrackID
-                            hm_tidx = self.grid.coord_to_track(mtop_lay, inst.bound_box.yc_unit,
-                                                               unit_mode=True)
-                            ntr = inst.bound_box.height_unit // hm_pitch  # type: int
-                            tr_width = self.grid.get_max_track_width(mtop_lay, 1, ntr,
-                                                                     half_end_space=False)
-                            tid_list.append(TrackID(mtop_lay, hm_tidx, width=tr_width))
-                            inst = self.add_instance(m_conn, inst_name=cur_name + '_CONN', loc=loc,
-                                                     orient=orient, unit_mode=True)
-                            conn_list.append(inst)
+                    if flip_ud:
+                        orient = 'MX' if orient == 'R0' else 'R180'
+                    row_conn_list = []
+                    for pidx, (master, nx) in enumerate(pieces):
+                        mw = master.bound_box.width_unit
+                        if not master.is_empty:
+                            loc = self._get_inst_loc(master, xl, yl, yoff, orient, flip_ud1)
+                            inst_name = cur_name if pidx == 0 else '%s_%d' % (cur_name, pidx)
+                            inst = self.add_instance(master, inst_name=inst_name, loc=loc,
+                                                     orient=orient, nx=nx, spx=mw,
+                                                     unit_mode=True)
+                            if xidx == 0 or xidx == 2:
+                                edge_inst_list.append(inst)
+                            elif xidx == 1 and yidx == 1:
+                                if pidx == 0:
+                                    # get supply TrackID
+                                    hm_tidx = self.grid.coord_to_track(mtop_lay,
+                                                                       inst.bound_box.yc_unit,
+                                                                       unit_mode=True)
+                                    ntr = inst.bound_box.height_unit // hm_pitch  # type: int
+                                    tr_width = self.grid.get_max_track_width(mtop_lay, 1, ntr,
+                                                                             half_end_space=False)
+                                    tid_list.append(TrackID(mtop_lay, hm_tidx, width=tr_width))
+                                inst = self.add_instance(conn_masters[pidx],
+                                                         inst_name=inst_name + '_CONN', loc=loc,
+                                                         orient=orient, nx=nx, spx=mw,
+                                                         unit_mode=True)
+                                row_conn_list.append(inst)
+                        xl += nx * mw
+                    if row_conn_list:
+                        conn_list.append(row_conn_list)
                     m_idx += 1
 
         # add left and right edge
-        hsub = e1_h + e2_h + sub_h
-        edge_inst_list.append(self.add_instance(e_ext, inst_name='XEL', loc=(dx, hsub),
-                                                unit_mode=True))
-        edge_inst_list.append(self.add_instance(e_ext, inst_name='XER', loc=(wtot - dx, hsub),
-                                                orient='MY', unit_mode=True))
+        yl = e1_h + e2_h + sub_h
+        for pidx, (e_ext, ny) in enumerate(edge_pieces):
+            suffix = '' if pidx == 0 else '_%d' % pidx
+            spy = e_ext.bound_box.height_unit
+            edge_inst_list.append(self.add_instance(e_ext, inst_name='XEL' + suffix, loc=(dx, yl),
+                                                    ny=ny, spy=spy, unit_mode=True))
+            edge_inst_list.append(self.add_instance(e_ext, inst_name='XER' + suffix,
+                                                    loc=(wtot - dx, yl), orient='MY', ny=ny,
+                                                    spy=spy, unit_mode=True))
+            yl += ny * spy
 
         # set size and array box
         res = self.grid.resolution
@@ -549,13 +565,39 @@ class SubstrateRing(TemplateBase):
         self.connect_wires(dum_warr_list)
         edge_warrs = self.connect_wires(conn_warr_list)
 
-        for conn_inst, tid in zip(conn_list, tid_list):
-            cur_warrs = edge_warrs + conn_inst.get_port(port_name).get_pins(mtop_lay - 1)
+        for row_conn_list, tid in zip(conn_list, tid_list):
+            cur_warrs = list(edge_warrs)
+            for conn_inst in row_conn_list:
+                cur_warrs.extend(conn_inst.get_all_port_pins(port_name, layer=mtop_lay - 1))
             sub_wires = self.connect_to_tracks(cur_warrs, tid)
             self.add_pin(port_name, sub_wires, show=show_pins)
 
-    def _make_masters(self, top_layer, mtop_lay, lch, fg_tot, w, fg_side, sub_type, threshold,
-                      dnw_mode, box_h):
+    @staticmethod
+    def _get_inst_loc(master, xl, yl, yoff, orient, flip_ud1):
+        # type: (TemplateBase, int, int, int, str, bool) -> Tuple[int, int]
+        """Returns the location of a ring master with the given lower-left corner."""
+        if orient == 'R0':
+            if flip_ud1:
+                return xl, yoff - yl - master.bound_box.height_unit
+            return xl, yl
+        elif orient == 'MY':
+            if flip_ud1:
+                return xl + master.bound_box.width_unit, yoff - yl - master.bound_box.height_unit
+            return xl + master.bound_box.width_unit, yl
+        elif orient == 'MX':
+            if flip_ud1:
+                return xl, yoff - yl
+            return xl, yl + master.bound_box.height_unit
+        elif orient == 'R180':
+            if flip_ud1:
+                return xl + master.bound_box.width_unit, yoff - yl
+            return xl + master.bound_box.width_unit, yl + master.bound_box.height_unit
+        else:
+            raise ValueError('Unsupported orientation: %s' % orient)
+
+    def _make_row_masters(self, mtop_lay, lch, fg, w, sub_type, threshold, dnw_mode):
+        # type: (int, float, int, Union[float, int], str, str, str) -> List[TemplateBase]
+        """Create substrate row, end row, and inner end row masters with the given width."""
         options1 = dict(is_sub_ring=True, dnw_mode=dnw_mode)
         options2 = dict(dnw_mode=dnw_mode)
         options3 = options1.copy()
@@ -563,7 +605,7 @@ class SubstrateRing(TemplateBase):
 
         sub_params = dict(
             lch=lch,
-            fg=fg_tot,
+            fg=fg,
             w=w,
             sub_type=sub_type,
             threshold=threshold,
@@ -574,7 +616,7 @@ class SubstrateRing(TemplateBase):
 
         end1_params = dict(
             lch=lch,
-            fg=fg_tot,
+            fg=fg,
             sub_type=sub_type,
             threshold=threshold,
             is_end=True,
@@ -584,17 +626,19 @@ class SubstrateRing(TemplateBase):
         end1_master = self.new_template(params=end1_params, temp_cls=AnalogEndRow)
 
         end2_params = dict(
-            fg=fg_tot,
+            fg=fg,
             sub_type=sub_type,
             threshold=threshold,
             end_ext_info=sub_master.get_ext_top_info(),
             options=options2,
         )
         end2_master = self.new_template(params=end2_params, temp_cls=SubRingEndRow)
+        return [sub_master, end1_master, end2_master]
 
-        # compute extension height
-        hsub = (sub_master.bound_box.height_unit + end1_master.bound_box.height_unit +
-                end2_master.bound_box.height_unit)
+    def _get_ring_height(self, top_layer, row_masters, box_h):
+        # type: (int, List[TemplateBase], int) -> Tuple[int, int]
+        """Returns the ring height and the height of one substrate row stack."""
+        hsub = sum((master.bound_box.height_unit for master in row_masters))
         hmin = 2 * hsub + box_h
         blk_h = self.grid.get_block_size(top_layer, unit_mode=True)[1]
         if box_h % blk_h != 0:
@@ -604,32 +648,99 @@ class SubstrateRing(TemplateBase):
         if ((htot - box_h) // blk_h) % 2 == 1:
             # make sure template has integer number of blocks from top and bottom.
             htot += blk_h
+        return htot, hsub
 
+    def _make_ext_master(self, sub_type, height, fg, end2_master, dnw_mode):
+        # type: (str, int, int, TemplateBase, str) -> TemplateBase
         ext_params = dict(
             sub_type=sub_type,
-            height=htot - 2 * hsub,
-            fg=fg_tot,
+            height=height,
+            fg=fg,
             end_ext_info=end2_master.get_ext_info(),
-            options=options2,
+            options=dict(dnw_mode=dnw_mode),
         )
-        ext_master = self.new_template(params=ext_params, temp_cls=SubRingExt)
-
-        master_list = [sub_master, end1_master, end2_master, ext_master]
-
-        edge_list = []
-        for master in master_list:
-            edge_params = dict(
-                is_end=True,
-                is_sub_ring=True,
-                guard_ring_nf=fg_side,
-                name_id=master.get_layout_basename(),
-                layout_info=master.get_edge_layout_info(),
-                adj_blk_info=master.get_left_edge_info(),
-            )
-            edge_list.append(self.new_template(params=edge_params, temp_cls=AnalogEdge))
+        return self.new_template(params=ext_params, temp_cls=SubRingExt)
+
+    def _make_edge_master(self, master, fg_side):
+        # type: (TemplateBase, int) -> TemplateBase
+        edge_params = dict(
+            is_end=True,
+            is_sub_ring=True,
+            guard_ring_nf=fg_side,
+            name_id=master.get_layout_basename(),
+            layout_info=master.get_edge_layout_info(),
+            adj_blk_info=master.get_left_edge_info(),
+        )
+        return self.new_template(params=edge_params, temp_cls=AnalogEdge)
+
+    def _make_masters(self, top_layer, mtop_lay, lch, fg_tot, w, fg_side, sub_type, threshold,
+                      dnw_mode, box_h):
+        row_masters = self._make_row_masters(mtop_lay, lch, fg_tot, w, sub_type, threshold,
+                                             dnw_mode)
+
+        # compute extension height
+        htot, hsub = self._get_ring_height(top_layer, row_masters, box_h)
+        ext_master = self._make_ext_master(sub_type, htot - 2 * hsub, fg_tot, row_masters[2],
+                                           dnw_mode)
+
+        master_list = row_masters + [ext_master]
+        edge_list = [self._make_edge_master(master, fg_side) for master in master_list]
 
         return htot, master_list, edge_list
 
+    def _make_tiled_masters(self, top_layer, mtop_lay, lch, fg_tot, w, fg_side, sub_type,
+                            threshold, dnw_mode, box_h, tile_fg, tile_w):
+        # type: (...) -> Tuple[int, List[Tuple[List[Tuple[TemplateBase, int]], TemplateBase, TemplateBase]], List[Tuple[TemplateBase, int]]]
+        """Create ring masters that are arrayed to cover the ring.
+
+        Each row is drawn as an array of rows with tile_fg fingers, followed by one row with
+        the remaining tile_fg to 2 * tile_fg - 1 fingers.  The left and right edges are drawn
+        the same way, with segments whose height is tile_w rounded up to block pitch.  All
+        masters except the last segments only depend on the tile size, so rings of different
+        sizes share them.
+
+        Returns
+        -------
+        htot : int
+            the ring height.
+        row_pieces : List[Tuple[List[Tuple[TemplateBase, int]], TemplateBase, TemplateBase]]
+            list of (pieces, left edge, right edge) of the substrate row, end row, and inner
+            end row.  pieces is a list of (master, array count).
+        edge_pieces : List[Tuple[TemplateBase, int]]
+            the left edge pieces between the bottom and top rows, as (master, array count).
+        """
+        num_tile = fg_tot // tile_fg - 1
+        last_fg = fg_tot - num_tile * tile_fg
+
+        unit_masters = self._make_row_masters(mtop_lay, lch, tile_fg, w, sub_type, threshold,
+                                              dnw_mode)
+        last_masters = self._make_row_masters(mtop_lay, lch, last_fg, w, sub_type, threshold,
+                                              dnw_mode)
+        htot, hsub = self._get_ring_height(top_layer, unit_masters, box_h)
+
+        row_pieces = []
+        for unit_master, last_master in zip(unit_masters, last_masters):
+            row_pieces.append(([(unit_master, num_tile), (last_master, 1)],
+                               self._make_edge_master(unit_master, fg_side),
+                               self._make_edge_master(last_master, fg_side)))
+
+        # vertical edges
+        ext_h = htot - 2 * hsub
+        blk_h = self.grid.get_block_size(top_layer, unit_mode=True)[1]
+        tile_h = -(-tile_w // blk_h) * blk_h
+        num_tile = ext_h // tile_h - 1
+        if num_tile > 0:
+            ext_pieces = [(tile_h, num_tile), (ext_h - num_tile * tile_h, 1)]
+        else:
+            ext_pieces = [(ext_h, 1)]
+        edge_pieces = []
+        for ext_h, ny in ext_pieces:
+            ext_master = self._make_ext_master(sub_type, ext_h, tile_fg, unit_masters[2],
+                                               dnw_mode)
+            edge_pieces.append((self._make_edge_master(ext_master, fg_side), ny))
+
+        return htot, row_pieces, edge_pieces
+
 
 class DeepNWellRing(TemplateBase):
     """A template that draws a deep N-well double ring around a template.
@@ -664,6 +775,7 @@ class DeepNWellRing(TemplateBase):
         # type: () -> Dict[str, Any]
         return dict(
             show_pins=False,
+            tile_fg=0,
         )
 
     @classmethod
@@ -686,6 +798,7 @@ class DeepNWellRing(TemplateBase):
             threshold='substrate threshold flavor.',
             show_pins='True to show pin labels.',
             dnw_mode='deep N-well mode string.  This determines the DNW space to adjacent blocks.',
+            tile_fg='number of fingers of ring segment masters.  0 to disable tiling.',
         )
 
     def draw_layout(self):
@@ -698,6 +811,7 @@ class DeepNWellRing(TemplateBase):
         threshold = self.params['threshold']
         show_pins = self.params['show_pins']
         dnw_mode = self.params['dnw_mode']
+        tile_fg = self.params['tile_fg']
 
         # test top_layer
         hm_layer = self._tech_cls.get_mos_conn_layer() + 1
@@ -714,6 +828,7 @@ class DeepNWellRing(TemplateBase):
             threshold=threshold,
             show_pins=False,
             dnw_mode='compact',
+            tile_fg=tile_fg,
         )
         dnw_master = self.new_template(params=dnw_params, temp_cls=SubstrateRing)
         dnw_blk_loc = dnw_master.blk_loc_unit
@@ -726,6 +841,7 @@ class DeepNWellRing(TemplateBase):
             fg_side=fg_side,
             threshold=threshold,
             show_pins=False,
+            tile_fg=tile_fg,
         )
         sub_master = self.new_template(params=sub_params, temp_cls=SubstrateRing)
         sub_blk_loc = sub_master.blk_loc_unit
@@ -3,21 +3,34 @@
 """This module defines abstract analog mosfet template classes.
 """
 
-from typing import TYPE_CHECKING, Dict, Any, Union, Tuple, List, Optional
+from typing import TYPE_CHECKING, Dict, Any, Union, Tuple, List, Optional, Mapping
 
 import abc
+import hashlib
+from types import MappingProxyType
 from itertools import chain
 from collections import namedtuple
 
 from bag.layout.routing import RoutingGrid
 from bag.layout.template import TemplateBase
 
+from ..cache import LRUCache, freeze_key, get_primitive_disk_cache
+from ..tech_snapshot import get_snapshot_constants, get_tech_table_key
+
 if TYPE_CHECKING:
     from bag.layout.tech import TechInfoConfig
 
 PlaceInfo = namedtuple('PlaceInfo', ['tot_width', 'core_fg', 'core_width', 'edge_margins',
                                      'edge_widths', 'arr_box_x', ])
 
+# process-wide table of valid extension widths.  Entries are keyed by configuration key,
+# lch_unit, top/bottom extension information, and options.
+_ext_widths_cache = LRUCache(max_size=4096)
+# process-wide table of channel-length dependent technology constants.  Entries are keyed by
+# (technology class, configuration fingerprint, lch_unit), so technology objects created by
+# different TemplateDBs in the same process share entries when their configurations agree.
+_mos_constants_cache = LRUCache(max_size=128)
+
 
 class MOSTech(object, metaclass=abc.ABCMeta):
     """An abstract class for drawing transistor related layout.
@@ -41,8 +54,8 @@ class MOSTech(object, metaclass=abc.ABCMeta):
         self.mos_config = self.config[mos_entry_name]
         self.res = self.config['resolution']
         self.tech_info = tech_info
-        self._lch_unit = None
-        self._mos_constants = None
+        self._mos_entry_name = mos_entry_name
+        self._config_key = None
 
     @abc.abstractmethod
     def get_edge_info(self, lch_unit, guard_ring_nf, is_end, **kwargs):
@@ -146,6 +159,104 @@ class MOSTech(object, metaclass=abc.ABCMeta):
         """
         return [0]
 
+    def get_valid_extension_widths_cached(self, lch_unit, top_ext_info, bot_ext_info, **kwargs):
+        # type: (int, Any, Any, **kwargs) -> Tuple[int, ...]
+        """Memoized version of get_valid_extension_widths().
+
+        Results are stored in a process-wide table keyed by technology configuration, channel
+        length, extension information and options, so repeated placements of the same row
+        pairs become table lookups.
+
+        Parameters
+        ----------
+        lch_unit : int
+            the channel length in resolution units.
+        top_ext_info : Any
+            layout information about the top block.
+        bot_ext_info : Any
+            layout information about the bottom block.
+        **kwargs :
+            optional parameters.
+
+        Returns
+        -------
+        valid_widths : Tuple[int, ...]
+            the valid extension widths in mos_pitch units, sorted in increasing order.
+        """
+        key = (self.get_config_key(), lch_unit, freeze_key(top_ext_info),
+               freeze_key(bot_ext_info), freeze_key(kwargs))
+        return _ext_widths_cache.get(key, lambda: tuple(
+            self.get_valid_extension_widths(lch_unit, top_ext_info, bot_ext_info, **kwargs)))
+
+    def build_extension_width_table(self, lch_unit, ext_info_list, **kwargs):
+        # type: (int, List[Any], **kwargs) -> Dict[Tuple[int, int], Tuple[int, ...]]
+        """Precomputes valid extension widths for all pairs of the given extension information.
+
+        This populates the table used by get_valid_extension_widths_cached(), so generators
+        that know all row types up front (e.g. a parameter sweep) pay the computation cost
+        once.
+
+        Parameters
+        ----------
+        lch_unit : int
+            the channel length in resolution units.
+        ext_info_list : List[Any]
+            list of extension information objects.  These are the ext_top_info/ext_bot_info
+            entries returned by get_mos_info() and get_substrate_info().
+        **kwargs :
+            optional parameters passed to get_valid_extension_widths().
+
+        Returns
+        -------
+        table : Dict[Tuple[int, int], Tuple[int, ...]]
+            map from (top index, bottom index) in ext_info_list to valid extension widths.
+        """
+        table = {}
+        for top_idx, top_ext_info in enumerate(ext_info_list):
+            for bot_idx, bot_ext_info in enumerate(ext_info_list):
+                table[(top_idx, bot_idx)] = self.get_valid_extension_widths_cached(
+                    lch_unit, top_ext_info, bot_ext_info, **kwargs)
+        return table
+
+    def get_ext_width_key(self, ext_info):
+        # type: (Any) -> Any
+        """Returns a hashable key of the extension information used to find extension widths.
+
+        AnalogBase shares row placement plans between templates whose rows have equal keys,
+        so the key must contain every field that get_valid_extension_widths() reads.  The
+        default implementation drops the per-finger poly types and the left/right edge
+        information of ExtInfo named tuples, so the key does not depend on the number of
+        fingers.  Override this method if get_valid_extension_widths() uses those fields.
+
+        Parameters
+        ----------
+        ext_info : Any
+            the extension information object.
+
+        Returns
+        -------
+        key : Any
+            the hashable key.
+        """
+        fields = getattr(ext_info, '_fields', ())
+        if 'po_types' in fields:
+            ext_info = ext_info._replace(po_types=tuple(sorted(set(ext_info.po_types))))
+        if 'edgel_info' in fields:
+            ext_info = ext_info._replace(edgel_info=None, edger_info=None)
+        return freeze_key(ext_info)
+
+    @classmethod
+    def get_extension_width_cache_stats(cls):
+        # type: () -> Dict[str, Any]
+        """Returns hit/miss statistics of the shared valid extension widths table.
+
+        Returns
+        -------
+        stats : Dict[str, Any]
+            the cache statistics dictionary.
+        """
+        return _ext_widths_cache.get_stats()
+
     @abc.abstractmethod
     def get_ext_info(self, lch_unit, w, fg, top_ext_info, bot_ext_info, **kwargs):
         # type: (int, int, int, Any, Any, **kwargs) -> Dict[str, Any]
@@ -539,6 +650,58 @@ class MOSTech(object, metaclass=abc.ABCMeta):
         """
         return self.get_mos_tech_constants(lch_unit).get('mos_conn_modulus', 1)
 
+    def get_mos_conn_tile_fg(self, lch_unit, conn_params):
+        # type: (int, Mapping[str, Any]) -> int
+        """Returns the number of fingers of transistor connection unit masters.
+
+        If this method returns a positive number n, a transistor connection with fg >= 2 * n
+        fingers is identical to abutted copies of the same connection with n fingers,
+        followed by one connection with the remaining n to 2 * n - 1 fingers.  To make this
+        hold, every unit has an even number of stacked segments, so it starts and ends on a
+        source, and n is a multiple of the source/drain modulus, so all units have the same
+        source parity.  AnalogBase then draws connections with arrays of unit masters, so the
+        number of connection masters does not depend on finger counts.
+
+        The default implementation reads the 'mos_conn_tile_seg' technology constant, the
+        minimum number of stacked segments in one unit (0 or absent to disable tiling).
+        Differential, diode, gate extension, and interleaved gate connections are never tiled.
+        Connections with gates on the sources are not tiled either, because the gates on the
+        left-most and right-most sources of a connection are not drawn, so the gates on unit
+        boundaries would be missing.
+
+        Parameters
+        ----------
+        lch_unit : int
+            the channel length, in resolution units.
+        conn_params : Mapping[str, Any]
+            the AnalogMOSConn parameters.
+
+        Returns
+        -------
+        tile_fg : int
+            number of fingers per unit master, or 0 if the connection cannot be tiled.
+        """
+        tile_seg = self.get_mos_tech_constants(lch_unit).get('mos_conn_tile_seg', 0)
+        if tile_seg <= 0 or conn_params.get('is_diff', False) or \
+                conn_params.get('diode_conn', False) or conn_params.get('gate_ext_mode', 0):
+            return 0
+
+        options = conn_params.get('options', None) or {}
+        if options.get('gate_interleave', False):
+            return 0
+        if conn_params['ddir'] == 0 or conn_params.get('gate_pref_loc', '') == 's':
+            # gates may be drawn on the sources.
+            return 0
+
+        # units must end on a source, so abutted units do not short source and drain.
+        unit_fg = 2 * options.get('stack', 1)
+        tile_fg = -(-tile_seg // 2) * unit_fg
+        conn_mod = self.get_mos_conn_modulus(lch_unit)
+        # unit masters must start on the same source parity.
+        while tile_fg % conn_mod != 0:
+            tile_fg += unit_fg
+        return tile_fg
+
     def get_conn_drc_info(self, lch_unit, wire_type, is_laygo=False):
         # type: (int, str, bool) -> Dict[int, Dict[str, Any]]
         """Get DRC information about gate/drain/source wire on each layer.
@@ -628,8 +791,77 @@ class MOSTech(object, metaclass=abc.ABCMeta):
         dum_layer = self.get_dum_conn_layer()
         return d_conn_w[dum_layer - d_bot_layer]
 
+    def get_config_key(self):
+        # type: () -> Tuple[Any, ...]
+        """Returns a hashable key that identifies this technology class and configuration.
+
+        Technology objects with equal keys compute identical layout information, so the key
+        is used to share cached results between technology objects in the same process.
+
+        Returns
+        -------
+        config_key : Tuple[Any, ...]
+            the configuration key.
+        """
+        if self._config_key is None:
+            config_hash = hashlib.md5(repr(self.config).encode('utf-8')).hexdigest()
+            self._config_key = (type(self), self._mos_entry_name, config_hash)
+        return self._config_key
+
+    def get_info_cached(self, method_name, *args, **kwargs):
+        # type: (str, *Any, **Any) -> Any
+        """Calls the given layout information method, using the on-disk primitive cache.
+
+        Primitive templates use this method to compute their layout information dictionaries.
+        The result is stored on disk keyed by the method arguments, the technology configuration,
+        the technology class source fingerprint, and the package source fingerprint, so new
+        processes generating the same primitives skip the computation, and editing the
+        technology class invalidates its entries.  If the on-disk cache is disabled, the method
+        is called directly.
+
+        Parameters
+        ----------
+        method_name : str
+            name of the layout information method, such as 'get_mos_info'.
+        *args : Any
+            positional arguments of the method.
+        **kwargs : Any
+            keyword arguments of the method.
+
+        Returns
+        -------
+        info : Any
+            the layout information.
+        """
+        fun = getattr(self, method_name)
+        disk_cache = get_primitive_disk_cache()
+        if disk_cache is None:
+            return fun(*args, **kwargs)
+
+        key = disk_cache.make_key(get_tech_table_key(self), method_name, args, kwargs)
+        return disk_cache.get(key, lambda: fun(*args, **kwargs))
+
+    @classmethod
+    def get_mos_constants_cache_stats(cls):
+        # type: () -> Dict[str, Any]
+        """Returns hit/miss statistics of the shared technology constants table.
+
+        Returns
+        -------
+        stats : Dict[str, Any]
+            the cache statistics dictionary.
+        """
+        return _mos_constants_cache.get_stats()
+
+    @classmethod
+    def clear_mos_constants_cache(cls):
+        # type: () -> None
+        """Clears the shared technology constants and valid extension widths tables."""
+        _mos_constants_cache.clear()
+        _ext_widths_cache.clear()
+
     def get_mos_tech_constants(self, lch_unit):
-        # type: (int) -> Dict[str, Any]
+        # type: (int) -> Mapping[str, Any]
         """Returns a dictionary of technology constants given transistor channel length.
         
         Must have the following entries:
@@ -647,48 +879,59 @@ class MOSTech(object, metaclass=abc.ABCMeta):
         
         Returns
         -------
-        tech_dict : Dict[str, Any]
-            a technology constants dictionary.
+        tech_dict : Mapping[str, Any]
+            a read-only technology constants dictionary.  The same object is shared by all
+            technology objects with identical configuration, so callers must not modify it.
         """
-        if lch_unit != self._lch_unit:
-            # handle general channel-length dependent constants
-            ans = self.mos_config.copy()
-            for key, data in ans.items():
-                if isinstance(data, dict) and 'lch' in data and 'val' in data:
-                    for lch, val in zip(data['lch'], data['val']):
-                        if lch_unit <= lch:
-                            ans[key] = val
-                            break
-
-            # handle mos/dum_conn_w
-            mos_layer = self.get_mos_conn_layer()
-            d_conn_w = ans['d_conn_w']
-            d_bot_layer = ans['d_bot_layer']
-            ans['mos_conn_w'] = d_conn_w[mos_layer - d_bot_layer]
-            ans['dum_conn_w'] = self.get_dum_conn_w(ans)
-            # handle laygo_conn_w
-            if 'laygo_d_conn_w' in ans:
-                d_conn_w = ans['laygo_d_conn_w']
-                d_bot_layer = ans['laygo_d_bot_layer']
-                laygo_layer = self.get_dig_conn_layer()
-                ans['laygo_conn_w'] = d_conn_w[laygo_layer - d_bot_layer]
-
-            # handle sd_pitch
-            offset, scale = ans['sd_pitch_constants']
-            sd_pitch = offset + int(round(scale * lch_unit))
-            ans['sd_pitch'] = sd_pitch
-
-            # handle default parameters
-            if 'po_od_extx' not in ans:
-                offset, lch_scale, sd_pitch_scale = ans.get('po_od_extx_constants', (0, 0, 1))
-                ans['po_od_extx'] = (offset + int(round(lch_scale * lch_unit)) +
-                                     int(round(sd_pitch_scale * sd_pitch)))
-
-            self.postprocess_mos_tech_constants(lch_unit, ans)
-            self._mos_constants = ans
-            self._lch_unit = lch_unit
-
-        return self._mos_constants
+        key = self.get_config_key() + (lch_unit, )
+        return _mos_constants_cache.get(key, lambda: self._load_mos_tech_constants(lch_unit))
+
+    def _load_mos_tech_constants(self, lch_unit):
+        # type: (int) -> Mapping[str, Any]
+        """Returns technology constants from a technology snapshot, or computes them."""
+        ans = get_snapshot_constants(self, lch_unit)
+        if ans is not None:
+            return MappingProxyType(ans)
+        return self._compute_mos_tech_constants(lch_unit)
+
+    def _compute_mos_tech_constants(self, lch_unit):
+        # type: (int) -> Mapping[str, Any]
+        """Computes the technology constants dictionary for the given channel length."""
+        # handle general channel-length dependent constants
+        ans = self.mos_config.copy()
+        for key, data in ans.items():
+            if isinstance(data, dict) and 'lch' in data and 'val' in data:
+                for lch, val in zip(data['lch'], data['val']):
+                    if lch_unit <= lch:
+                        ans[key] = val
+                        break
+
+        # handle mos/dum_conn_w
+        mos_layer = self.get_mos_conn_layer()
+        d_conn_w = ans['d_conn_w']
+        d_bot_layer = ans['d_bot_layer']
+        ans['mos_conn_w'] = d_conn_w[mos_layer - d_bot_layer]
+        ans['dum_conn_w'] = self.get_dum_conn_w(ans)
+        # handle laygo_conn_w
+        if 'laygo_d_conn_w' in ans:
+            d_conn_w = ans['laygo_d_conn_w']
+            d_bot_layer = ans['laygo_d_bot_layer']
+            laygo_layer = self.get_dig_conn_layer()
+            ans['laygo_conn_w'] = d_conn_w[laygo_layer - d_bot_layer]
+
+        # handle sd_pitch
+        offset, scale = ans['sd_pitch_constants']
+        sd_pitch = offset + int(round(scale * lch_unit))
+        ans['sd_pitch'] = sd_pitch
+
+        # handle default parameters
+        if 'po_od_extx' not in ans:
+            offset, lch_scale, sd_pitch_scale = ans.get('po_od_extx_constants', (0, 0, 1))
+            ans['po_od_extx'] = (offset + int(round(lch_scale * lch_unit)) +
+                                 int(round(sd_pitch_scale * sd_pitch)))
+
+        self.postprocess_mos_tech_constants(lch_unit, ans)
+        return MappingProxyType(ans)
 
     def get_analog_unit_fg(self):
         # type: () -> int
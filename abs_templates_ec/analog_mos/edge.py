@@ -100,8 +100,8 @@ class AnalogEndRow(TemplateBase):
             tech_cls = self.grid.tech_info.tech_params['layout'][tech_cls_name]
 
         blk_pitch = self.grid.get_block_size(top_layer, unit_mode=True)[1]
-        end_info = tech_cls.get_analog_end_info(lch_unit, sub_type, threshold, fg, is_end,
-                                                blk_pitch, **options)
+        end_info = tech_cls.get_info_cached('get_analog_end_info', lch_unit, sub_type, threshold,
+                                            fg, is_end, blk_pitch, **options)
 
         self._layout_info = end_info['layout_info']
         self._left_edge_info = end_info['left_edge_info']
@@ -188,7 +188,8 @@ class SubRingEndRow(TemplateBase):
         else:
             tech_cls = self.grid.tech_info.tech_params['layout'][tech_cls_name]
 
-        end_info = tech_cls.get_sub_ring_end_info(sub_type, threshold, fg, end_ext_info, **options)
+        end_info = tech_cls.get_info_cached('get_sub_ring_end_info', sub_type, threshold, fg,
+                                            end_ext_info, **options)
 
         self._layout_info = end_info['layout_info']
         self._left_edge_info = end_info['left_edge_info']
@@ -6,6 +6,8 @@ import abc
 import math
 from collections import namedtuple
 
+import numpy as np
+
 from bag.math import lcm
 from bag.util.search import BinaryIterator
 from bag.layout.util import BBox
@@ -37,6 +39,57 @@ class ExtInfo(namedtuple('ExtInfoBase', ['margins', 'od_h', 'imp_min_h', 'mtype'
                              edger_info=self.edgel_info)
 
 
+def get_value_runs(codes):
+    # type: (np.ndarray) -> List[Tuple[int, int, int]]
+    """Run-length encodes the given 1D integer array.
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        the integer array.  Negative values mark entries to skip.
+
+    Returns
+    -------
+    run_list : List[Tuple[int, int, int]]
+        list of (start, num, code) tuples, one for each run of identical non-negative codes.
+    """
+    num = codes.size
+    if num == 0:
+        return []
+    change = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    stops = np.concatenate((change, [num]))
+    return [(int(start), int(stop - start), int(codes[start]))
+            for start, stop in zip(starts, stops) if codes[start] >= 0]
+
+
+def get_interval_arrays(intv_list):
+    # type: (List[Tuple[int, int]]) -> List[Tuple[int, int, int, int]]
+    """Groups the given intervals into uniformly spaced arrays of identical intervals.
+
+    Parameters
+    ----------
+    intv_list : List[Tuple[int, int]]
+        list of intervals.
+
+    Returns
+    -------
+    arr_list : List[Tuple[int, int, int, int]]
+        list of (lower, upper, num, pitch) tuples.
+    """
+    arr_list = []
+    for lower, upper in sorted(intv_list):
+        if arr_list:
+            lo0, up0, num0, pitch0 = arr_list[-1]
+            if upper - lower == up0 - lo0:
+                pitch = lower - lo0 - (num0 - 1) * pitch0
+                if pitch > 0 and (num0 == 1 or pitch == pitch0):
+                    arr_list[-1] = (lo0, up0, num0 + 1, pitch)
+                    continue
+        arr_list.append((lower, upper, 1, 0))
+    return arr_list
+
+
 class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
     """Base class for implementations of MOSTech in Finfet technologies.
 
@@ -2000,8 +2053,8 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
         return layout_info
 
     # noinspection PyMethodMayBeStatic
-    def draw_mos_rect(self, template, layer, bbox):
-        # type: (TemplateBase, Tuple[str, str], BBox) -> None
+    def draw_mos_rect(self, template, layer, bbox, nx=1, ny=1, spx=0, spy=0):
+        # type: (TemplateBase, Tuple[str, str], BBox, int, int, int, int) -> None
         """This method draws the given transistor layer geometry.
 
         The default implementation is to just call the add_rect() method.  However, if the
@@ -2016,8 +2069,45 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
             the layer/purpose pair.
         bbox : BBox
             the geometry bounding box.
+        nx : int
+            number of columns.
+        ny : int
+            number of rows.
+        spx : int
+            column pitch, in resolution units.
+        spy : int
+            row pitch, in resolution units.
+        """
+        template.add_rect(layer, bbox, nx=nx, ny=ny, spx=spx, spy=spy, unit_mode=True)
+
+    def supports_arrayed_drawing(self):
+        # type: () -> bool
+        """Returns True if draw_mos_rect() and draw_poly() accept arrayed geometries.
+
+        draw_mos() merges runs of identical PO/MD/fill geometries into arrayed rectangles
+        only if this method returns True.  By default, this is the case only if neither
+        method is overridden, since older overrides draw a single geometry.  Subclasses that
+        override these methods and handle the nx/ny/spx/spy arguments should return True.
+
+        Returns
+        -------
+        supported : bool
+            True if arrayed geometries can be passed to the drawing methods.
         """
-        template.add_rect(layer, bbox)
+        cls = type(self)
+        return (cls.draw_mos_rect is MOSTechFinfetBase.draw_mos_rect and
+                cls.draw_poly is MOSTechFinfetBase.draw_poly)
+
+    def _draw_mos_rect_array(self, template, layer, bbox, nx, ny, spx, spy, use_array):
+        # type: (TemplateBase, Tuple[str, str], BBox, int, int, int, int, bool) -> None
+        """Draws an array of transistor layer geometries, one at a time if necessary."""
+        if use_array:
+            self.draw_mos_rect(template, layer, bbox, nx=nx, ny=ny, spx=spx, spy=spy)
+        else:
+            for xidx in range(nx):
+                for yidx in range(ny):
+                    self.draw_mos_rect(template, layer,
+                                       bbox.move_by(dx=xidx * spx, dy=yidx * spy, unit_mode=True))
 
     def draw_od(self, template, od_type, bbox, **kwargs):
         # type: (TemplateBase, str, BBox, **kwargs) -> None
@@ -2047,10 +2137,12 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
                   row_y,  # type: Tuple[int, int]
                   po_y,  # type: Tuple[int, int]
                   od_y,  # type: Tuple[int, int]
+                  nx=1,  # type: int
+                  spx=0,  # type: int
                   **kwargs,
                   ):
         # type: (...) -> None
-        """This method draws a transistor poly.
+        """This method draws a transistor poly, or a horizontal array of identical poly.
 
         By default, this method does the following:
 
@@ -2073,6 +2165,12 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
             the PO Y bounds outside of CPO.
         od_y : Tuple[int, int]
             the OD Y bounds that intersects this PO.
+        nx : int
+            number of PO columns.
+        spx : int
+            the PO column pitch, in resolution units.
+        **kwargs :
+            additional arguments.
         """
         mos_layer_table = self.config['mos_layer_table']
         has_cpo = self.get_has_cpo(mos_constants, **kwargs)
@@ -2082,16 +2180,54 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
 
         po_xl, po_xr = po_x
         if has_cpo:
-            template.add_rect(po_lay, BBox(po_xl, row_y[0], po_xr, row_y[1], res, unit_mode=True))
+            template.add_rect(po_lay, BBox(po_xl, row_y[0], po_xr, row_y[1], res, unit_mode=True),
+                              nx=nx, spx=spx, unit_mode=True)
         else:
-            template.add_rect(po_lay, BBox(po_xl, po_y[0], po_xr, po_y[1], res, unit_mode=True))
+            template.add_rect(po_lay, BBox(po_xl, po_y[0], po_xr, po_y[1], res, unit_mode=True),
+                              nx=nx, spx=spx, unit_mode=True)
 
         od_yb, od_yt = od_y
         if od_yt > od_yb and ('sub' in po_type or
                               ('edge' in po_type and po_type != 'PO_edge_dummy')):
             pode_lay = mos_layer_table.get('PODE', None)
             if pode_lay is not None:
-                template.add_rect(pode_lay, BBox(po_xl, od_yb, po_xr, od_yt, res, unit_mode=True))
+                template.add_rect(pode_lay, BBox(po_xl, od_yb, po_xr, od_yt, res, unit_mode=True),
+                                  nx=nx, spx=spx, unit_mode=True)
+
+    def _draw_poly_array(self, template, mos_constants, po_type, po_x, row_y, po_y, od_y,
+                         nx, spx, use_array, **kwargs):
+        """Draws a horizontal array of transistor poly, one at a time if necessary."""
+        if use_array:
+            self.draw_poly(template, mos_constants, po_type, po_x, row_y, po_y, od_y,
+                           nx=nx, spx=spx, **kwargs)
+        else:
+            po_xl, po_xr = po_x
+            for idx in range(nx):
+                dx = idx * spx
+                self.draw_poly(template, mos_constants, po_type, (po_xl + dx, po_xr + dx),
+                               row_y, po_y, od_y, **kwargs)
+
+    @staticmethod
+    def _get_po_type(od_type, is_edge):
+        # type: (Optional[str], bool) -> str
+        """Returns the PO type given the OD type under the PO and whether it is an edge PO."""
+        if is_edge and od_type is not None:
+            if od_type == 'mos_fake':
+                return 'PO_dummy'
+            elif od_type == 'dum':
+                return 'PO_edge_dummy'
+            elif od_type == 'sub':
+                return 'PO_edge_sub'
+            else:
+                return 'PO_edge'
+        elif od_type == 'mos':
+            return 'PO'
+        elif od_type == 'sub':
+            return 'PO_sub'
+        elif od_type == 'dum':
+            return 'PO_gate_dummy'
+        else:
+            return 'PO_dummy'
 
     def draw_mos(self, template, layout_info):
         # type: (TemplateBase, Dict[str, Any]) -> None
@@ -2201,6 +2337,7 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
         is_planar_sub = layout_info.get('is_planar_sub', False)
         is_sub_ring = layout_info.get('is_sub_ring', False)
         is_gr_continuous = self.is_gr_continuous(lch_unit)
+        use_array = self.supports_arrayed_drawing()
 
         fin_p2 = fin_p // 2
         fin_h2 = fin_h // 2
@@ -2246,9 +2383,9 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
             md_yb, md_yt = row_info.md_y
 
             # draw OD and figure out PO/MD info
-            po_on_od = [False] * fg
-            md_on_od = [False] * (fg + 1)
-            po_is_edge = [False] * fg
+            po_on_od = np.zeros(fg, dtype=bool)
+            md_on_od = np.zeros(fg + 1, dtype=bool)
+            po_is_edge = np.zeros(fg, dtype=bool)
             is_gr_sub = (blk_type == 'gr_sub' or blk_type == 'gr_sub_sub'
                          or blk_type == 'gr_sub_end_sub')
             if od_yt > od_yb:
@@ -2257,16 +2394,14 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
                     if od_start >= 1:
                         po_on_od[od_start - 1] = True
                         po_is_edge[od_start - 1] = True
-                    for idx in range(od_start, od_stop + 1):
-                        md_on_od[idx] = True
-                        if idx < fg:
-                            po_on_od[idx] = True
-                            if not is_gr_sub:
-                                po_is_edge[idx] = idx == od_stop
-
+                    md_on_od[od_start:od_stop + 1] = True
+                    po_on_od[od_start:od_stop + 1] = True
                     if is_gr_sub:
-                        for idx in range(od_stop + 1, fg):
-                            po_on_od[idx] = True
+                        po_on_od[od_stop + 1:] = True
+                    else:
+                        po_is_edge[od_start:od_stop + 1] = False
+                        if od_stop < fg:
+                            po_is_edge[od_stop] = True
 
                     if draw_od:
                         od_xl = po_xc - lch_unit // 2 + od_start * sd_pitch - po_od_extx
@@ -2291,62 +2426,52 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
                 self.draw_od(template, od_name, od_box, od_flav=row_info.od_type)
 
             # draw PO/PODE
-            if row_y[1] > row_y[0]:
-                for idx in range(fg):
-                    if idx not in no_po_region:
-                        po_xl = po_xc + idx * sd_pitch - lch_unit // 2
-                        po_xr = po_xl + lch_unit
-                        is_edge = po_is_edge[idx]
-                        pode_y = row_info.od_y
-                        if po_on_od[idx]:
-                            cur_od_type = od_type
-                        else:
-                            if idx == 0:
-                                cur_od_type = left_blk_info.od_type
-                                is_edge = True
-                                pode_y = left_blk_info.y_intv.get('od', row_info.od_y)
-                            elif idx == fg - 1:
-                                cur_od_type = right_blk_info.od_type
-                                is_edge = True
-                                pode_y = right_blk_info.y_intv.get('od', row_info.od_y)
-                            else:
-                                cur_od_type = None
-
-                        if is_edge and cur_od_type is not None:
-                            if cur_od_type == 'mos_fake':
-                                lay = 'PO_dummy'
-                            elif cur_od_type == 'dum':
-                                lay = 'PO_edge_dummy'
-                            elif cur_od_type == 'sub':
-                                lay = 'PO_edge_sub'
-                            else:
-                                lay = 'PO_edge'
-                        elif cur_od_type == 'mos':
-                            lay = 'PO'
-                        elif cur_od_type == 'sub':
-                            lay = 'PO_sub'
-                        elif cur_od_type == 'dum':
-                            lay = 'PO_gate_dummy'
-                        else:
-                            lay = 'PO_dummy'
+            if row_y[1] > row_y[0] and fg > 0:
+                # classify PO.  Code 0/1 are core/edge PO on OD, 2 is PO off OD, 3/4 are
+                # left/right edge PO off OD, and -1 means no PO.
+                po_codes = np.where(po_on_od, po_is_edge.astype(int), 2)
+                if not po_on_od[0]:
+                    po_codes[0] = 3
+                if fg > 1 and not po_on_od[fg - 1]:
+                    po_codes[fg - 1] = 4
+                po_codes[[idx for idx in no_po_region if 0 <= idx < fg]] = -1
+
+                for idx, num, code in get_value_runs(po_codes):
+                    pode_y = row_info.od_y
+                    if code == 0 or code == 1:
+                        lay = self._get_po_type(od_type, code == 1)
+                    elif code == 3:
+                        lay = self._get_po_type(left_blk_info.od_type, True)
+                        pode_y = left_blk_info.y_intv.get('od', row_info.od_y)
+                    elif code == 4:
+                        lay = self._get_po_type(right_blk_info.od_type, True)
+                        pode_y = right_blk_info.y_intv.get('od', row_info.od_y)
+                    else:
+                        lay = 'PO_dummy'
 
-                        self.draw_poly(template, mos_constants, lay, (po_xl, po_xr), row_y,
-                                       po_y, pode_y, is_sub_ring=is_sub_ring)
+                    po_xl = po_xc + idx * sd_pitch - lch_unit // 2
+                    po_xr = po_xl + lch_unit
+                    self._draw_poly_array(template, mos_constants, lay, (po_xl, po_xr), row_y,
+                                          po_y, pode_y, num, sd_pitch, use_array,
+                                          is_sub_ring=is_sub_ring)
 
             # draw MD
             if md_yt > md_yb and fg > 0:
-                for idx in range(fg + 1):
-                    if idx not in no_md_region:
-                        md_xl = idx * sd_pitch - md_w // 2
-                        md_xr = md_xl + md_w
-                        md_box = BBox(md_xl, md_yb, md_xr, md_yt, res, unit_mode=True)
-                        if md_on_od[idx]:
-                            self.draw_mos_rect(template, md_lay_cur, md_box)
-                        else:
-                            if (0 < idx < fg or
-                                    idx == 0 and 'md' in left_blk_info.draw_layers or
-                                    idx == fg and 'md' in right_blk_info.draw_layers):
-                                self.draw_mos_rect(template, md_dum_lay, md_box)
+                # code 0 is MD on OD, code 1 is dummy MD, -1 means no MD.
+                md_codes = np.where(md_on_od, 0, 1)
+                if not md_on_od[0] and 'md' not in left_blk_info.draw_layers:
+                    md_codes[0] = -1
+                if not md_on_od[fg] and 'md' not in right_blk_info.draw_layers:
+                    md_codes[fg] = -1
+                md_codes[[idx for idx in no_md_region if 0 <= idx <= fg]] = -1
+
+                for idx, num, code in get_value_runs(md_codes):
+                    md_xl = idx * sd_pitch - md_w // 2
+                    md_xr = md_xl + md_w
+                    md_box = BBox(md_xl, md_yb, md_xr, md_yt, res, unit_mode=True)
+                    cur_lay = md_lay_cur if code == 0 else md_dum_lay
+                    self._draw_mos_rect_array(template, cur_lay, md_box, num, 1, sd_pitch, 0,
+                                              use_array)
 
         # draw other layers
         for imp_lay, xl, yb, yt in lay_info_list:
@@ -2365,13 +2490,17 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
         for adj_info in adj_row_list:
             row_y = adj_info.row_y
             po_y = adj_info.po_y
-            if row_y[1] > row_y[0]:
-                for idx, po_type in enumerate(adj_info.po_types):
-                    if idx not in no_po_region:
-                        po_xl = po_xc + idx * sd_pitch - lch_unit // 2
-                        po_xr = po_xl + lch_unit
-                        self.draw_poly(template, mos_constants, po_type, (po_xl, po_xr), row_y,
-                                       po_y, (po_y[0], po_y[0]), is_sub_ring=is_sub_ring)
+            po_types = adj_info.po_types
+            if row_y[1] > row_y[0] and po_types:
+                po_type_list = sorted(set(po_types))
+                po_codes = np.array([po_type_list.index(po_type) for po_type in po_types])
+                po_codes[[idx for idx in no_po_region if 0 <= idx < len(po_types)]] = -1
+                for idx, num, code in get_value_runs(po_codes):
+                    po_xl = po_xc + idx * sd_pitch - lch_unit // 2
+                    po_xr = po_xl + lch_unit
+                    self._draw_poly_array(template, mos_constants, po_type_list[code],
+                                          (po_xl, po_xr), row_y, po_y, (po_y[0], po_y[0]),
+                                          num, sd_pitch, use_array, is_sub_ring=is_sub_ring)
 
         # set size and add PR boundary
         arr_box = BBox(0, arr_yb, blk_w, arr_yt, res, unit_mode=True)
@@ -2387,9 +2516,12 @@ class MOSTechFinfetBase(MOSTech, metaclass=abc.ABCMeta):
                 y_intv_list = fill_info.y_intv_list
                 if exc_lay is not None:
                     self.draw_mos_rect(template, exc_lay, bound_box)
-                for xl, xr in x_intv_list:
-                    for yb, yt in y_intv_list:
-                        self.draw_mos_rect(template, lay, BBox(xl, yb, xr, yt, res, unit_mode=True))
+                y_arr_list = get_interval_arrays(y_intv_list)
+                for xl, xr, nx, spx in get_interval_arrays(x_intv_list):
+                    for yb, yt, ny, spy in y_arr_list:
+                        self._draw_mos_rect_array(template, lay,
+                                                  BBox(xl, yb, xr, yt, res, unit_mode=True),
+                                                  nx, ny, spx, spy, use_array)
 
     def draw_substrate_connection(self,  # type: MOSTechFinfetBase
                                   template,  # type: TemplateBase
@@ -118,7 +118,8 @@ class AnalogMOSBase(TemplateBase):
         res = self.grid.resolution
         lch_unit = int(round(lch / self.grid.layout_unit / res))
 
-        mos_info = tech_cls.get_mos_info(lch_unit, w, mos_type, threshold, fg, **options)
+        mos_info = tech_cls.get_info_cached('get_mos_info', lch_unit, w, mos_type, threshold, fg,
+                                            **options)
         self._layout_info = mos_info['layout_info']
         # set parameters
         self._ext_top_info = mos_info['ext_top_info']
@@ -217,7 +218,8 @@ class AnalogMOSExt(TemplateBase):
         res = self.grid.resolution
         lch_unit = int(round(lch / self.grid.layout_unit / res))
 
-        ext_info = tech_cls.get_ext_info(lch_unit, w, fg, top_ext_info, bot_ext_info, **options)
+        ext_info = tech_cls.get_info_cached('get_ext_info', lch_unit, w, fg, top_ext_info,
+                                            bot_ext_info, **options)
         self._layout_info = ext_info['layout_info']
         self._left_edge_info = ext_info['left_edge_info']
         self._right_edge_info = ext_info['right_edge_info']
@@ -298,7 +300,8 @@ class SubRingExt(TemplateBase):
         else:
             tech_cls = self.grid.tech_info.tech_params['layout'][tech_cls_name]
 
-        ext_info = tech_cls.get_sub_ring_ext_info(sub_type, h, fg, end_ext_info, **options)
+        ext_info = tech_cls.get_info_cached('get_sub_ring_ext_info', sub_type, h, fg, end_ext_info,
+                                            **options)
         self._layout_info = ext_info['layout_info']
         self._left_edge_info = ext_info['left_edge_info']
         self._right_edge_info = ext_info['right_edge_info']
@@ -150,8 +150,8 @@ class AnalogSubstrate(TemplateBase):
         lch_unit = int(round(lch / self.grid.layout_unit / res))
 
         blk_pitch = self.get_block_pitch(self.grid, top_layer, **options)
-        info = tech_cls.get_substrate_info(lch_unit, w, sub_type, threshold, fg,
-                                           blk_pitch=blk_pitch, **options)
+        info = tech_cls.get_info_cached('get_substrate_info', lch_unit, w, sub_type, threshold, fg,
+                                        blk_pitch=blk_pitch, **options)
         self._layout_info = info['layout_info']
         self._sd_yc = info['sd_yc']
         self._ext_top_info = info['ext_top_info']
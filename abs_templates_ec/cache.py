@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines process-wide caches shared by layout generators and technology classes.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Optional, List, Tuple
+
+import os
+import pickle
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# environment variable that enables the on-disk primitive cache.
+CACHE_DIR_ENV = 'ABS_TEMPLATES_EC_CACHE_DIR'
+# environment variable that sets the on-disk primitive cache size limit, in megabytes.
+CACHE_SIZE_ENV = 'ABS_TEMPLATES_EC_CACHE_SIZE_MB'
+
+_pkg_fingerprint = None
+_disk_cache = None
+_disk_cache_init = False
+
+
+def freeze_key(obj):
+    # type: (Any) -> Hashable
+    """Converts the given object into a hashable object suitable for use as a cache key.
+
+    Dictionaries, lists, sets and tuples are converted recursively.  Tuple subclasses such
+    as namedtuples are tagged with their type, so equal-valued tuples of different types
+    produce different keys.
+
+    Parameters
+    ----------
+    obj : Any
+        the object to convert.
+
+    Returns
+    -------
+    key : Hashable
+        the hashable representation of the given object.
+    """
+    if isinstance(obj, dict):
+        return dict, tuple(sorted(((freeze_key(k), freeze_key(v)) for k, v in obj.items()),
+                                  key=repr))
+    elif isinstance(obj, list):
+        return list, tuple(freeze_key(v) for v in obj)
+    elif isinstance(obj, tuple):
+        items = tuple(freeze_key(v) for v in obj)
+        return items if type(obj) is tuple else (type(obj), items)
+    elif isinstance(obj, (set, frozenset)):
+        return frozenset(freeze_key(v) for v in obj)
+    return obj
+
+
+class LRUCache(object):
+    """A thread-safe, size-bounded least-recently-used cache with hit/miss statistics.
+
+    Values are computed by a user supplied builder function on cache miss.  The builder is
+    called outside of the internal lock, so a slow builder does not block readers of other
+    keys.  If two threads miss on the same key at the same time, the first result stored wins
+    and both callers get the same object back.
+
+    Parameters
+    ----------
+    max_size : Optional[int]
+        maximum number of entries.  None for unbounded.
+    """
+
+    def __init__(self, max_size=None):
+        # type: (Optional[int]) -> None
+        if max_size is not None and max_size <= 0:
+            raise ValueError('max_size must be positive or None.')
+        self._max_size = max_size
+        self._table = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self):
+        # type: () -> int
+        with self._lock:
+            return len(self._table)
+
+    def __contains__(self, key):
+        # type: (Hashable) -> bool
+        with self._lock:
+            return key in self._table
+
+    @property
+    def max_size(self):
+        # type: () -> Optional[int]
+        return self._max_size
+
+    def get(self, key, builder):
+        # type: (Hashable, Callable[[], Any]) -> Any
+        """Returns the cached value for the given key, computing it if necessary.
+
+        Parameters
+        ----------
+        key : Hashable
+            the cache key.
+        builder : Callable[[], Any]
+            function that computes the value on cache miss.
+
+        Returns
+        -------
+        val : Any
+            the cached value.
+        """
+        with self._lock:
+            try:
+                val = self._table[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._hits += 1
+                self._table.move_to_end(key)
+                return val
+
+        val = builder()
+        return self.put(key, val)
+
+    def find(self, key, default=None):
+        # type: (Hashable, Any) -> Any
+        """Returns the cached value for the given key, or default if it is not cached.
+
+        Parameters
+        ----------
+        key : Hashable
+            the cache key.
+        default : Any
+            the value to return on cache miss.
+
+        Returns
+        -------
+        val : Any
+            the cached value.
+        """
+        with self._lock:
+            try:
+                val = self._table[key]
+            except KeyError:
+                self._misses += 1
+                return default
+            self._hits += 1
+            self._table.move_to_end(key)
+            return val
+
+    def put(self, key, val):
+        # type: (Hashable, Any) -> Any
+        """Stores the given value, returns the value actually stored in the cache.
+
+        If the key is already present, the existing value is kept and returned.
+
+        Parameters
+        ----------
+        key : Hashable
+            the cache key.
+        val : Any
+            the value.
+
+        Returns
+        -------
+        val : Any
+            the value associated with the key.
+        """
+        with self._lock:
+            if key in self._table:
+                self._table.move_to_end(key)
+                return self._table[key]
+            self._table[key] = val
+            if self._max_size is not None:
+                while len(self._table) > self._max_size:
+                    self._table.popitem(last=False)
+                    self._evictions += 1
+            return val
+
+    def clear(self):
+        # type: () -> None
+        """Removes all entries and resets statistics."""
+        with self._lock:
+            self._table.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def get_stats(self):
+        # type: () -> Dict[str, Any]
+        """Returns a dictionary of cache statistics.
+
+        Returns
+        -------
+        stats : Dict[str, Any]
+            a dictionary with entries 'hits', 'misses', 'evictions', 'size', 'max_size',
+            and 'hit_rate'.
+        """
+        with self._lock:
+            num_access = self._hits + self._misses
+            return dict(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._table),
+                max_size=self._max_size,
+                hit_rate=self._hits / num_access if num_access > 0 else 0.0,
+            )
+
+
+def stable_repr(obj):
+    # type: (Any) -> str
+    """Returns a string representation of a frozen key that is identical across processes.
+
+    Sets are printed in sorted order, so the result does not depend on hash randomization.
+
+    Parameters
+    ----------
+    obj : Any
+        the frozen key, as returned by freeze_key().
+
+    Returns
+    -------
+    ans : str
+        the string representation.
+    """
+    if isinstance(obj, (set, frozenset)):
+        return '{%s}' % ', '.join(sorted(stable_repr(v) for v in obj))
+    elif isinstance(obj, tuple):
+        return '(%s,)' % ', '.join(stable_repr(v) for v in obj)
+    return repr(obj)
+
+
+def get_package_fingerprint():
+    # type: () -> str
+    """Returns a hash of the source code of this package.
+
+    The fingerprint changes whenever any module of this package changes, so on-disk cache
+    entries produced by an older version of the layout generators are never reused.
+
+    Returns
+    -------
+    fingerprint : str
+        the source code hash.
+    """
+    global _pkg_fingerprint
+    if _pkg_fingerprint is None:
+        pkg_dir = os.path.dirname(os.path.abspath(__file__))
+        md5 = hashlib.md5()
+        for root, dir_names, file_names in os.walk(pkg_dir):
+            dir_names.sort()
+            for fname in sorted(file_names):
+                if fname.endswith('.py'):
+                    fpath = os.path.join(root, fname)
+                    md5.update(os.path.relpath(fpath, pkg_dir).encode('utf-8'))
+                    with open(fpath, 'rb') as f:
+                        md5.update(f.read())
+        _pkg_fingerprint = md5.hexdigest()
+    return _pkg_fingerprint
+
+
+class DiskCache(object):
+    """A content-addressed, size-bounded on-disk cache of picklable values.
+
+    Each entry is stored in its own file named by the hash of its key, and is written to a
+    temporary file first and then renamed, so concurrent processes never read partial entries.
+    Entries store their hash key, so misplaced and corrupted files are treated as misses.
+    When the total size exceeds the limit, least recently used entries are removed based on
+    file modification time, which is updated on every hit.
+
+    Parameters
+    ----------
+    root_dir : str
+        the cache directory.
+    max_size : int
+        maximum total size of all entries, in bytes.
+    version : str
+        the version string included in every key.  Defaults to the package fingerprint.
+    """
+
+    def __init__(self, root_dir, max_size=512 * 1024 * 1024, version=None):
+        # type: (str, int, Optional[str]) -> None
+        if max_size <= 0:
+            raise ValueError('max_size must be positive.')
+        self._root_dir = os.path.abspath(root_dir)
+        self._max_size = max_size
+        self._version = get_package_fingerprint() if version is None else version
+        self._lock = threading.Lock()
+        self._bytes_written = 0
+        self._hits = 0
+        self._misses = 0
+        self._errors = 0
+
+    @property
+    def root_dir(self):
+        # type: () -> str
+        return self._root_dir
+
+    def make_key(self, *parts):
+        # type: (*Any) -> str
+        """Returns the hash key of the given key components.
+
+        Parameters
+        ----------
+        *parts : Any
+            the key components.  They are frozen with freeze_key().
+
+        Returns
+        -------
+        key : str
+            the hash key.
+        """
+        key_str = stable_repr((self._version, freeze_key(parts)))
+        return hashlib.sha256(key_str.encode('utf-8')).hexdigest()
+
+    def _get_path(self, key):
+        # type: (str) -> str
+        return os.path.join(self._root_dir, key[:2], key + '.pkl')
+
+    def _count(self, attr):
+        # type: (str) -> None
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get(self, key, builder):
+        # type: (str, Callable[[], Any]) -> Any
+        """Returns the cached value for the given key, computing and storing it if necessary.
+
+        Parameters
+        ----------
+        key : str
+            the hash key, as returned by make_key().
+        builder : Callable[[], Any]
+            function that computes the value on cache miss.
+
+        Returns
+        -------
+        val : Any
+            the cached value.
+        """
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as f:
+                stored_key, val = pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # corrupted or incompatible entry; remove it and recompute.
+            self._count('_errors')
+            self._remove(path)
+        else:
+            if stored_key == key:
+                self._count('_hits')
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                return val
+
+        self._count('_misses')
+        val = builder()
+        self.put(key, val)
+        return val
+
+    def put(self, key, val):
+        # type: (str, Any) -> bool
+        """Stores the given value.
+
+        Parameters
+        ----------
+        key : str
+            the hash key, as returned by make_key().
+        val : Any
+            the value.
+
+        Returns
+        -------
+        success : bool
+            True if the value is stored.  Values that cannot be pickled are not stored.
+        """
+        try:
+            data = pickle.dumps((key, val), protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            self._count('_errors')
+            return False
+
+        path = self._get_path(key)
+        dir_name = os.path.dirname(path)
+        try:
+            os.makedirs(dir_name, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=dir_name)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError:
+            self._count('_errors')
+            return False
+
+        with self._lock:
+            self._bytes_written += len(data)
+            need_evict = self._bytes_written > self._max_size // 16
+            if need_evict:
+                self._bytes_written = 0
+        if need_evict:
+            self.evict()
+        return True
+
+    @classmethod
+    def _remove(cls, path):
+        # type: (str) -> None
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _get_entries(self):
+        # type: () -> List[Tuple[float, int, str]]
+        entries = []
+        if os.path.isdir(self._root_dir):
+            for dir_entry in os.scandir(self._root_dir):
+                if dir_entry.is_dir():
+                    for f_entry in os.scandir(dir_entry.path):
+                        if f_entry.name.endswith('.pkl'):
+                            try:
+                                stat = f_entry.stat()
+                            except OSError:
+                                continue
+                            entries.append((stat.st_mtime, stat.st_size, f_entry.path))
+        return entries
+
+    def evict(self):
+        # type: () -> int
+        """Removes least recently used entries until the cache fits in the size limit.
+
+        Entries are removed until the total size drops to 90% of the limit, so that eviction
+        does not run on every write.
+
+        Returns
+        -------
+        num_removed : int
+            number of removed entries.
+        """
+        entries = self._get_entries()
+        tot_size = sum((size for _, size, _ in entries))
+        if tot_size <= self._max_size:
+            return 0
+
+        targ_size = self._max_size * 9 // 10
+        num_removed = 0
+        for _, size, path in sorted(entries):
+            if tot_size <= targ_size:
+                break
+            self._remove(path)
+            tot_size -= size
+            num_removed += 1
+        return num_removed
+
+    def clear(self):
+        # type: () -> None
+        """Removes all entries and resets statistics."""
+        for _, _, path in self._get_entries():
+            self._remove(path)
+        with self._lock:
+            self._bytes_written = self._hits = self._misses = self._errors = 0
+
+    def get_stats(self):
+        # type: () -> Dict[str, Any]
+        """Returns a dictionary of cache statistics.
+
+        Returns
+        -------
+        stats : Dict[str, Any]
+            a dictionary with entries 'hits', 'misses', 'errors', 'size', 'num_entries',
+            'max_size', and 'root_dir'.
+        """
+        entries = self._get_entries()
+        with self._lock:
+            return dict(
+                hits=self._hits,
+                misses=self._misses,
+                errors=self._errors,
+                size=sum((size for _, size, _ in entries)),
+                num_entries=len(entries),
+                max_size=self._max_size,
+                root_dir=self._root_dir,
+            )
+
+
+def get_primitive_disk_cache():
+    # type: () -> Optional[DiskCache]
+    """Returns the process-wide on-disk cache of primitive layout information.
+
+    The cache is disabled unless set_primitive_disk_cache() is called, or the
+    ABS_TEMPLATES_EC_CACHE_DIR environment variable is set.  The size limit defaults to
+    512 MB, and can be changed with the ABS_TEMPLATES_EC_CACHE_SIZE_MB environment variable.
+
+    Returns
+    -------
+    disk_cache : Optional[DiskCache]
+        the disk cache, or None if disabled.
+    """
+    global _disk_cache, _disk_cache_init
+    if not _disk_cache_init:
+        root_dir = os.environ.get(CACHE_DIR_ENV, '')
+        if root_dir:
+            size_mb = float(os.environ.get(CACHE_SIZE_ENV, '512'))
+            _disk_cache = DiskCache(root_dir, max_size=int(size_mb * 1024 * 1024))
+        _disk_cache_init = True
+    return _disk_cache
+
+
+def set_primitive_disk_cache(disk_cache):
+    # type: (Optional[DiskCache]) -> None
+    """Sets the process-wide on-disk cache of primitive layout information.
+
+    Parameters
+    ----------
+    disk_cache : Optional[DiskCache]
+        the disk cache.  None to disable.
+    """
+    global _disk_cache, _disk_cache_init
+    _disk_cache = disk_cache
+    _disk_cache_init = True
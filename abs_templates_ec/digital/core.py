@@ -13,6 +13,7 @@ from ..analog_core.base import AnalogBaseEdgeInfo
 
 from ..laygo.base import LaygoEndRow, LaygoSubstrate
 from ..laygo.core import LaygoBase, LaygoBaseInfo, LaygoIntvSet, DigitalEdgeInfo, DigitalExtInfo
+from ..laygo.core import DEFAULT_SPACE_UNIT, get_space_blocks, get_space_edge_info
 
 
 class DigitalSpace(LaygoBase):
@@ -418,20 +419,22 @@ class DigitalBase(TemplateBase, metaclass=abc.ABCMeta):
 
             edgel = endl.get_laygo_edge(yidx)
             edger = endr.get_laygo_edge(yidx)
-            for inst_num in range(nx):
-                intv_offset = col_idx + spx * inst_num
-                inst_intv = intv_offset, intv_offset + num_cols
-                if not intv.add(inst_intv, cur_ext_info, edgel, edger):
-                    raise ValueError('Cannot add block on row %d, column '
-                                     '[%d, %d).' % (rbot + yidx, inst_intv[0], inst_intv[1]))
+            num_add = intv.add_array((col_idx, col_idx + num_cols), nx, spx, cur_ext_info,
+                                     edgel, edger)
+            if num_add < nx:
+                intv_offset = col_idx + spx * num_add
+                raise ValueError('Cannot add block on row %d, column '
+                                 '[%d, %d).' % (rcur, intv_offset, intv_offset + num_cols))
 
         inst_name = 'XR%dC%d' % (row_idx, col_idx)
         return self.add_instance(master, inst_name=inst_name, loc=(x0, y0), orient=orient,
                                  nx=nx, spx=spx * col_width, unit_mode=True)
 
-    def fill_space(self, port_cols=None):
+    def fill_space(self, port_cols=None, space_unit=None):
         if self._dig_size is None:
             raise ValueError('digital size must be set before filling spaces.')
+        if space_unit is None:
+            space_unit = self._row_layout_info['config'].get('space_unit', DEFAULT_SPACE_UNIT)
 
         # TODO: need to update laygo_endl_infos/laygo_endr_infos/
         # TODO: digital_endl_infos/digital_endr_infos parameters
@@ -443,20 +446,13 @@ class DigitalBase(TemplateBase, metaclass=abc.ABCMeta):
         for row_idx, (intv, ledgel, ledger) in enumerate(zip(self._used_list, self._digital_edgel,
                                                              self._digital_edger)):
             for (start, end), end_info in zip(*intv.get_complement(total_intv, ledgel, ledger)):
-                space_params = dict(
-                    config=self._row_layout_info['config'],
-                    layout_info=self._row_layout_info,
-                    num_col=end - start,
-                    laygo_edgel=end_info[0],
-                    laygo_edger=end_info[1],
-                )
-                space_master = self.new_template(params=space_params, temp_cls=DigitalSpace)
-                self.add_digital_block(space_master, loc=(start, row_idx))
+                self._fill_digital_space(end_info, start, end, row_idx, space_unit)
 
         # draw extensions
         ext_endl_infos, ext_endr_infos = [], []
         laygo_info = self._laygo_info
         tech_cls = laygo_info.tech_cls
+        ext_master_cache = {}
         for bot_ridx in range(-1, num_rows):
             ext_val = self._ext_params[bot_ridx + 1]
             if ext_val is not None:
@@ -464,7 +460,8 @@ class DigitalBase(TemplateBase, metaclass=abc.ABCMeta):
                 bot_ext_list = self._get_ext_info_row(bot_ridx, 1)
                 top_ext_list = self._get_ext_info_row(bot_ridx + 1, 0)
                 edgel, edger = tech_cls.draw_extensions(self, laygo_info, num_cols, w, yext,
-                                                        bot_ext_list, top_ext_list)
+                                                        bot_ext_list, top_ext_list,
+                                                        master_cache=ext_master_cache)
                 if 0 <= bot_ridx < num_rows - 1:
                     if edgel is None:
                         edgel = (yext, self._ext_end_list[bot_ridx][1])
@@ -493,6 +490,35 @@ class DigitalBase(TemplateBase, metaclass=abc.ABCMeta):
 
         return self._draw_boundary_cells(port_cols)
 
+    def _fill_digital_space(self, adj_end_info, start, stop, row_idx, space_unit):
+        """Fills the given empty interval with digital space blocks."""
+        blk_list = get_space_blocks(stop - start, space_unit)
+        if len(blk_list) > 1:
+            # adjacent space blocks use space edge information
+            sp_endl_list, sp_endr_list = [], []
+            for row_info in self._row_layout_info['row_info_list']:
+                sp_edgel, sp_edger = get_space_edge_info(self._tech_cls, row_info, space_unit)
+                sp_endl_list.append((sp_edgel, None))
+                sp_endr_list.append((sp_edger, None))
+            sp_endl = AnalogBaseEdgeInfo(sp_endl_list, [])
+            sp_endr = AnalogBaseEdgeInfo(sp_endr_list, [])
+        else:
+            sp_endl = sp_endr = None
+
+        last_idx = len(blk_list) - 1
+        col_idx = start
+        for idx, (num_col, nx) in enumerate(blk_list):
+            space_params = dict(
+                config=self._row_layout_info['config'],
+                layout_info=self._row_layout_info,
+                num_col=num_col,
+                laygo_edgel=adj_end_info[0] if idx == 0 else sp_endr,
+                laygo_edger=adj_end_info[1] if idx == last_idx else sp_endl,
+            )
+            space_master = self.new_template(params=space_params, temp_cls=DigitalSpace)
+            self.add_digital_block(space_master, loc=(col_idx, row_idx), nx=nx, spx=num_col)
+            col_idx += num_col * nx
+
     def _get_ext_info_row(self, row_idx, ext_idx):
         num_col, num_row = self._dig_size
         if row_idx == -1:
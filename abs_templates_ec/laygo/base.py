@@ -88,7 +88,8 @@ class LaygoPrimitive(TemplateBase):
         if options is None:
             options = {}
 
-        blk_info = self._tech_cls.get_laygo_blk_info(blk_type, w, row_info, **options)
+        blk_info = self._tech_cls.get_info_cached('get_laygo_blk_info', blk_type, w, row_info,
+                                                  **options)
         self._lr_edge_info = blk_info['left_edge_info'], blk_info['right_edge_info']
         self._tb_ext_info = blk_info['ext_top_info'], blk_info['ext_bot_info']
         self._layout_info = blk_info['layout_info']
@@ -179,7 +180,8 @@ class LaygoSubstrate(TemplateBase):
             options = {}
 
         w_sub = row_info['w_sub']
-        blk_info = self._tech_cls.get_laygo_blk_info('sub', w_sub, row_info, **options)
+        blk_info = self._tech_cls.get_info_cached('get_laygo_blk_info', 'sub', w_sub, row_info,
+                                                  **options)
         self._lr_edge_info = blk_info['left_edge_info'], blk_info['right_edge_info']
         self._tb_ext_info = blk_info['ext_top_info'], blk_info['ext_bot_info']
         self._layout_info = blk_info['layout_info']
@@ -255,8 +257,8 @@ class LaygoEndRow(TemplateBase):
         top_layer = self.params['top_layer']
 
         blk_pitch = self.grid.get_block_size(top_layer, unit_mode=True)[1]
-        self._end_info = self._tech_cls.get_laygo_end_info(lch_unit, mos_type, threshold, 1,
-                                                           is_end, blk_pitch)
+        self._end_info = self._tech_cls.get_info_cached('get_laygo_end_info', lch_unit, mos_type,
+                                                        threshold, 1, is_end, blk_pitch)
         self._tech_cls.draw_mos(self, self._end_info['layout_info'])
 
 
@@ -327,8 +329,8 @@ class LaygoSpace(TemplateBase):
         left_blk_info = self.params['left_blk_info']
         right_blk_info = self.params['right_blk_info']
 
-        blk_info = self._tech_cls.get_laygo_space_info(row_info, num_blk, left_blk_info,
-                                                       right_blk_info)
+        blk_info = self._tech_cls.get_info_cached('get_laygo_space_info', row_info, num_blk,
+                                                  left_blk_info, right_blk_info)
         self._lr_edge_info = blk_info['left_edge_info'], blk_info['right_edge_info']
         self._tb_ext_info = blk_info['ext_top_info'], blk_info['ext_bot_info']
         self._layout_info = blk_info['layout_info']
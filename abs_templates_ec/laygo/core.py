@@ -8,7 +8,6 @@ from typing import TYPE_CHECKING, Dict, Any, Set, Tuple, List, Optional, Iterabl
 import bisect
 
 from bag.math import lcm
-from bag.util.interval import IntervalSet
 
 from bag.layout.util import BBox
 from bag.layout.template import TemplateBase
@@ -18,6 +17,7 @@ from .tech import LaygoTech
 from .base import LaygoPrimitive, LaygoSubstrate, LaygoEndRow, LaygoSpace
 from ..analog_core.placement import WireGroup, WireTree
 from ..analog_core.base import AnalogBaseEdgeInfo
+from ..cache import LRUCache, freeze_key
 
 if TYPE_CHECKING:
     from bag.layout.template import TemplateDB
@@ -68,6 +68,70 @@ class DigitalEdgeInfo(object):
                                self._ext_end_list[::-1])
 
 
+# process-wide table of laygo row stack placement results.  Entries are keyed by technology
+# configuration, laygo configuration, row stack parameters, and routing grid signature.
+_row_stack_cache = LRUCache(max_size=256)
+
+# default width of the repeated space blocks used to fill wide empty intervals, in columns.
+DEFAULT_SPACE_UNIT = 32
+
+
+def get_space_blocks(num_col, space_unit):
+    # type: (int, int) -> List[Tuple[int, int]]
+    """Splits an empty column interval into space blocks with few distinct widths.
+
+    Intervals narrower than three space units are filled with a single space block.  Wider
+    intervals are filled with a left block of one to two space units, an array of space unit
+    blocks, and a right block of one space unit, so every interval width only creates one new
+    space block width.
+
+    Parameters
+    ----------
+    num_col : int
+        number of columns in the empty interval.
+    space_unit : int
+        the space unit width, in number of columns.  0 to always use a single space block.
+
+    Returns
+    -------
+    blk_list : List[Tuple[int, int]]
+        list of (number of columns, number of blocks) tuples, from left to right.
+    """
+    if space_unit <= 0 or num_col < 3 * space_unit:
+        return [(num_col, 1)]
+    num_unit = num_col // space_unit
+    return [(space_unit + num_col % space_unit, 1), (space_unit, num_unit - 2), (space_unit, 1)]
+
+
+def get_space_edge_info(tech_cls, row_info, num_blk):
+    # type: (LaygoTech, Dict[str, Any], int) -> Tuple[Any, Any]
+    """Returns the left and right edge information of laygo space blocks in the given row.
+
+    Space block edges do not depend on the adjacent blocks, so this is used as the adjacent
+    block information of space blocks placed next to each other.
+
+    Parameters
+    ----------
+    tech_cls : LaygoTech
+        the laygo technology class.
+    row_info : Dict[str, Any]
+        the laygo row information dictionary.
+    num_blk : int
+        number of columns of the space block.
+
+    Returns
+    -------
+    edgel : Any
+        the left edge information object.
+    edger : Any
+        the right edge information object.
+    """
+    def_end = tech_cls.get_default_end_info()
+    blk_info = tech_cls.get_info_cached('get_laygo_space_info', row_info, num_blk,
+                                        def_end, def_end)
+    return blk_info['left_edge_info'], blk_info['right_edge_info']
+
+
 class LaygoIntvSet(object):
     """A data structure that keeps track of used laygo columns in a laygo row.
 
@@ -86,10 +150,39 @@ class LaygoIntvSet(object):
 
     def __init__(self, default_end_info):
         # type: (Any) -> None
-        self._intv = IntervalSet()
+        # used intervals, sorted by start column.  Intervals never overlap, so the stop
+        # columns are also sorted.
+        self._start_list = []  # type: List[int]
+        self._stop_list = []  # type: List[int]
+        self._val_list = []  # type: List[Any]
         self._end_flags = {}
         self._default_end_info = default_end_info
 
+    def _update_end_flags(self, start, stop, endl, endr):
+        # type: (int, int, Any, Any) -> None
+        """Updates edge information after adding the given interval.
+
+        Edges shared by two abutting intervals are removed.
+        """
+        if start in self._end_flags:
+            del self._end_flags[start]
+        else:
+            self._end_flags[start] = endl
+        if stop in self._end_flags:
+            del self._end_flags[stop]
+        else:
+            self._end_flags[stop] = endr
+
+    def _get_insert_idx(self, start, stop):
+        # type: (int, int) -> int
+        """Returns the insertion index of the given interval, or -1 if it overlaps."""
+        idx = bisect.bisect_right(self._start_list, start)
+        if idx > 0 and self._stop_list[idx - 1] > start:
+            return -1
+        if idx < len(self._start_list) and self._start_list[idx] < stop:
+            return -1
+        return idx
+
     def add(self, intv, ext_info, endl, endr):
         # type: (Tuple[int, int], Any, Any, Any) -> bool
         """Add a new interval to this data structure.
@@ -111,25 +204,74 @@ class LaygoIntvSet(object):
             True if the given interval is successfully added.  False if it
             overlaps with existing blocks.
         """
-        ans = self._intv.add(intv, val=ext_info)
-        if ans:
-            start, stop = intv
-            if start in self._end_flags:
-                del self._end_flags[start]
-            else:
-                self._end_flags[start] = endl
-            if stop in self._end_flags:
-                del self._end_flags[stop]
-            else:
-                self._end_flags[stop] = endr
-            return True
-        else:
+        start, stop = intv
+        idx = self._get_insert_idx(start, stop)
+        if idx < 0:
             return False
+        self._start_list.insert(idx, start)
+        self._stop_list.insert(idx, stop)
+        self._val_list.insert(idx, ext_info)
+        self._update_end_flags(start, stop, endl, endr)
+        return True
+
+    def add_array(self, intv, nx, spx, ext_info, endl, endr):
+        # type: (Tuple[int, int], int, int, Any, Any, Any) -> int
+        """Add an array of intervals to this data structure.
+
+        This is equivalent to calling add() on each interval in order, and stopping at the first
+        failure, but intervals of arrays that do not overlap anything are inserted together.
+
+        Parameters
+        ----------
+        intv : Tuple[int, int]
+            the first laygo interval as (start_column, stop_column) tuple.
+        nx : int
+            number of intervals.
+        spx : int
+            column pitch between intervals.  May be negative.
+        ext_info : Any
+            the top/bottom extension information object of the intervals.
+        endl : Any
+            the left edge layout information object.
+        endr : Any
+            the right edge layout information object.
+
+        Returns
+        -------
+        num_add : int
+            number of intervals added.  Less than nx if an interval overlaps with existing blocks
+            or previous intervals in this array.
+        """
+        start, stop = intv
+        num_col = stop - start
+        if nx > 1 and abs(spx) >= num_col:
+            # array intervals are disjoint, check that no existing interval is in the array span
+            if spx >= 0:
+                lower, upper = start, start + (nx - 1) * spx + num_col
+            else:
+                lower, upper = start + (nx - 1) * spx, stop
+            idx = self._get_insert_idx(lower, upper)
+            if idx >= 0:
+                start_list = [start + spx * inst_num for inst_num in range(nx)]
+                for cur_start in start_list:
+                    self._update_end_flags(cur_start, cur_start + num_col, endl, endr)
+                if spx < 0:
+                    start_list.reverse()
+                self._start_list[idx:idx] = start_list
+                self._stop_list[idx:idx] = [cur_start + num_col for cur_start in start_list]
+                self._val_list[idx:idx] = [ext_info] * nx
+                return nx
+
+        for inst_num in range(nx):
+            cur_start = start + spx * inst_num
+            if not self.add((cur_start, cur_start + num_col), ext_info, endl, endr):
+                return inst_num
+        return nx
 
     def values(self):
         # type: () -> Iterable[Any]
         """Returns an iterator over extension information objects stored in this row."""
-        return self._intv.values()
+        return iter(self._val_list)
 
     def get_complement(self, total_intv, endl_info, endr_info):
         # type: (Tuple[int, int], Any, Any) -> Tuple[List[Tuple[int, int]], List[Tuple[Any, Any]]]
@@ -152,14 +294,26 @@ class LaygoIntvSet(object):
             a list of left/right edge layout information object corresponding to each
             unused interval.
         """
-        compl_intv = self._intv.get_complement(total_intv)
-        intv_list = []
-        end_list = []
-        for intv in compl_intv:
-            intv_list.append(intv)
-            end_list.append((self._end_flags.get(intv[0], endl_info),
-                             self._end_flags.get(intv[1], endr_info)))
-        return intv_list, end_list
+        if not self._start_list:
+            compl_intv = [total_intv]
+        else:
+            tot_start, tot_stop = total_intv
+            if self._start_list[0] < tot_start or tot_stop < self._stop_list[-1]:
+                raise ValueError('The given interval [%d, %d) is too small' % (tot_start,
+                                                                              tot_stop))
+            compl_intv = []
+            cur_start = tot_start
+            for start, stop in zip(self._start_list, self._stop_list):
+                if start > cur_start:
+                    compl_intv.append((cur_start, start))
+                cur_start = stop
+            if cur_start < tot_stop:
+                compl_intv.append((cur_start, tot_stop))
+
+        end_flags = self._end_flags
+        end_list = [(end_flags.get(start, endl_info), end_flags.get(stop, endr_info))
+                    for start, stop in compl_intv]
+        return compl_intv, end_list
 
     def get_end_info(self, num_col):
         # type: (int) -> Tuple[Any, Any]
@@ -192,9 +346,9 @@ class LaygoIntvSet(object):
     def get_end(self):
         # type: () -> int
         """Returns the end column index of the last used interval."""
-        if not self._intv:
+        if not self._stop_list:
             return 0
-        return self._intv.get_end()
+        return self._stop_list[-1]
 
 
 class LaygoBaseInfo(object):
@@ -281,6 +435,11 @@ class LaygoBaseInfo(object):
     def tech_cls(self):
         return self._tech_cls
 
+    @property
+    def config(self):
+        # type: () -> Dict[str, Any]
+        return self._config
+
     @property
     def conn_layer(self):
         return self._tech_cls.get_dig_conn_layer()
@@ -532,6 +691,24 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
         self._laygo_edgel = None
         self._laygo_edger = None
 
+    @classmethod
+    def get_row_stack_cache_stats(cls):
+        # type: () -> Dict[str, Any]
+        """Returns hit/miss statistics of the shared row stack placement table.
+
+        Returns
+        -------
+        stats : Dict[str, Any]
+            the cache statistics dictionary.
+        """
+        return _row_stack_cache.get_stats()
+
+    @classmethod
+    def clear_row_stack_cache(cls):
+        # type: () -> None
+        """Clears the shared row stack placement table."""
+        _row_stack_cache.clear()
+
     @property
     def num_rows(self):
         # type: () -> int
@@ -753,19 +930,69 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
         else:
             ybot = 0
 
-        tmp = self._get_place_info(row_types, row_widths, row_sub_widths, row_orientations,
-                                   row_thresholds, row_min_tracks, row_kwargs, num_g_tracks,
-                                   num_gb_tracks, num_ds_tracks, self._tr_manager, wire_names)
-        self._row_prop_list, self._row_info_list, pinfo_list, wire_tree = tmp
+        def _compute_row_stack():
+            tmp = self._get_place_info(row_types, row_widths, row_sub_widths, row_orientations,
+                                       row_thresholds, row_min_tracks, row_kwargs, num_g_tracks,
+                                       num_gb_tracks, num_ds_tracks, self._tr_manager,
+                                       wire_names)
+            rprop_list, rinfo_list, pinfo_list, wire_tree = tmp
+
+            ext_params = self._place_rows(ybot, tot_height_pitch, rprop_list, rinfo_list,
+                                          pinfo_list, wire_tree, min_height)
+            return rprop_list, rinfo_list, ext_params, self._bot_sub_extw, self._top_sub_extw
+
+        # row stacks only depend on row parameters, so share placement results between templates
+        key = ('row_types', self._tech_cls.get_config_key(), freeze_key(self.params['config']),
+               top_layer, ybot, tot_height_pitch, min_height,
+               freeze_key((row_types, row_widths, row_sub_widths, row_orientations,
+                           row_thresholds, row_min_tracks, row_kwargs, num_g_tracks,
+                           num_gb_tracks, num_ds_tracks, wire_names)),
+               self._get_tr_manager_key(self._tr_manager),
+               self._get_grid_signature(top_layer, row_min_tracks))
+        try:
+            hash(key)
+        except TypeError:
+            stack_info = _compute_row_stack()
+        else:
+            stack_info = _row_stack_cache.get(key, _compute_row_stack)
 
-        self._ext_params = self._place_rows(ybot, tot_height_pitch, self._row_prop_list,
-                                            self._row_info_list, pinfo_list, wire_tree, min_height)
+        rprop_list, rinfo_list, ext_params, self._bot_sub_extw, self._top_sub_extw = stack_info
+        # copy cached dictionaries, so changes in this template do not affect other templates
+        self._row_prop_list = [rprop.copy() for rprop in rprop_list]
+        self._row_info_list = [rinfo.copy() for rinfo in rinfo_list]
+        self._ext_params = list(ext_params)
 
         # compute laygo size if we know the number of columns
         if num_col is not None:
             self.set_laygo_size(num_col)
         self._set_row_layout_info()
 
+    @classmethod
+    def _get_tr_manager_key(cls, tr_manager):
+        # type: (Any) -> Any
+        """Returns a hashable key of the track width and spacing tables of a TrackManager."""
+        if tr_manager is None:
+            return None
+        # the routing grid is part of the grid signature, skip it
+        return freeze_key({name: val for name, val in vars(tr_manager).items()
+                           if not name.endswith('grid')})
+
+    def _get_grid_signature(self, top_layer, row_min_tracks):
+        # type: (int, List[Dict[int, int]]) -> Tuple[Any, ...]
+        """Returns a hashable tuple of the routing grid quantities used by row placement.
+
+        Laygo routing layers are set by the laygo configuration, so only the pitches of the
+        top layer and the minimum track layers are needed.
+        """
+        grid = self.grid
+        layers = {top_layer}
+        for min_tracks in row_min_tracks:
+            layers.update(min_tracks.keys())
+        for layer, _ in self._laygo_info['min_sub_tracks']:
+            layers.add(layer)
+        return grid.resolution, grid.layout_unit, tuple(
+            (layer, grid.get_track_pitch(layer, unit_mode=True)) for layer in sorted(layers))
+
     def _create_end_masters(self, end_mode, bot_row_type, top_row_type, bot_row_thres,
                             top_row_thres, top_layer, min_height):
         bot_end = (end_mode & 1) != 0
@@ -991,8 +1218,8 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
         while not ext_w_valid:
             ext_w_valid = True
             # check we satisfy substrate constraint
-            valid_widths = self._tech_cls.get_valid_extension_widths(lch_unit, sub_ext_info,
-                                                                     ext_info, ignore_vm=ignore_vm)
+            valid_widths = self._tech_cls.get_valid_extension_widths_cached(
+                lch_unit, sub_ext_info, ext_info, ignore_vm=ignore_vm)
             ext_w_test = ext_w + sub_extw
             if ext_w_test < valid_widths[-1] and ext_w_test not in valid_widths:
                 # did not pass substrate constraint, update extension width
@@ -1002,8 +1229,8 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
                 continue
 
             # check we satisfy mirror extension constraint
-            valid_widths = self._tech_cls.get_valid_extension_widths(lch_unit, ext_info, ext_info,
-                                                                     ignore_vm=ignore_vm)
+            valid_widths = self._tech_cls.get_valid_extension_widths_cached(
+                lch_unit, ext_info, ext_info, ignore_vm=ignore_vm)
             ext_w_test = ext_w * 2
             if ext_w_test < valid_widths[-1] and ext_w_test not in valid_widths:
                 # did not pass extension constraint, update extension width.
@@ -1073,9 +1300,8 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
 
                 # make sure extension constraints is met
                 if idx != 0:
-                    valid_widths = tech_cls.get_valid_extension_widths(lch_unit, ext_bot_info,
-                                                                       prev_ext_info,
-                                                                       ignore_vm=ignore_bot_vm)
+                    valid_widths = tech_cls.get_valid_extension_widths_cached(
+                        lch_unit, ext_bot_info, prev_ext_info, ignore_vm=ignore_bot_vm)
                     cur_bot_ext_h = (ycur - ytop_prev) // mos_pitch
                     ext_h = prev_ext_h + cur_bot_ext_h
                     if ext_h < valid_widths[-1] and ext_h not in valid_widths:
@@ -1206,6 +1432,20 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
 
     @classmethod
     def compute_row_info(cls, laygo_info, rprop_list, dy=0):
+        key = ('row_info', laygo_info.tech_cls.get_config_key(), freeze_key(laygo_info.config),
+               laygo_info.grid.resolution, freeze_key(rprop_list), dy)
+        try:
+            hash(key)
+        except TypeError:
+            return cls._compute_row_info(laygo_info, rprop_list, dy=dy)
+
+        ext_params_list, rinfo_list, new_rprop_list = _row_stack_cache.get(
+            key, lambda: cls._compute_row_info(laygo_info, rprop_list, dy=dy))
+        return (list(ext_params_list), [rinfo.copy() for rinfo in rinfo_list],
+                [rprop.copy() for rprop in new_rprop_list])
+
+    @classmethod
+    def _compute_row_info(cls, laygo_info, rprop_list, dy=0):
         lch_unit = laygo_info.lch_unit
         tcls = laygo_info.tech_cls
         grid = laygo_info.grid
@@ -1538,12 +1778,12 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
         ext_info = endb, endt
         endl_info = (endl, lay_info)
         endr_info = (endr, lay_info)
-        for inst_num in range(nx):
-            intv_offset = col_idx + spx * inst_num
-            inst_intv = intv_offset, intv_offset + num_col
-            if not intv.add(inst_intv, ext_info, endl_info, endr_info):
-                raise ValueError('Cannot add primitive on row %d, '
-                                 'column [%d, %d).' % (row_idx, inst_intv[0], inst_intv[1]))
+        num_add = intv.add_array((col_idx, col_idx + num_col), nx, spx, ext_info, endl_info,
+                                 endr_info)
+        if num_add < nx:
+            intv_offset = col_idx + spx * num_add
+            raise ValueError('Cannot add primitive on row %d, '
+                             'column [%d, %d).' % (row_idx, intv_offset, intv_offset + num_col))
 
         if row_orient == 'R0':
             y0 = ycur
@@ -1557,9 +1797,11 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
         return self.add_instance(master, inst_name=inst_name, loc=(x0, y0), orient=orient,
                                  nx=nx, spx=spx * col_width, unit_mode=True)
 
-    def fill_space(self):
+    def fill_space(self, space_unit=None):
         if self._laygo_size is None:
             raise ValueError('laygo_size must be set before filling spaces.')
+        if space_unit is None:
+            space_unit = self.params['config'].get('space_unit', DEFAULT_SPACE_UNIT)
 
         num_cols = self._laygo_size[0]
         # add space blocks
@@ -1568,18 +1810,20 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
         endr_iter = self._laygo_edger.row_end_iter()
         for row_idx, (intv, endl, endr) in enumerate(zip(self._used_list, endl_iter, endr_iter)):
             for (start, end), end_info in zip(*intv.get_complement(total_intv, endl, endr)):
-                self._add_laygo_space(end_info, num_blk=end - start, loc=(start, row_idx))
+                self._fill_laygo_space(end_info, start, end, row_idx, space_unit)
 
         # draw extensions
         ext_endl_infos, ext_endr_infos = [], []
         laygo_info = self._laygo_info
         tech_cls = laygo_info.tech_cls
+        ext_master_cache = {}
         for bot_ridx in range(0, self.num_rows - 1):
             w, yext = self._ext_params[bot_ridx + 1]
             bot_ext_list = self._get_ext_info_row(bot_ridx, 1)
             top_ext_list = self._get_ext_info_row(bot_ridx + 1, 0)
             edgel, edger = tech_cls.draw_extensions(self, laygo_info, num_cols, w, yext,
-                                                    bot_ext_list, top_ext_list)
+                                                    bot_ext_list, top_ext_list,
+                                                    master_cache=ext_master_cache)
             ext_endl_infos.append(edgel)
             ext_endr_infos.append(edger)
 
@@ -1603,7 +1847,25 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
         intv = self._used_list[row_idx]
         return [ext_info[ext_idx] for ext_info in intv.values()]
 
-    def _add_laygo_space(self, adj_end_info, num_blk=1, loc=(0, 0), **kwargs):
+    def _fill_laygo_space(self, adj_end_info, start, stop, row_idx, space_unit):
+        """Fills the given empty interval with space blocks."""
+        blk_list = get_space_blocks(stop - start, space_unit)
+        if len(blk_list) == 1:
+            self._add_laygo_space(adj_end_info, num_blk=stop - start, loc=(start, row_idx))
+            return
+
+        # adjacent space blocks use space edge information
+        sp_edgel, sp_edger = get_space_edge_info(self._tech_cls, self._row_info_list[row_idx],
+                                                 space_unit)
+        last_idx = len(blk_list) - 1
+        col_idx = start
+        for idx, (num_blk, nx) in enumerate(blk_list):
+            endl = adj_end_info[0] if idx == 0 else (sp_edger, None)
+            endr = adj_end_info[1] if idx == last_idx else (sp_edgel, None)
+            self._add_laygo_space((endl, endr), num_blk=num_blk, loc=(col_idx, row_idx), nx=nx)
+            col_idx += num_blk * nx
+
+    def _add_laygo_space(self, adj_end_info, num_blk=1, loc=(0, 0), nx=1, **kwargs):
         col_idx, row_idx = loc
         row_info = self._row_info_list[row_idx]
         rprop = self._row_prop_list[row_idx]
@@ -1632,15 +1894,17 @@ class LaygoBase(TemplateBase, metaclass=abc.ABCMeta):
         ext_info = endb, endt
         endl_info = (endl, lay_info)
         endr_info = (endr, lay_info)
-        inst_intv = (col_idx, col_idx + num_blk)
-        if not intv.add(inst_intv, ext_info, endl_info, endr_info):
+        num_add = intv.add_array((col_idx, col_idx + num_blk), nx, num_blk, ext_info, endl_info,
+                                 endr_info)
+        if num_add < nx:
+            intv_offset = col_idx + num_blk * num_add
             raise ValueError('Cannot add space on row %d, '
-                             'column [%d, %d)' % (row_idx, inst_intv[0], inst_intv[1]))
+                             'column [%d, %d)' % (row_idx, intv_offset, intv_offset + num_blk))
 
         x0 = self._laygo_info.col_to_coord(col_idx, unit_mode=True)
         y0 = row_y[1] if row_orient == 'R0' else row_y[2]
         self.add_instance(master, inst_name=inst_name, loc=(x0, y0), orient=row_orient,
-                          unit_mode=True)
+                          nx=nx, spx=num_blk * self._laygo_info.col_width, unit_mode=True)
 
     def _draw_boundary_cells(self):
         if self._laygo_info.draw_boundaries:
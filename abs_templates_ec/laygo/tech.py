@@ -3,7 +3,7 @@
 """This module defines abstract analog mosfet template classes.
 """
 
-from typing import Dict, Any, Tuple, List, TYPE_CHECKING
+from typing import Dict, Any, Tuple, List, Optional, TYPE_CHECKING
 
 from bag.layout.util import BBox
 from bag.layout.template import TemplateBase
@@ -11,6 +11,7 @@ from bag.layout.routing import WireArray
 
 import abc
 
+from ..cache import freeze_key
 from ..analog_mos.core import MOSTech
 from ..analog_mos.mos import AnalogMOSExt
 from ..analog_mos.edge import AnalogEdge
@@ -20,6 +21,59 @@ if TYPE_CHECKING:
     from .base import LaygoEndRow
     from .core import LaygoBaseInfo
 
+# maximum number of extension groups in one period of an arrayed extension run.
+MAX_EXT_PERIOD = 8
+
+
+def get_ext_group_arrays(ext_groups, max_period=MAX_EXT_PERIOD):
+    # type: (List[Tuple[int, int, Any, Any]], int) -> List[Tuple[int, int, Any, Any, int, int]]
+    """Group periodic runs of extension groups into arrays.
+
+    A run of extension groups that repeats a sequence of at most max_period groups at least
+    twice, with a constant finger offset between repeats, is returned as one array per group
+    in the sequence.  Extension groups need not be contiguous; the groups of a repeat must be
+    shifted by the array pitch from the groups of the previous repeat.
+
+    Parameters
+    ----------
+    ext_groups : List[Tuple[int, int, Any, Any]]
+        list of (finger offset, number of fingers, bottom info, top info) extension groups,
+        as returned by get_row_extension_info().
+    max_period : int
+        maximum number of groups in one period.
+
+    Returns
+    -------
+    ext_arrays : List[Tuple[int, int, Any, Any, int, int]]
+        list of (finger offset, number of fingers, bottom info, top info, array count,
+        array pitch in fingers) extension arrays.
+    """
+    keys = [freeze_key(group[1:]) for group in ext_groups]
+    offsets = [group[0] for group in ext_groups]
+    num_groups = len(ext_groups)
+    ext_arrays = []
+    idx = 0
+    while idx < num_groups:
+        best_period, best_num, best_pitch = 1, 1, 0
+        for period in range(1, min(max_period, (num_groups - idx) // 2) + 1):
+            pitch = offsets[idx + period] - offsets[idx]
+            pattern = [(keys[idx + j], offsets[idx + j]) for j in range(period)]
+            num = 1
+            while idx + (num + 1) * period <= num_groups:
+                start = idx + num * period
+                cur = [(keys[start + j], offsets[start + j] - num * pitch) for j in range(period)]
+                if cur != pattern:
+                    break
+                num += 1
+            if num > 1 and num * period > best_num * best_period:
+                best_period, best_num, best_pitch = period, num, pitch
+
+        for fg_off, fg, bot_info, top_info in ext_groups[idx:idx + best_period]:
+            ext_arrays.append((fg_off, fg, bot_info, top_info, best_num, best_pitch))
+        idx += best_num * best_period
+
+    return ext_arrays
+
 
 class LaygoTech(MOSTech, metaclass=abc.ABCMeta):
     """An abstract class for drawing transistor related layout for custom digital circuits.
@@ -421,10 +475,13 @@ class LaygoTech(MOSTech, metaclass=abc.ABCMeta):
                         yext,  # type: int
                         bot_ext_list,  # type: List[Tuple[int, Any]]
                         top_ext_list,  # type: List[Tuple[int, Any]]
+                        master_cache=None,  # type: Optional[Dict[Any, TemplateBase]]
                         ):
         # type: (...) -> Tuple[Any, Any]
         """Draw extension rows in the given LaygoBase/DigitalBase template.
 
+        Periodic runs of identical extension groups are drawn as instance arrays.
+
         Parameters
         ----------
         template : TemplateBase
@@ -441,6 +498,9 @@ class LaygoTech(MOSTech, metaclass=abc.ABCMeta):
             list of tuples of end finger index and bottom extension information
         top_ext_list : List[Tuple[int, Any]]
             list of tuples of end finger index and top extension information
+        master_cache : Optional[Dict[Any, TemplateBase]]
+            dictionary from extension parameters to extension masters.  Pass the same
+            dictionary when drawing all extension rows of a template to reuse masters.
 
         Returns
         -------
@@ -454,10 +514,12 @@ class LaygoTech(MOSTech, metaclass=abc.ABCMeta):
         guard_ring_nf = laygo_info.guard_ring_nf
 
         ext_groups = self.get_row_extension_info(bot_ext_list, top_ext_list)
+        if master_cache is None:
+            master_cache = {}
 
         edgesl, edgesr = None, None
         if w > 0 or self.draw_zero_extension():
-            for idx, (fg_off, fg, bot_info, top_info) in enumerate(ext_groups):
+            for fg_off, fg, bot_info, top_info, nx, pitch in get_ext_group_arrays(ext_groups):
                 ext_params = dict(
                     lch=lch,
                     w=w,
@@ -466,9 +528,20 @@ class LaygoTech(MOSTech, metaclass=abc.ABCMeta):
                     bot_ext_info=bot_info,
                     is_laygo=True,
                 )
+                ext_key = freeze_key(ext_params)
+                try:
+                    ext_master = master_cache.get(ext_key, None)
+                except TypeError:
+                    ext_key = ext_master = None
+                if ext_master is None:
+                    ext_master = template.new_template(params=ext_params, temp_cls=AnalogMOSExt)
+                    if ext_key is not None:
+                        master_cache[ext_key] = ext_master
+
                 curx = laygo_info.col_to_coord(fg_off, unit_mode=True)
-                ext_master = template.new_template(params=ext_params, temp_cls=AnalogMOSExt)
-                template.add_instance(ext_master, loc=(curx, yext), unit_mode=True)
+                spx = laygo_info.col_to_coord(fg_off + pitch, unit_mode=True) - curx
+                template.add_instance(ext_master, loc=(curx, yext), nx=nx, spx=spx,
+                                      unit_mode=True)
 
                 if fg_off == 0:
                     adj_blk_info = ext_master.get_left_edge_info()
@@ -482,7 +555,7 @@ class LaygoTech(MOSTech, metaclass=abc.ABCMeta):
                         is_laygo=True,
                     )
                     edgesl = (yext, cur_ext_edge_params)
-                if fg_off + fg == num_cols:
+                if fg_off + (nx - 1) * pitch + fg == num_cols:
                     adj_blk_info = ext_master.get_right_edge_info()
                     # compute edge parameters
                     cur_ext_edge_params = dict(
@@ -2,7 +2,16 @@
 
 """This module defines template used for transistor characterization."""
 
+from typing import Dict, Any, List
+
+from collections import OrderedDict
+
+from bag.layout.template import TemplateBase
+from bag.layout.util import BBox
+
 from .analog_core import AnalogBase
+from .parallel import TemplateRequest, new_templates
+from .sweep import iter_sweep_params
 
 
 class Transistor(AnalogBase):
@@ -165,6 +174,11 @@ class TransistorGD(AnalogBase):
 
     def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
         AnalogBase.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
+        self._sch_params = None
+
+    @property
+    def sch_params(self):
+        return self._sch_params
 
     @classmethod
     def get_params_info(cls):
@@ -300,3 +314,180 @@ class TransistorGD(AnalogBase):
         if global_gnd_layer is not None:
             _, global_gnd_box = next(ptap_wire_arrs[0].wire_iter(self.grid))
             self.add_pin_primitive(global_gnd_name, global_gnd_layer, global_gnd_box)
+
+        self._sch_params = dict(
+            mos_type=mos_type,
+            w=w,
+            lch=lch,
+            fg=fg,
+            intent=threshold,
+            dum_info=self.get_sch_dummy_info(),
+        )
+
+
+# device templates supported by TransistorArray.
+_dev_cls_table = dict(
+    Transistor=Transistor,
+    TransistorGD=TransistorGD,
+)
+
+
+class TransistorArray(TemplateBase):
+    """An array of transistor characterization templates.
+
+    The devices are described by a base parameter dictionary and sweep axes, as in
+    :mod:`abs_templates_ec.sweep`, so devices with the same primitive parameters share
+    substrate and edge masters.  Devices with the same height are placed together in one
+    pass, left to right, starting a new row when the maximum row width is exceeded.  Rows
+    are sorted by height.
+
+    Every device pin is exported with the device index as suffix, for example the drain of
+    device 3 is exported as 'd_3'.  The manifest property maps each device to its instance
+    name, location, pins, and schematic parameters.
+
+    Parameters
+    ----------
+    temp_db : :class:`bag.layout.template.TemplateDB`
+            the template database.
+    lib_name : str
+        the layout library name.
+    params : dict[str, any]
+        the parameter values.
+    used_names : set[str]
+        a set of already used cell names.
+    kwargs : dict[str, any]
+        dictionary of optional parameters.  See documentation of
+        :class:`bag.layout.template.TemplateBase` for details.
+    """
+
+    def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
+        TemplateBase.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
+        self._manifest = None
+
+    @property
+    def manifest(self):
+        # type: () -> List[Dict[str, Any]]
+        """Returns the list of device information dictionaries, in sweep index order."""
+        return self._manifest
+
+    @classmethod
+    def get_params_info(cls):
+        """Returns a dictionary containing parameter descriptions.
+
+        Override this method to return a dictionary from parameter names to descriptions.
+
+        Returns
+        -------
+        param_info : dict[str, str]
+            dictionary from parameter name to description.
+        """
+        return dict(
+            dev_type="device template, either 'Transistor' or 'TransistorGD'.",
+            base_params='base device parameters.',
+            sweep_axes='dictionary from device parameter name to list of values.',
+            top_layer='the top level layer ID.',
+            max_width='maximum row width, in resolution units.  None for no limit.',
+            spx='horizontal space between devices, in number of blocks.',
+            spy='vertical space between rows, in number of blocks.',
+            show_pins='True to draw pin layouts.',
+        )
+
+    @classmethod
+    def get_default_param_values(cls):
+        """Returns a dictionary containing default parameter values.
+
+        Override this method to define default parameter values.  As good practice,
+        you should avoid defining default values for technology-dependent parameters
+        (such as channel length, transistor width, etc.), but only define default
+        values for technology-independent parameters (such as number of tracks).
+
+        Returns
+        -------
+        default_params : dict[str, any]
+            dictionary of default parameter values.
+        """
+        return dict(
+            dev_type='Transistor',
+            sweep_axes=None,
+            max_width=None,
+            spx=1,
+            spy=1,
+            show_pins=True,
+        )
+
+    def draw_layout(self):
+        """Draw the layout of a transistor characterization array.
+        """
+        dev_type = self.params['dev_type']
+        base_params = self.params['base_params']
+        sweep_axes = self.params['sweep_axes']
+        top_layer = self.params['top_layer']
+        max_width = self.params['max_width']
+        spx = self.params['spx']
+        spy = self.params['spy']
+        show_pins = self.params['show_pins']
+
+        if dev_type not in _dev_cls_table:
+            raise ValueError('Unsupported device type: %s' % dev_type)
+        dev_cls = _dev_cls_table[dev_type]
+        sweep_axes = OrderedDict(sweep_axes or {})
+        axis_names = list(sweep_axes.keys())
+
+        # devices are independent, so create them all at once.
+        variant_list = list(iter_sweep_params(base_params, sweep_axes))
+        master_list = new_templates(self, [TemplateRequest(dev_cls, params)
+                                           for _, _, _, params in variant_list])
+
+        # group devices by quantized height
+        res = self.grid.resolution
+        blk_w, blk_h = self.grid.get_block_size(top_layer, unit_mode=True)
+        spx *= blk_w
+        spy *= blk_h
+        height_table = {}  # type: Dict[int, List[int]]
+        for vidx, master in enumerate(master_list):
+            height = -(-master.bound_box.height_unit // blk_h) * blk_h
+            if height not in height_table:
+                height_table[height] = []
+            height_table[height].append(vidx)
+
+        # place devices, one pass per row height
+        info_table = {}
+        x_max = y_cur = 0
+        for height in sorted(height_table.keys()):
+            x_cur = 0
+            for vidx in height_table[height]:
+                _, index, values, params = variant_list[vidx]
+                master = master_list[vidx]
+                box = master.bound_box
+                width = -(-box.width_unit // blk_w) * blk_w
+                if x_cur > 0 and max_width is not None and x_cur + width > max_width:
+                    x_cur = 0
+                    y_cur += height + spy
+
+                inst_name = 'X%d' % index
+                loc = (x_cur - box.left_unit, y_cur - box.bottom_unit)
+                inst = self.add_instance(master, inst_name, loc=loc, unit_mode=True)
+                pins = {}
+                for port_name in inst.port_names_iter():
+                    net_name = '%s_%d' % (port_name, index)
+                    self.reexport(inst.get_port(port_name), net_name=net_name, show=show_pins)
+                    pins[port_name] = net_name
+
+                info_table[index] = dict(
+                    index=index,
+                    inst_name=inst_name,
+                    loc=(x_cur * res, y_cur * res),
+                    sweep=dict(zip(axis_names, values)),
+                    params=params,
+                    pins=pins,
+                    sch_params=master.sch_params,
+                )
+                x_max = max(x_max, x_cur + width)
+                x_cur += width + spx
+            y_cur += height + spy
+
+        self._manifest = [info_table[index] for index in sorted(info_table.keys())]
+
+        bnd_box = BBox(0, 0, x_max, max(0, y_cur - spy), res, unit_mode=True)
+        self.array_box = bnd_box
+        self.set_size_from_bound_box(top_layer, bnd_box)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines opt-in parallel generation of independent template masters.
+
+Generators that need several masters which do not depend on each other can declare all of
+them up front with new_templates().  When parallel generation is enabled, each master is
+generated in a forked worker process, sent back to the parent process, and registered in the
+parent TemplateDB, so later new_template() calls with the same parameters reuse it.
+
+Workers name new masters against their own copy of the used cell names.  When the parent
+process registers the masters, it names them again against its own used cell names, in
+request order, so cell names are the same as when the masters are created serially.  The
+cell names of child instances, which workers record when they finalize masters, are updated
+to match.
+
+Parallel generation is disabled by default.  Enable it with set_num_workers(), or by setting
+the ABS_TEMPLATES_EC_NUM_WORKERS environment variable.  new_templates() falls back to
+creating masters one after the other whenever parallel generation is not possible, for
+example on platforms without fork(), inside a worker process, or if a master cannot be sent
+back to the parent process.  The latter issues a warning, since the master is then generated
+twice.
+
+Example::
+
+    even_master, odd_master = new_templates(self, [TemplateRequest(RXHalf, even_params),
+                                                   TemplateRequest(RXHalf, odd_params)])
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import io
+import os
+import pickle
+import warnings
+import multiprocessing
+from collections import namedtuple
+
+from .cache import freeze_key
+
+if TYPE_CHECKING:
+    from bag.layout.template import TemplateBase, TemplateDB
+
+# environment variable that sets the number of worker processes.
+NUM_WORKERS_ENV = 'ABS_TEMPLATES_EC_NUM_WORKERS'
+
+TemplateRequest = namedtuple('TemplateRequest', ['temp_cls', 'params'])
+
+_num_workers = None  # type: Optional[int]
+# state inherited by forked worker processes.
+_fork_state = None  # type: Optional[_ForkState]
+_in_worker = False
+
+
+def get_num_workers():
+    # type: () -> int
+    """Returns the maximum number of worker processes used by new_templates().
+
+    Defaults to the value of the ABS_TEMPLATES_EC_NUM_WORKERS environment variable, or 1
+    (parallel generation disabled) if it is not set.  'auto' uses all CPUs.
+
+    Returns
+    -------
+    num_workers : int
+        the maximum number of worker processes.
+    """
+    global _num_workers
+    if _num_workers is None:
+        val = os.environ.get(NUM_WORKERS_ENV, '1').strip().lower()
+        if val == 'auto':
+            _num_workers = os.cpu_count() or 1
+        else:
+            _num_workers = max(1, int(val))
+    return _num_workers
+
+
+def set_num_workers(num_workers):
+    # type: (int) -> None
+    """Sets the maximum number of worker processes used by new_templates().
+
+    Parameters
+    ----------
+    num_workers : int
+        the maximum number of worker processes.  1 disables parallel generation.
+    """
+    global _num_workers
+    if num_workers < 1:
+        raise ValueError('num_workers must be positive.')
+    _num_workers = num_workers
+
+
+class _ForkState(object):
+    """Parent process state shared with forked worker processes."""
+
+    def __init__(self, temp_db, request_list):
+        # type: (TemplateDB, Sequence[TemplateRequest]) -> None
+        self.temp_db = temp_db
+        self.request_list = request_list
+        # objects that exist before forking are sent by reference.  Forked workers
+        # inherit the parent address space, so object IDs are the same in both processes.
+        self.shared = {id(temp_db): temp_db}
+        for val in vars(temp_db).values():
+            self.shared[id(val)] = val
+        master_table = _get_master_table(temp_db)
+        self.master_keys = set(master_table.keys())
+        for master in master_table.values():
+            self.shared[id(master)] = master
+        grid = getattr(temp_db, 'grid', None)
+        if grid is not None:
+            self.shared[id(grid)] = grid
+            self.shared[id(grid.tech_info)] = grid.tech_info
+
+
+class _SharedPickler(pickle.Pickler):
+    """A Pickler that sends objects shared with the parent process by reference."""
+
+    def __init__(self, file, shared):
+        # type: (io.BytesIO, Dict[int, Any]) -> None
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._shared = shared
+
+    def persistent_id(self, obj):
+        obj_id = id(obj)
+        if obj_id in self._shared and self._shared[obj_id] is obj:
+            return obj_id
+        return None
+
+
+class _SharedUnpickler(pickle.Unpickler):
+    """An Unpickler that restores objects shared with worker processes."""
+
+    def __init__(self, file, shared):
+        # type: (io.BytesIO, Dict[int, Any]) -> None
+        pickle.Unpickler.__init__(self, file)
+        self._shared = shared
+
+    def persistent_load(self, pid):
+        return self._shared[pid]
+
+
+def _get_master_table(temp_db):
+    # type: (TemplateDB) -> Dict[Any, TemplateBase]
+    """Returns the master lookup table of the given TemplateDB."""
+    return getattr(temp_db, '_master_lookup', {})
+
+
+def _can_merge(temp_db):
+    # type: (TemplateDB) -> bool
+    """Returns True if masters generated in other processes can be added to the given DB."""
+    return (hasattr(temp_db, '_master_lookup') and hasattr(temp_db, '_used_cell_names') and
+            hasattr(temp_db, 'find_master') and hasattr(temp_db, 'register_master'))
+
+
+def _build_master(idx):
+    # type: (int) -> Tuple[Optional[bytes], str]
+    """Generates the requested master in a worker process.
+
+    Returns the master and all masters created in this worker, pickled, and an empty string.
+    If they cannot be sent back to the parent process, returns None and the error message.
+    """
+    global _in_worker
+    _in_worker = True
+    state = _fork_state
+    temp_db = state.temp_db
+    temp_cls, params = state.request_list[idx]
+    master = temp_db.new_template(params=params, temp_cls=temp_cls)
+    # a worker may run several jobs, so send all masters that the parent does not have.
+    new_masters = [(key, val) for key, val in _get_master_table(temp_db).items()
+                   if key not in state.master_keys]
+    buf = io.BytesIO()
+    try:
+        _SharedPickler(buf, state.shared).dump((master, new_masters))
+    except Exception as ex:
+        return None, '%s: %s' % (type(ex).__name__, ex)
+    return buf.getvalue(), ''
+
+
+def _rename_instances(master, rename_map):
+    # type: (TemplateBase, Dict[str, str]) -> None
+    """Updates the child cell names that were recorded when the given master was finalized."""
+    raw_content = getattr(getattr(master, '_layout', None), '_raw_content', None)
+    if raw_content:
+        for inst_info in raw_content[0]:
+            cell_name = inst_info.get('cell', None)
+            if cell_name in rename_map:
+                inst_info['cell'] = rename_map[cell_name]
+
+
+def _merge_masters(temp_db, data, shared):
+    # type: (TemplateDB, bytes, Dict[int, Any]) -> TemplateBase
+    """Registers masters generated by a worker process in the given TemplateDB.
+
+    Masters are renamed against the used cell names of the given TemplateDB, in the order the
+    worker registered them, which is the order a serial run registers them.  A master that
+    another worker already generated is not registered again; it takes the cell name of the
+    registered master, so instances of it refer to the same cell.
+
+    The worker finalized the masters, which records the cell names of child instances, so
+    the instances of registered masters are renamed afterwards.
+    """
+    master, new_masters = _SharedUnpickler(io.BytesIO(data), shared).load()
+    used_names = temp_db._used_cell_names
+    rename_map = {}  # type: Dict[str, str]
+    merged_list = []
+    for key, cur_master in new_masters:
+        worker_name = cur_master.cell_name
+        existing = temp_db.find_master(key)
+        if existing is None:
+            cur_master._used_names = used_names
+            cur_master.update_master_info()
+            used_names.add(cur_master.cell_name)
+            temp_db.register_master(key, cur_master)
+            merged_list.append(cur_master)
+        else:
+            cur_master._cell_name = existing.cell_name
+            if cur_master is master:
+                master = existing
+        rename_map[worker_name] = cur_master.cell_name
+
+    for cur_master in merged_list:
+        _rename_instances(cur_master, rename_map)
+    return master
+
+
+def new_templates(template, request_list, num_workers=None):
+    # type: (TemplateBase, Sequence[TemplateRequest], Optional[int]) -> List[TemplateBase]
+    """Creates the given template masters, generating them in parallel if enabled.
+
+    The requested masters must not depend on each other.  The result is the same as calling
+    template.new_template() on each request in order.
+
+    Parameters
+    ----------
+    template : TemplateBase
+        the template that requests the masters.
+    request_list : Sequence[TemplateRequest]
+        list of (template class, parameters) requests.
+    num_workers : Optional[int]
+        maximum number of worker processes.  Defaults to get_num_workers().
+
+    Returns
+    -------
+    master_list : List[TemplateBase]
+        the template masters, in request order.
+    """
+    global _fork_state
+    if num_workers is None:
+        num_workers = get_num_workers()
+
+    # generate each unique request once
+    unique_idx = {}  # type: Dict[Hashable, int]
+    job_list = []  # type: List[TemplateRequest]
+    req_job_idx = []  # type: List[int]
+    for req_idx, (temp_cls, params) in enumerate(request_list):
+        req_key = (temp_cls, freeze_key(params))
+        try:
+            hash(req_key)
+        except TypeError:
+            req_key = req_idx
+        if req_key not in unique_idx:
+            unique_idx[req_key] = len(job_list)
+            job_list.append(TemplateRequest(temp_cls, params))
+        req_job_idx.append(unique_idx[req_key])
+
+    num_proc = min(num_workers, len(job_list))
+    temp_db = template.template_db
+    if num_proc > 1 and not _in_worker and _can_merge(temp_db) and \
+            'fork' in multiprocessing.get_all_start_methods():
+        _fork_state = state = _ForkState(temp_db, job_list)
+        try:
+            with multiprocessing.get_context('fork').Pool(processes=num_proc) as pool:
+                result_list = pool.map(_build_master, range(len(job_list)), chunksize=1)
+        finally:
+            _fork_state = None
+
+        master_list = []
+        for (temp_cls, params), (data, err_msg) in zip(job_list, result_list):
+            if data is None:
+                warnings.warn('Cannot send %s master from worker process, generating it again '
+                              'serially.  %s' % (temp_cls.__name__, err_msg))
+                master_list.append(template.new_template(params=params, temp_cls=temp_cls))
+            else:
+                master_list.append(_merge_masters(temp_db, data, state.shared))
+    else:
+        master_list = [template.new_template(params=params, temp_cls=temp_cls)
+                       for temp_cls, params in job_list]
+
+    return [master_list[idx] for idx in req_job_idx]
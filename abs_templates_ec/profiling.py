@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines opt-in hierarchical profiling of layout generation.
+
+LayoutProfiler instruments template and technology class methods only while it is active, by
+temporarily replacing them with timing wrappers.  When no profiler is active, nothing is
+patched, so layout generation runs at full speed.
+
+Example::
+
+    with LayoutProfiler() as prof:
+        temp_db.new_template(params=params, temp_cls=RXCore)
+    prof.write_collapsed('rxcore.folded')
+    print(prof.get_summary())
+
+The collapsed stack file can be rendered with flamegraph.pl or speedscope.  Stack frames are
+template class names for draw_layout() calls, and 'TechClass.method' for technology methods.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import time
+from types import FunctionType
+from collections import Counter, defaultdict
+
+from bag.layout.template import TemplateBase
+
+from .analog_mos.core import MOSTech
+from .resistor.base import ResTech
+
+# TemplateBase methods that draw geometry.
+SHAPE_METHODS = ('add_rect', 'add_res_metal', 'add_path', 'add_polygon', 'add_blockage',
+                 'add_boundary', 'add_via', 'add_via_primitive', 'add_instance',
+                 'add_instance_primitive')
+
+
+def _get_all_subclasses(cls):
+    # type: (type) -> List[type]
+    """Returns all subclasses of the given class, including itself."""
+    ans = [cls]
+    visited = {cls}
+    idx = 0
+    while idx < len(ans):
+        for sub_cls in ans[idx].__subclasses__():
+            if sub_cls not in visited:
+                visited.add(sub_cls)
+                ans.append(sub_cls)
+        idx += 1
+    return ans
+
+
+class _Frame(object):
+    """A profiler stack frame."""
+
+    __slots__ = ('name', 'obj', 't_start', 't_child')
+
+    def __init__(self, name, obj, t_start):
+        # type: (str, Any, float) -> None
+        self.name = name
+        self.obj = obj
+        self.t_start = t_start
+        self.t_child = 0.0
+
+
+class LayoutProfiler(object):
+    """A hierarchical profiler of template draw_layout() and technology class methods.
+
+    While active, this profiler records
+
+    1. inclusive and exclusive time of draw_layout() per template class, and per master.
+    2. call count and inclusive time of MOSTech/ResTech/LaygoTech methods.
+    3. new_template() calls, split into master cache hits and created masters.
+    4. number of shapes and instances drawn by each template class.
+
+    Only one profiler can be active at a time, and it assumes layout is generated in a
+    single thread.
+
+    Parameters
+    ----------
+    profile_tech : bool
+        True to record technology class method calls.  Disable to reduce profiling overhead.
+    template_filter : Optional[Callable[[type], bool]]
+        if given, only draw_layout() of template classes for which this function returns True
+        are recorded.  Defaults to all TemplateBase subclasses.
+    """
+
+    _active = None  # type: Optional[LayoutProfiler]
+
+    def __init__(self, profile_tech=True, template_filter=None):
+        # type: (bool, Optional[Callable[[type], bool]]) -> None
+        self._profile_tech = profile_tech
+        self._template_filter = template_filter
+        self._patches = []  # type: List[Tuple[type, str, Any]]
+        self._stack = []  # type: List[_Frame]
+        self._new_stack = []  # type: List[List[bool]]
+        self._stack_times = Counter()  # type: Dict[Tuple[str, ...], float]
+        self._draw_stats = defaultdict(lambda: [0, 0.0, 0.0])
+        self._master_times = []  # type: List[Tuple[str, str, float]]
+        self._tech_stats = defaultdict(lambda: [0, 0.0])
+        self._tech_depth = Counter()
+        self._shapes = defaultdict(Counter)
+        self._num_new_template = 0
+        self._num_created = 0
+
+    @classmethod
+    def get_active(cls):
+        # type: () -> Optional[LayoutProfiler]
+        """Returns the active profiler, or None if profiling is disabled."""
+        return cls._active
+
+    def __enter__(self):
+        # type: () -> LayoutProfiler
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        # type: () -> None
+        """Starts profiling by instrumenting template and technology classes."""
+        if LayoutProfiler._active is not None:
+            raise ValueError('Another LayoutProfiler is already active.')
+        LayoutProfiler._active = self
+
+        self._patch(TemplateBase, 'new_template', self._wrap_new_template)
+        for name in SHAPE_METHODS:
+            if name in TemplateBase.__dict__:
+                self._patch(TemplateBase, name, self._wrap_shape)
+        for temp_cls in _get_all_subclasses(TemplateBase):
+            if 'draw_layout' in temp_cls.__dict__:
+                if self._template_filter is None or self._template_filter(temp_cls):
+                    self._patch(temp_cls, 'draw_layout', self._wrap_draw)
+
+        if self._profile_tech:
+            for base_cls in (MOSTech, ResTech):
+                for tech_cls in _get_all_subclasses(base_cls):
+                    for name, attr in list(tech_cls.__dict__.items()):
+                        if not name.startswith('__') and \
+                                isinstance(attr, (staticmethod, classmethod, FunctionType)):
+                            self._patch(tech_cls, name, self._wrap_tech)
+
+    def stop(self):
+        # type: () -> None
+        """Stops profiling and restores all instrumented methods."""
+        for cls, name, attr in reversed(self._patches):
+            setattr(cls, name, attr)
+        del self._patches[:]
+        if LayoutProfiler._active is self:
+            LayoutProfiler._active = None
+
+    def _patch(self, cls, name, wrapper_factory):
+        # type: (type, str, Callable[[type, str, Callable], Callable]) -> None
+        attr = cls.__dict__[name]
+        if isinstance(attr, staticmethod):
+            new_attr = staticmethod(wrapper_factory(cls, name, attr.__func__))
+        elif isinstance(attr, classmethod):
+            new_attr = classmethod(wrapper_factory(cls, name, attr.__func__))
+        else:
+            new_attr = wrapper_factory(cls, name, attr)
+        self._patches.append((cls, name, attr))
+        setattr(cls, name, new_attr)
+
+    def _push(self, name, obj=None):
+        # type: (str, Any) -> _Frame
+        frame = _Frame(name, obj, time.perf_counter())
+        self._stack.append(frame)
+        return frame
+
+    def _pop(self, frame):
+        # type: (_Frame) -> float
+        t_tot = time.perf_counter() - frame.t_start
+        key = tuple((f.name for f in self._stack))
+        self._stack.pop()
+        self._stack_times[key] += t_tot - frame.t_child
+        if self._stack:
+            self._stack[-1].t_child += t_tot
+        return t_tot
+
+    def _wrap_draw(self, cls, name, fun):
+        # type: (type, str, Callable) -> Callable
+        def draw_layout(template, *args, **kwargs):
+            if self._stack and self._stack[-1].obj is template:
+                # draw_layout() of a parent class called by a subclass
+                return fun(template, *args, **kwargs)
+            if self._new_stack and not self._new_stack[-1][0]:
+                self._new_stack[-1][0] = True
+                self._num_created += 1
+            frame = self._push(template.__class__.__name__, template)
+            try:
+                return fun(template, *args, **kwargs)
+            finally:
+                t_child = frame.t_child
+                t_tot = self._pop(frame)
+                stats = self._draw_stats[template.__class__.__name__]
+                stats[0] += 1
+                stats[1] += t_tot
+                stats[2] += t_tot - t_child
+                try:
+                    master_name = template.get_layout_basename()
+                except Exception:
+                    master_name = '?'
+                self._master_times.append((template.__class__.__name__, master_name, t_tot))
+
+        return draw_layout
+
+    def _wrap_new_template(self, cls, name, fun):
+        # type: (type, str, Callable) -> Callable
+        def new_template(template, *args, **kwargs):
+            self._num_new_template += 1
+            self._new_stack.append([False])
+            try:
+                return fun(template, *args, **kwargs)
+            finally:
+                self._new_stack.pop()
+
+        return new_template
+
+    def _wrap_shape(self, cls, name, fun):
+        # type: (type, str, Callable) -> Callable
+        def add_shape(template, *args, **kwargs):
+            self._shapes[template.__class__.__name__][name] += \
+                kwargs.get('nx', 1) * kwargs.get('ny', 1)
+            return fun(template, *args, **kwargs)
+
+        return add_shape
+
+    def _wrap_tech(self, cls, name, fun):
+        # type: (type, str, Callable) -> Callable
+        frame_name = '%s.%s' % (cls.__name__, name)
+
+        def tech_method(*args, **kwargs):
+            # only the outermost call of recursive methods is counted in inclusive time.
+            depth = self._tech_depth[frame_name]
+            self._tech_depth[frame_name] = depth + 1
+            frame = self._push(frame_name)
+            try:
+                return fun(*args, **kwargs)
+            finally:
+                t_tot = self._pop(frame)
+                self._tech_depth[frame_name] = depth
+                stats = self._tech_stats[frame_name]
+                stats[0] += 1
+                if depth == 0:
+                    stats[1] += t_tot
+
+        return tech_method
+
+    def get_collapsed_stacks(self):
+        # type: () -> List[str]
+        """Returns profiling results in collapsed stack format.
+
+        Returns
+        -------
+        lines : List[str]
+            lines of 'frame0;frame1;...;frameN value', where value is the exclusive time of
+            the stack in microseconds.
+        """
+        return ['%s %d' % (';'.join(key), int(round(t * 1e6)))
+                for key, t in sorted(self._stack_times.items()) if t > 0]
+
+    def write_collapsed(self, fname):
+        # type: (str) -> None
+        """Writes profiling results to a flame-graph-compatible collapsed stack file.
+
+        Parameters
+        ----------
+        fname : str
+            the output file name.
+        """
+        with open(fname, 'w') as f:
+            for line in self.get_collapsed_stacks():
+                f.write(line)
+                f.write('\n')
+
+    def get_stats(self):
+        # type: () -> Dict[str, Any]
+        """Returns profiling statistics.
+
+        Returns
+        -------
+        stats : Dict[str, Any]
+            the statistics dictionary.  Times are in seconds.
+        """
+        draw_stats = {name: dict(num_masters=val[0], tot_time=val[1], self_time=val[2],
+                                 shapes=dict(self._shapes.get(name, {})))
+                      for name, val in self._draw_stats.items()}
+        tech_stats = {name: dict(num_calls=val[0], tot_time=val[1])
+                      for name, val in self._tech_stats.items()}
+        return dict(
+            new_template_calls=self._num_new_template,
+            masters_created=self._num_created,
+            master_hits=self._num_new_template - self._num_created,
+            templates=draw_stats,
+            tech_methods=tech_stats,
+            slowest_masters=sorted(self._master_times, key=lambda v: v[2], reverse=True)[:20],
+        )
+
+    def get_summary(self, num_rows=20):
+        # type: (int) -> str
+        """Returns a human readable summary table of profiling results.
+
+        Parameters
+        ----------
+        num_rows : int
+            maximum number of rows in each table.
+
+        Returns
+        -------
+        summary : str
+            the summary table.
+        """
+        stats = self.get_stats()
+        lines = ['new_template calls: %d, created: %d, hits: %d' %
+                 (stats['new_template_calls'], stats['masters_created'], stats['master_hits']),
+                 '',
+                 '%-40s %8s %10s %10s %10s' % ('template', 'masters', 'total(s)', 'self(s)',
+                                              'shapes')]
+        temp_list = sorted(stats['templates'].items(), key=lambda v: v[1]['self_time'],
+                           reverse=True)
+        for name, val in temp_list[:num_rows]:
+            lines.append('%-40s %8d %10.4f %10.4f %10d' % (name, val['num_masters'],
+                                                           val['tot_time'], val['self_time'],
+                                                           sum(val['shapes'].values())))
+        if stats['tech_methods']:
+            lines.append('')
+            lines.append('%-60s %8s %10s' % ('technology method', 'calls', 'total(s)'))
+            tech_list = sorted(stats['tech_methods'].items(), key=lambda v: v[1]['tot_time'],
+                               reverse=True)
+            for name, val in tech_list[:num_rows]:
+                lines.append('%-60s %8d %10.4f' % (name, val['num_calls'], val['tot_time']))
+        if stats['slowest_masters']:
+            lines.append('')
+            lines.append('%-40s %-40s %10s' % ('template', 'master', 'total(s)'))
+            for temp_name, master_name, t_tot in stats['slowest_masters'][:num_rows]:
+                lines.append('%-40s %-40s %10.4f' % (temp_name, master_name, t_tot))
+        return '\n'.join(lines)
@@ -6,16 +6,47 @@
 from typing import TYPE_CHECKING, Dict, Set, Tuple, Any, List, Optional, Union
 
 import abc
+import hashlib
 
 from bag import float_to_si_string
 from bag.math import lcm
 from bag.util.search import BinaryIterator
 from bag.layout.template import TemplateBase, TemplateDB
 from bag.layout.routing import RoutingGrid
+from bag.layout.routing.fill import fill_symmetric_max_density, fill_symmetric_min_density_info
+
+from ..cache import LRUCache, freeze_key
 
 if TYPE_CHECKING:
     from bag.layout.tech import TechInfoConfig
 
+# process-wide table of density probe results, i.e. return values of get_core_info(),
+# get_lr_edge_info() and get_tb_edge_info().  Entries are keyed by technology configuration,
+# routing grid, probe dimensions and resistor parameters.
+_density_info_cache = LRUCache(max_size=4096)
+# process-wide table of fill interval solutions used by density probes.
+_fill_info_cache = LRUCache(max_size=16384)
+
+
+def fill_symmetric_max_density_cached(*args, **kwargs):
+    # type: (*Any, **Any) -> Any
+    """Cached version of fill_symmetric_max_density().
+
+    The returned value is shared between callers, and must not be modified.
+    """
+    key = ('max_density', freeze_key(args), freeze_key(kwargs))
+    return _fill_info_cache.get(key, lambda: fill_symmetric_max_density(*args, **kwargs))
+
+
+def fill_symmetric_min_density_info_cached(*args, **kwargs):
+    # type: (*Any, **Any) -> Any
+    """Cached version of fill_symmetric_min_density_info().
+
+    The returned value is shared between callers, and must not be modified.
+    """
+    key = ('min_density_info', freeze_key(args), freeze_key(kwargs))
+    return _fill_info_cache.get(key, lambda: fill_symmetric_min_density_info(*args, **kwargs))
+
 
 class ResTech(object, metaclass=abc.ABCMeta):
     """An abstract class for drawing resistor related layout.
@@ -36,6 +67,7 @@ class ResTech(object, metaclass=abc.ABCMeta):
         self.res_config = self.config['resistor']
         self.res = self.config['resolution']
         self.tech_info = tech_info
+        self._config_key = None
 
     @abc.abstractmethod
     def get_min_res_core_size(self, l, w, res_type, sub_type, threshold, options):
@@ -303,6 +335,111 @@ class ResTech(object, metaclass=abc.ABCMeta):
         """
         return self.res_config['block_pitch']
 
+    def get_config_key(self):
+        # type: () -> Tuple[Any, ...]
+        """Returns a hashable key that identifies this technology class and configuration.
+
+        Technology objects with equal keys compute identical layout information, so the key
+        is used to share cached results between technology objects in the same process.
+
+        Returns
+        -------
+        config_key : Tuple[Any, ...]
+            the configuration key.
+        """
+        if self._config_key is None:
+            config_hash = hashlib.md5(repr(self.config).encode('utf-8')).hexdigest()
+            self._config_key = (type(self), config_hash)
+        return self._config_key
+
+    def get_grid_key(self, grid, track_widths):
+        # type: (RoutingGrid, List[int]) -> Tuple[Any, ...]
+        """Returns a hashable key of the routing grid quantities used by density probes.
+
+        get_core_info() only uses the bottom routing layer to place resistor ports.  Track
+        locations are linear in track index, so wire bounds at track 0 and 0.5 determine the
+        track offset and pitch.  Subclasses that use other routing grid quantities in density
+        probes must override this method.
+
+        Parameters
+        ----------
+        grid : RoutingGrid
+            the RoutingGrid object.
+        track_widths : List[int]
+            the track width on each routing layer.
+
+        Returns
+        -------
+        grid_key : Tuple[Any, ...]
+            the routing grid key.
+        """
+        bot_layer = self.get_bot_layer()
+        tr_w = track_widths[0]
+        return (grid.resolution,
+                grid.get_track_pitch(bot_layer, unit_mode=True),
+                grid.get_wire_bounds(bot_layer, 0, width=tr_w, unit_mode=True),
+                grid.get_wire_bounds(bot_layer, 0.5, width=tr_w, unit_mode=True),
+                )
+
+    def get_density_info(self, method_name, grid, *args, **kwargs):
+        # type: (str, RoutingGrid, *Any, **Any) -> Optional[Dict[str, Any]]
+        """Calls the given density probe method, caching the result.
+
+        find_core_size() and find_edge_size() call get_core_info(), get_lr_edge_info() and
+        get_tb_edge_info() many times with the same arguments, and every ResArrayBase with
+        the same resistor parameters repeats the same search.  This method shares probe results
+        between all technology objects with the same configuration in this process.
+
+        Parameters
+        ----------
+        method_name : str
+            the density probe method name.
+        grid : RoutingGrid
+            the RoutingGrid object.
+        *args : Any
+            positional arguments of the density probe method, after the routing grid.
+        **kwargs : Any
+            resistor parameters.
+
+        Returns
+        -------
+        layout_info : Optional[Dict[str, Any]]
+            the layout information dictionary, or None if density rules are not met.  The
+            returned dictionary is shared, and must not be modified.
+        """
+        fun = getattr(self, method_name)
+        key = (self.get_config_key(), self.get_grid_key(grid, kwargs['track_widths']),
+               method_name, freeze_key(args), freeze_key(kwargs))
+        try:
+            hash(key)
+        except TypeError:
+            # arguments contain unhashable objects, do not cache.
+            return fun(grid, *args, **kwargs)
+        return _density_info_cache.get(key, lambda: fun(grid, *args, **kwargs))
+
+    @classmethod
+    def get_density_cache_stats(cls):
+        # type: () -> Dict[str, Dict[str, Any]]
+        """Returns hit/miss statistics of the shared density probe and fill interval tables.
+
+        Returns
+        -------
+        stats : Dict[str, Dict[str, Any]]
+            a dictionary with entries 'density_info' and 'fill_info'.  See
+            LRUCache.get_stats() for the statistics of each table.
+        """
+        return dict(
+            density_info=_density_info_cache.get_stats(),
+            fill_info=_fill_info_cache.get_stats(),
+        )
+
+    @classmethod
+    def clear_density_cache(cls):
+        # type: () -> None
+        """Clears the shared density probe and fill interval tables."""
+        _density_info_cache.clear()
+        _fill_info_cache.clear()
+
     def get_core_track_info(self,  # type: ResTech
                             grid,  # type: RoutingGrid
                             min_tracks,  # type: Tuple[int, ...]
@@ -446,7 +583,7 @@ class ResTech(object, metaclass=abc.ABCMeta):
                     wcur, hcur = ncur * wblk, hres
                 else:
                     wcur, hcur = wres, ncur * hblk
-                tmp = self.get_core_info(grid, wcur, hcur, **params)
+                tmp = self.get_density_info('get_core_info', grid, wcur, hcur, **params)
                 if tmp is None:
                     bin_iter.up()
                 else:
@@ -469,25 +606,31 @@ class ResTech(object, metaclass=abc.ABCMeta):
             # in this way, for same area, use height as tie breaker
             nxopt, nyopt = nxblk, nyblk
             for nycur in range(nyblk, nyblk + max_blk_ext + 1):
-                # check if we should terminate linear search
-                if nycur * nxblk >= opt_area:
+                # widths with area at least the current optimum can't beat it, so only search
+                # widths below the area bound.  Terminate linear search if no such width exists.
+                nxmax = min(nxblk + max_blk_ext, -(-opt_area // nycur) - 1)
+                if nxmax < nxblk:
                     break
-                bin_iter = BinaryIterator(nxblk, nxblk + max_blk_ext + 1)
+                # check the widest candidate first.  If it fails, no narrower core in this
+                # row meets density rules, so we skip the binary search.
                 hcur = nycur * hblk
+                tmp = self.get_density_info('get_core_info', grid, nxmax * wblk, hcur, **params)
+                if tmp is None:
+                    continue
+                ans, nxopt, nyopt = tmp, nxmax, nycur
+                opt_area = nxmax * nycur
+                bin_iter = BinaryIterator(nxblk, nxmax)
                 while bin_iter.has_next():
                     nxcur = bin_iter.get_next()
-                    if nxcur * nycur >= opt_area:
-                        # this point can't beat current optimum
-                        bin_iter.down()
+                    tmp = self.get_density_info('get_core_info', grid, nxcur * wblk, hcur,
+                                                **params)
+                    if tmp is None:
+                        bin_iter.up()
                     else:
-                        tmp = self.get_core_info(grid, nxcur * wblk, hcur, **params)
-                        if tmp is None:
-                            bin_iter.up()
-                        else:
-                            # found new optimum
-                            ans, nxopt, nyopt = tmp, nxcur, nycur
-                            opt_area = nxcur * nycur
-                            bin_iter.down()
+                        # found new optimum
+                        ans, nxopt, nyopt = tmp, nxcur, nycur
+                        opt_area = nxcur * nycur
+                        bin_iter.down()
 
             if ans is None:
                 raise ValueError('failed to find DRC clean core with maximum %d '
@@ -536,9 +679,11 @@ class ResTech(object, metaclass=abc.ABCMeta):
             n1 = bin_iter.get_next()
 
             if is_lr_edge:
-                tmp = self.get_lr_edge_info(grid, core_info, n1 * blk1, **params)
+                tmp = self.get_density_info('get_lr_edge_info', grid, core_info, n1 * blk1,
+                                            **params)
             else:
-                tmp = self.get_tb_edge_info(grid, core_info, n1 * blk1, **params)
+                tmp = self.get_density_info('get_tb_edge_info', grid, core_info, n1 * blk1,
+                                            **params)
 
             if tmp is None:
                 bin_iter.up()
@@ -5,10 +5,9 @@
 This module also define some simple subclasses of ResArrayBase.
 """
 
-from typing import TYPE_CHECKING, Dict, Set, Tuple, Union, Any
+from typing import TYPE_CHECKING, Dict, Set, Tuple, Union, Any, List
 
 import abc
-from itertools import chain
 
 from bag.math import lcm
 from bag.layout.util import BBox
@@ -369,6 +368,202 @@ class ResArrayBase(TemplateBase, metaclass=abc.ABCMeta):
         return self.grid.coord_to_nearest_track(layer_id, coord, half_track=True,
                                                 mode=mode, unit_mode=True)
 
+    def get_cell_track_pitch(self, layer_id):
+        # type: (int) -> Union[float, int]
+        """Returns the number of tracks between adjacent resistor blocks on the given layer.
+
+        Parameters
+        ----------
+        layer_id : int
+            the layer ID.
+
+        Returns
+        -------
+        num_tracks : Union[float, int]
+            the track index difference between adjacent rows (for horizontal layers) or
+            adjacent columns (for vertical layers).
+        """
+        dim = self._core_pitch[1 if self.grid.get_direction(layer_id) == 'x' else 0]
+        pitch = self.grid.get_track_pitch(layer_id, unit_mode=True)
+        if dim % pitch == 0:
+            return dim // pitch
+        return dim / pitch
+
+    def _get_cell_groups(self, layer_id, tr_idx, start, stop, step):
+        # type: (int, Union[float, int], int, int, int) -> List[Tuple[str, int, int, int]]
+        """Groups resistor blocks by the layer name of the given track in each block.
+
+        Tracks on colored layers may have different layer names in different blocks, so
+        blocks are split into groups with the same layer name, where each group is an
+        arithmetic sequence of row/column indices.
+
+        Parameters
+        ----------
+        layer_id : int
+            the layer ID.
+        tr_idx : Union[float, int]
+            the track index in resistor block (0, 0).
+        start : int
+            the first row/column index.
+        stop : int
+            the stop row/column index.
+        step : int
+            the row/column index step.
+
+        Returns
+        -------
+        group_list : List[Tuple[str, int, int, int]]
+            list of (layer name, first index, number of blocks, index step) tuples.
+        """
+        tr_pitch = self.get_cell_track_pitch(layer_id)
+        idx_table = {}  # type: Dict[str, List[int]]
+        name_list = []
+        for idx in range(start, stop, step):
+            name = self.grid.get_layer_name(layer_id, tr_idx + idx * tr_pitch)
+            if name not in idx_table:
+                idx_table[name] = []
+                name_list.append(name)
+            idx_table[name].append(idx)
+
+        ans = []
+        for name in name_list:
+            idx_list = idx_table[name]
+            num_idx = len(idx_list)
+            run_start = 0
+            while run_start < num_idx:
+                run_stop = run_start + 1
+                run_step = step
+                if run_stop < num_idx:
+                    run_step = idx_list[run_stop] - idx_list[run_start]
+                    while run_stop < num_idx and \
+                            idx_list[run_stop] - idx_list[run_stop - 1] == run_step:
+                        run_stop += 1
+                ans.append((name, idx_list[run_start], run_stop - run_start, run_step))
+                run_start = run_stop
+        return ans
+
+    def add_cell_wires(self, layer_id, tr_idx, lower, upper, row_range, col_range,
+                       num=1, pitch=0, **kwargs):
+        # type: (int, Union[float, int], int, int, Tuple[int, int], Tuple[int, int], int, Union[float, int], **Any) -> List[WireArray]
+        """Draws the same wires in every resistor block in the given range.
+
+        Wires are described by their location in resistor block (0, 0), and are translated
+        by the resistor block pitch.  Wires in blocks that share the same wire interval are
+        drawn as a single WireArray, so the number of add_wires() calls grows with the
+        number of rows or columns instead of the number of resistor blocks.
+
+        Parameters
+        ----------
+        layer_id : int
+            the wire layer ID.
+        tr_idx : Union[float, int]
+            the track index in resistor block (0, 0).
+        lower : int
+            the wire lower coordinate in resistor block (0, 0), in resolution units.
+        upper : int
+            the wire upper coordinate in resistor block (0, 0), in resolution units.
+        row_range : Tuple[int, int]
+            the [start, stop) row indices.
+        col_range : Tuple[int, int]
+            the [start, stop) column indices.
+        num : int
+            number of wires in each resistor block.
+        pitch : Union[float, int]
+            the track pitch of wires in each resistor block.
+        **kwargs : Any
+            additional arguments for add_wires().
+
+        Returns
+        -------
+        warr_list : List[WireArray]
+            list of drawn wires.
+        """
+        row_start, row_stop = row_range
+        col_start, col_stop = col_range
+        if row_stop <= row_start or col_stop <= col_start:
+            return []
+
+        tr_pitch = self.get_cell_track_pitch(layer_id)
+        if self.grid.get_direction(layer_id) == 'x':
+            blk_pitch = self._core_pitch[0]
+            arr_start, num_arr = row_start, row_stop - row_start
+            seg_start, seg_stop = col_start, col_stop
+        else:
+            blk_pitch = self._core_pitch[1]
+            arr_start, num_arr = col_start, col_stop - col_start
+            seg_start, seg_stop = row_start, row_stop
+
+        tr_base = tr_idx + arr_start * tr_pitch
+        warr_list = []
+        for seg_idx in range(seg_start, seg_stop):
+            delta = seg_idx * blk_pitch
+            for idx in range(num):
+                warr = self.add_wires(layer_id, tr_base + idx * pitch, lower + delta,
+                                      upper + delta, num=num_arr, pitch=tr_pitch,
+                                      unit_mode=True, **kwargs)
+                warr_list.append(warr)
+        return warr_list
+
+    def add_cell_vias(self, bot_layer_id, bot_tr, top_tr, row_range, col_range,
+                      row_step=1, col_step=1):
+        # type: (int, Union[float, int], Union[float, int], Tuple[int, int], Tuple[int, int], int, int) -> None
+        """Adds the same via in every resistor block in the given range.
+
+        This method is equivalent to calling add_via_on_grid() in every resistor block, but
+        draws arrayed vias instead.
+
+        Parameters
+        ----------
+        bot_layer_id : int
+            the via bottom layer ID.
+        bot_tr : Union[float, int]
+            the bottom track index in resistor block (0, 0).
+        top_tr : Union[float, int]
+            the top track index in resistor block (0, 0).
+        row_range : Tuple[int, int]
+            the [start, stop) row indices.
+        col_range : Tuple[int, int]
+            the [start, stop) column indices.
+        row_step : int
+            the row index step.
+        col_step : int
+            the column index step.
+        """
+        row_start, row_stop = row_range
+        col_start, col_stop = col_range
+        if row_stop <= row_start or col_stop <= col_start:
+            return
+
+        grid = self.grid
+        res = grid.resolution
+        top_layer_id = bot_layer_id + 1
+        bot_dir = grid.get_direction(bot_layer_id)
+        bl, bu = grid.get_wire_bounds(bot_layer_id, bot_tr, unit_mode=True)
+        tl, tu = grid.get_wire_bounds(top_layer_id, top_tr, unit_mode=True)
+        if bot_dir == 'x':
+            bbox = BBox(tl, bl, tu, bu, res, unit_mode=True)
+            row_groups = self._get_cell_groups(bot_layer_id, bot_tr, row_start, row_stop,
+                                               row_step)
+            col_groups = self._get_cell_groups(top_layer_id, top_tr, col_start, col_stop,
+                                               col_step)
+        else:
+            bbox = BBox(bl, tl, bu, tu, res, unit_mode=True)
+            row_groups = self._get_cell_groups(top_layer_id, top_tr, row_start, row_stop,
+                                               row_step)
+            col_groups = self._get_cell_groups(bot_layer_id, bot_tr, col_start, col_stop,
+                                               col_step)
+
+        blk_w, blk_h = self._core_pitch
+        for row_name, row0, nrow, rstep in row_groups:
+            for col_name, col0, ncol, cstep in col_groups:
+                if bot_dir == 'x':
+                    bot_name, top_name = row_name, col_name
+                else:
+                    bot_name, top_name = col_name, row_name
+                cur_box = bbox.move_by(dx=col0 * blk_w, dy=row0 * blk_h, unit_mode=True)
+                self.add_via(cur_box, bot_name, top_name, bot_dir, nx=ncol, ny=nrow,
+                             spx=cstep * blk_w, spy=rstep * blk_h, unit_mode=True)
+
     def draw_array(self, l, w, sub_type, threshold, nx=1, ny=1, **kwargs):
         # type: (float, float, str, str, int, int, **kwargs) -> None
         """Draws the resistor array.
@@ -428,9 +623,17 @@ class ResArrayBase(TemplateBase, metaclass=abc.ABCMeta):
                Minimum ResArrayBase width, in resolution units.
             min_height : int
                 Minimum ResArraybase height, in resolution units.
+            core_inst_mode : str
+                how resistor cores are instantiated.  'array' places all cores as a single
+                arrayed instance named XCORE.  'row' places one arrayed instance per row, named
+                XCORE<row>.  'cell' places one instance per resistor, named XCORE<index>, where
+                index = col + nx * row.  Defaults to 'array'.
         """
         min_width = kwargs.pop('min_width', 0)
         min_height = kwargs.pop('min_height', 0)
+        core_inst_mode = kwargs.pop('core_inst_mode', 'array')
+        if core_inst_mode not in ('array', 'row', 'cell'):
+            raise ValueError('Unknown core instance mode: %s' % core_inst_mode)
 
         # create ResArrayBaseInfo object, and update RoutingGrid
         res = self.grid.resolution
@@ -463,15 +666,26 @@ class ResArrayBase(TemplateBase, metaclass=abc.ABCMeta):
         corner_params = core_master.get_boundary_params('corner')
         corner_master = self.new_template(params=corner_params, temp_cls=AnalogResBoundary)
 
-        # place core
-        for row in range(ny):
-            for col in range(nx):
-                cur_name = 'XCORE%d' % (col + nx * row)
-                cur_loc = (dx + w_edge + col * w_core, dy + h_edge + row * h_core)
-                self.add_instance(core_master, inst_name=cur_name, loc=cur_loc, unit_mode=True)
-                if row == 0 and col == 0:
-                    self._bot_port = core_master.get_port('bot')
-                    self._top_port = core_master.get_port('top')
+        # place core.  resistor ports are computed from the core offset and pitch, so the
+        # instance grouping does not affect get_res_ports() or get_res_bbox().
+        self._bot_port = core_master.get_port('bot')
+        self._top_port = core_master.get_port('top')
+        core_x0, core_y0 = dx + w_edge, dy + h_edge
+        if core_inst_mode == 'array':
+            self.add_instance(core_master, inst_name='XCORE', loc=(core_x0, core_y0), nx=nx,
+                              ny=ny, spx=w_core, spy=h_core, unit_mode=True)
+        elif core_inst_mode == 'row':
+            for row in range(ny):
+                cur_loc = (core_x0, core_y0 + row * h_core)
+                self.add_instance(core_master, inst_name='XCORE%d' % row, loc=cur_loc, nx=nx,
+                                  spx=w_core, unit_mode=True)
+        else:
+            for row in range(ny):
+                for col in range(nx):
+                    cur_name = 'XCORE%d' % (col + nx * row)
+                    cur_loc = (core_x0 + col * w_core, core_y0 + row * h_core)
+                    self.add_instance(core_master, inst_name=cur_name, loc=cur_loc,
+                                      unit_mode=True)
 
         # place boundaries
         # bottom-left corner
@@ -915,36 +1129,34 @@ class ResLadderCore(ResArrayBase):
     def _connect_ladder(self, nx, ny, ndum, hcon_idx_list, vcon_idx_list, xm_bot_idx, num_xm_sup):
         tp_idx = self.top_port_idx
         bp_idx = self.bot_port_idx
-        # connect main ladder
-        for row_idx in range(ndum, ny + ndum):
-            rmod = row_idx - ndum
-            for col_idx in range(ndum, nx + ndum):
-                if (col_idx == ndum and rmod % 2 == 1) or \
-                        (col_idx == nx - 1 + ndum and rmod % 2 == 0):
-                    mode = 1 if row_idx == ny + ndum - 1 else 0
-                    self._connect_tb(row_idx, col_idx, ndum, tp_idx, hcon_idx_list,
-                                     vcon_idx_list, xm_bot_idx, mode=mode)
-                if col_idx != nx - 1 + ndum:
-                    self._connect_lr(row_idx, col_idx, nx, ndum, tp_idx, bp_idx, hcon_idx_list,
-                                     vcon_idx_list, xm_bot_idx)
+        # connect main ladder.  Odd rows connect to the next row on the left, even rows
+        # connect to the next row on the right, and the last row connects to VDD.
+        self._connect_tb((ndum + 1, ny + ndum - 1), ndum, ndum, tp_idx, hcon_idx_list,
+                         vcon_idx_list, xm_bot_idx, mode=0, row_step=2)
+        self._connect_tb((ny + ndum - 1, ny + ndum), ndum, ndum, tp_idx, hcon_idx_list,
+                         vcon_idx_list, xm_bot_idx, mode=1)
+        self._connect_tb((ndum, ny + ndum), nx - 1 + ndum, ndum, tp_idx, hcon_idx_list,
+                         vcon_idx_list, xm_bot_idx, mode=0, row_step=2)
+        self._connect_lr(nx, ny, ndum, tp_idx, bp_idx, hcon_idx_list, vcon_idx_list, xm_bot_idx)
 
         # connect to ground
-        self._connect_tb(ndum - 1, ndum, ndum, tp_idx, hcon_idx_list,
+        self._connect_tb((ndum - 1, ndum), ndum, ndum, tp_idx, hcon_idx_list,
                          vcon_idx_list, xm_bot_idx, mode=-1)
         # connect to supplies
         self._connect_ground(nx, ndum, hcon_idx_list, vcon_idx_list, xm_bot_idx, num_xm_sup)
         self._connect_power(ny, ndum, hcon_idx_list, vcon_idx_list, xm_bot_idx, num_xm_sup)
 
         # connect horizontal dummies
-        for row_idx in range(ny + 2 * ndum):
-            if row_idx < ndum or row_idx >= ny + ndum:
-                col_iter = range(nx + 2 * ndum)
-            else:
-                col_iter = chain(range(ndum), range(nx + ndum, nx + 2 * ndum))
-            for col_idx in col_iter:
-                conn_tb = col_idx < ndum or col_idx >= nx + ndum
-                self._connect_dummy(row_idx, col_idx, conn_tb, tp_idx, bp_idx, hcon_idx_list,
-                                    vcon_idx_list)
+        nx_tot = nx + 2 * ndum
+        ny_tot = ny + 2 * ndum
+        self._connect_dummy((0, ny_tot), (0, ndum), True, tp_idx, bp_idx, hcon_idx_list,
+                            vcon_idx_list)
+        self._connect_dummy((0, ny_tot), (nx + ndum, nx_tot), True, tp_idx, bp_idx,
+                            hcon_idx_list, vcon_idx_list)
+        self._connect_dummy((0, ndum), (ndum, nx + ndum), False, tp_idx, bp_idx,
+                            hcon_idx_list, vcon_idx_list)
+        self._connect_dummy((ny + ndum, ny_tot), (ndum, nx + ndum), False, tp_idx, bp_idx,
+                            hcon_idx_list, vcon_idx_list)
 
     def _connect_power(self, ny, ndum, hcon_idx_list, vcon_idx_list, xm_bot_idx, num_xm_sup):
         hm_off, vm_off, xm_off, _ = self.get_track_offsets(ny + ndum, ndum)
@@ -984,53 +1196,62 @@ class ResLadderCore(ResArrayBase):
             for xm_idx in xm_idx_list:
                 self.add_via_on_grid(vm_layer, vm_idx, xm_idx)
 
-    def _connect_dummy(self, row_idx, col_idx, conn_tb, tp_idx, bp_idx, hcon_idx_list,
+    def _connect_dummy(self, row_range, col_range, conn_tb, tp_idx, bp_idx, hcon_idx_list,
                        vcon_idx_list):
-        hm_off, vm_off, _, _ = self.get_track_offsets(row_idx, col_idx)
+        hm_off, vm_off, _, _ = self.get_track_offsets(0, 0)
         hm_layer = self.bot_layer_id
-        self.add_via_on_grid(hm_layer, hm_off + tp_idx, vm_off + vcon_idx_list[3])
-        self.add_via_on_grid(hm_layer, hm_off + tp_idx, vm_off + vcon_idx_list[-4])
-        self.add_via_on_grid(hm_layer, hm_off + hcon_idx_list[1], vm_off + vcon_idx_list[3])
-        self.add_via_on_grid(hm_layer, hm_off + hcon_idx_list[1], vm_off + vcon_idx_list[-4])
-        self.add_via_on_grid(hm_layer, hm_off + bp_idx, vm_off + vcon_idx_list[3])
-        self.add_via_on_grid(hm_layer, hm_off + bp_idx, vm_off + vcon_idx_list[-4])
+        hm_list = [tp_idx, hcon_idx_list[1], bp_idx]
+        vm_list = [vcon_idx_list[3], vcon_idx_list[-4]]
+        via_list = [(hm_idx, vm_idx) for hm_idx in hm_list for vm_idx in vm_list]
         if conn_tb:
-            self.add_via_on_grid(hm_layer, hm_off + tp_idx, vm_off + vcon_idx_list[1])
-            self.add_via_on_grid(hm_layer, hm_off + bp_idx, vm_off + vcon_idx_list[1])
+            via_list.append((tp_idx, vcon_idx_list[1]))
+            via_list.append((bp_idx, vcon_idx_list[1]))
+        for hm_idx, vm_idx in via_list:
+            self.add_cell_vias(hm_layer, hm_off + hm_idx, vm_off + vm_idx, row_range, col_range)
 
-    def _connect_lr(self, row_idx, col_idx, nx, ndum, tp_idx, bp_idx, hcon_idx_list,
-                    vcon_idx_list, xm_bot_idx):
-        hm_off, vm_off, xm_off, _ = self.get_track_offsets(row_idx, col_idx)
-        _, vm_next, _, _ = self.get_track_offsets(row_idx, col_idx + 1)
+    def _connect_lr(self, nx, ny, ndum, tp_idx, bp_idx, hcon_idx_list, vcon_idx_list,
+                    xm_bot_idx):
+        hm_off, vm_off, xm_off, _ = self.get_track_offsets(0, 0)
+        vm_next = self.get_track_offsets(0, 1)[1]
         hm_layer = self.bot_layer_id
-        col_real = col_idx - ndum
-        row_real = row_idx - ndum
-        if col_real % 2 == 0:
-            port = bp_idx
-            conn = hcon_idx_list[1]
-        else:
-            port = tp_idx
-            conn = hcon_idx_list[0]
-        self.add_via_on_grid(hm_layer, hm_off + port, vm_off + vcon_idx_list[-4])
-        self.add_via_on_grid(hm_layer, hm_off + conn, vm_off + vcon_idx_list[-4])
-        self.add_via_on_grid(hm_layer, hm_off + conn, vm_off + vcon_idx_list[-1])
-        self.add_via_on_grid(hm_layer, hm_off + conn, vm_next + vcon_idx_list[3])
-        self.add_via_on_grid(hm_layer, hm_off + port, vm_next + vcon_idx_list[3])
-
-        # connect to output port
         vm_layer = hm_layer + 1
-        if row_real % 2 == 0:
-            xm_idx = xm_bot_idx + col_real + 1
-        else:
-            xm_idx = xm_bot_idx + (nx - 1 - col_real)
-        self.add_via_on_grid(vm_layer, vm_off + vcon_idx_list[-1], xm_off + xm_idx)
+        row_range = (ndum, ny + ndum)
+        # the last column does not connect to the right
+        for col_parity in range(2):
+            if col_parity == 0:
+                port = bp_idx
+                conn = hcon_idx_list[1]
+            else:
+                port = tp_idx
+                conn = hcon_idx_list[0]
+            via_list = [(hm_off + port, vm_off + vcon_idx_list[-4]),
+                        (hm_off + conn, vm_off + vcon_idx_list[-4]),
+                        (hm_off + conn, vm_off + vcon_idx_list[-1]),
+                        (hm_off + conn, vm_next + vcon_idx_list[3]),
+                        (hm_off + port, vm_next + vcon_idx_list[3])]
+            col_range = (ndum + col_parity, nx + ndum - 1)
+            for hm_idx, vm_idx in via_list:
+                self.add_cell_vias(hm_layer, hm_idx, vm_idx, row_range, col_range, col_step=2)
+
+        # connect to output port.  Output index increases from left to right on even rows,
+        # and from right to left on odd rows.
+        for col_real in range(nx - 1):
+            col_range = (col_real + ndum, col_real + ndum + 1)
+            for row_parity in range(2):
+                if row_parity == 0:
+                    xm_idx = xm_bot_idx + col_real + 1
+                else:
+                    xm_idx = xm_bot_idx + (nx - 1 - col_real)
+                self.add_cell_vias(vm_layer, vm_off + vcon_idx_list[-1], xm_off + xm_idx,
+                                   (ndum + row_parity, ny + ndum), col_range, row_step=2)
 
-    def _connect_tb(self, row_idx, col_idx, ndum, tp_idx, hcon_idx_list,
-                    vcon_idx_list, xm_bot_idx, mode=0):
+    def _connect_tb(self, row_range, col_idx, ndum, tp_idx, hcon_idx_list,
+                    vcon_idx_list, xm_bot_idx, mode=0, row_step=1):
         # mode = 0 is normal connection, mode = 1 is vdd connection, mode = -1 is vss connection
-        hm_off, vm_off, _, _ = self.get_track_offsets(row_idx, col_idx)
-        hm_next, _, xm_next, _ = self.get_track_offsets(row_idx + 1, col_idx)
+        hm_off, vm_off, _, _ = self.get_track_offsets(0, 0)
+        hm_next, _, xm_next, _ = self.get_track_offsets(1, 0)
         hm_layer = self.bot_layer_id
+        col_range = (col_idx, col_idx + 1)
         if col_idx == ndum:
             conn1 = vcon_idx_list[1]
             tap = vcon_idx_list[2]
@@ -1039,18 +1260,24 @@ class ResLadderCore(ResArrayBase):
             conn1 = vcon_idx_list[-2]
             tap = vcon_idx_list[-3]
             conn2 = vcon_idx_list[-4]
+        via_list = []
         if mode >= 0:
-            self.add_via_on_grid(hm_layer, hm_off + tp_idx, vm_off + conn1)
-            self.add_via_on_grid(hm_layer, hm_next + hcon_idx_list[0], vm_off + conn1)
+            via_list.append((hm_off + tp_idx, vm_off + conn1))
+            via_list.append((hm_next + hcon_idx_list[0], vm_off + conn1))
         if mode == 0:
-            self.add_via_on_grid(hm_layer, hm_next + hcon_idx_list[0], vm_off + tap)
+            via_list.append((hm_next + hcon_idx_list[0], vm_off + tap))
+        if mode <= 0:
+            via_list.append((hm_next + hcon_idx_list[0], vm_off + conn2))
+            via_list.append((hm_next + tp_idx, vm_off + conn2))
+        for hm_idx, vm_idx in via_list:
+            self.add_cell_vias(hm_layer, hm_idx, vm_idx, row_range, col_range,
+                               row_step=row_step)
 
+        if mode == 0:
             # connect to output port
             vm_layer = hm_layer + 1
-            self.add_via_on_grid(vm_layer, vm_off + tap, xm_next + xm_bot_idx)
-        if mode <= 0:
-            self.add_via_on_grid(hm_layer, hm_next + hcon_idx_list[0], vm_off + conn2)
-            self.add_via_on_grid(hm_layer, hm_next + tp_idx, vm_off + conn2)
+            self.add_cell_vias(vm_layer, vm_off + tap, xm_next + xm_bot_idx, row_range,
+                               col_range, row_step=row_step)
 
     def _draw_metal_tracks(self, nx, ny, ndum, hcon_space):
         num_h_tracks, num_v_tracks, num_x_tracks = self.num_tracks[0:3]
@@ -1078,6 +1305,8 @@ class ResLadderCore(ResArrayBase):
 
         # get unit block size
         blk_w, blk_h = self.res_unit_size
+        nx_tot = nx + 2 * ndum
+        ny_tot = ny + 2 * ndum
 
         # find top X layer track index that can be connected to supply.
         hm_off, vm_off, xm_off, _ = self.get_track_offsets(0, 0)
@@ -1091,76 +1320,73 @@ class ResLadderCore(ResArrayBase):
 
         # get lower/upper bounds of output ports.
         xm_lower = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[0], unit_mode=True)[0]
-        vm_off = self.get_track_offsets(0, nx + 2 * ndum - 1)[1]
-        xm_upper = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[-1], unit_mode=True)[1]
-
-        # expand range by +/- 1 to draw metal pattern on dummies too
-        for row_idx in range(ny + 2 * ndum):
-            for col_idx in range(nx + 2 * ndum):
-                hm_off, vm_off, xm_off, _ = self.get_track_offsets(row_idx, col_idx)
-
-                # extend port tracks on hm layer
-                hm_lower, _ = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[1], unit_mode=True)
-                _, hm_upper = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[-2], unit_mode=True)
-                self.add_wires(hm_layer, hm_off + bp_idx, hm_lower - hm_ext, hm_upper + hm_ext,
-                               num=2, pitch=tp_idx - bp_idx, unit_mode=True)
-
-                # draw hm layer bridge
-                hm_lower, _ = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[0], unit_mode=True)
-                _, hm_upper = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[3], unit_mode=True)
-                pitch = tcon_idx - bcon_idx
-                self.add_wires(hm_layer, hm_off + bcon_idx, hm_lower - hm_ext, hm_upper + hm_ext,
-                               num=2, pitch=pitch, unit_mode=True)
-                hm_lower, _ = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[-4], unit_mode=True)
-                _, hm_upper = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[-1], unit_mode=True)
-                self.add_wires(hm_layer, hm_off + bcon_idx, hm_lower - hm_ext, hm_upper + hm_ext,
-                               num=2, pitch=pitch, unit_mode=True)
-
-                # draw vm layer bridges
-                vm_lower = min(grid.get_wire_bounds(hm_layer, hm_off + min(bp_idx, bcon_idx),
-                                                    unit_mode=True)[0] - vm_ext,
-                               grid.get_wire_bounds(xm_layer, xm_off + xm_bot_idx,
-                                                    unit_mode=True)[0] - vmx_ext)
-                vm_upper = max(grid.get_wire_bounds(hm_layer, hm_off + max(tp_idx, tcon_idx),
-                                                    unit_mode=True)[1] + vm_ext,
-                               grid.get_wire_bounds(xm_layer, xm_off + xm_bot_idx + nx - 1,
-                                                    unit_mode=True)[1] + vmx_ext)
-                self.add_wires(vm_layer, vm_off + vm_tidx[0], vm_lower, vm_upper,
-                               num=2, pitch=3, unit_mode=True)
-                self.add_wires(vm_layer, vm_off + vm_tidx[-4], vm_lower, vm_upper,
-                               num=2, pitch=3, unit_mode=True)
-
-                vm_y1 = max(grid.get_wire_bounds(hm_layer, hm_off + max(bp_idx, bcon_idx),
-                                                 unit_mode=True)[1] + vm_ext,
-                            grid.get_wire_bounds(xm_layer, xm_off + xm_bot_idx,
-                                                 unit_mode=True)[1] + vmx_ext)
-                vm_y2 = min(grid.get_wire_bounds(hm_layer, hm_off + min(tp_idx, tcon_idx),
-                                                 unit_mode=True)[0] - vm_ext,
-                            grid.get_wire_bounds(xm_layer, xm_off + xm_bot_idx + nx - 1,
-                                                 unit_mode=True)[0] - vmx_ext)
-                self.add_wires(vm_layer, vm_off + vm_tidx[1], vm_y2 - blk_h, vm_y1,
-                               num=2, pitch=1, unit_mode=True)
-                self.add_wires(vm_layer, vm_off + vm_tidx[1], vm_y2, vm_y1 + blk_h,
-                               num=2, pitch=1, unit_mode=True)
-                self.add_wires(vm_layer, vm_off + vm_tidx[-3], vm_y2 - blk_h, vm_y1,
-                               num=2, pitch=1, unit_mode=True)
-                self.add_wires(vm_layer, vm_off + vm_tidx[-3], vm_y2, vm_y1 + blk_h,
-                               num=2, pitch=1, unit_mode=True)
+        vm_last = self.get_track_offsets(0, nx_tot - 1)[1]
+        xm_upper = grid.get_wire_bounds(vm_layer, vm_last + vm_tidx[-1], unit_mode=True)[1]
+
+        # the metal pattern is the same in every resistor block, including dummies, so compute
+        # the pattern in block (0, 0) and draw it as arrays.
+        row_range = (0, ny_tot)
+        col_range = (0, nx_tot)
+
+        # extend port tracks on hm layer
+        hm_lower, _ = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[1], unit_mode=True)
+        _, hm_upper = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[-2], unit_mode=True)
+        self.add_cell_wires(hm_layer, hm_off + bp_idx, hm_lower - hm_ext, hm_upper + hm_ext,
+                            row_range, col_range, num=2, pitch=tp_idx - bp_idx)
+
+        # draw hm layer bridge
+        pitch = tcon_idx - bcon_idx
+        hm_lower, _ = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[0], unit_mode=True)
+        _, hm_upper = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[3], unit_mode=True)
+        self.add_cell_wires(hm_layer, hm_off + bcon_idx, hm_lower - hm_ext, hm_upper + hm_ext,
+                            row_range, col_range, num=2, pitch=pitch)
+        hm_lower, _ = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[-4], unit_mode=True)
+        _, hm_upper = grid.get_wire_bounds(vm_layer, vm_off + vm_tidx[-1], unit_mode=True)
+        self.add_cell_wires(hm_layer, hm_off + bcon_idx, hm_lower - hm_ext, hm_upper + hm_ext,
+                            row_range, col_range, num=2, pitch=pitch)
+
+        # draw vm layer bridges
+        vm_lower = min(grid.get_wire_bounds(hm_layer, hm_off + min(bp_idx, bcon_idx),
+                                            unit_mode=True)[0] - vm_ext,
+                       grid.get_wire_bounds(xm_layer, xm_off + xm_bot_idx,
+                                            unit_mode=True)[0] - vmx_ext)
+        vm_upper = max(grid.get_wire_bounds(hm_layer, hm_off + max(tp_idx, tcon_idx),
+                                            unit_mode=True)[1] + vm_ext,
+                       grid.get_wire_bounds(xm_layer, xm_off + xm_bot_idx + nx - 1,
+                                            unit_mode=True)[1] + vmx_ext)
+        # the right-most bridge of a block is the left-most bridge of the next block.
+        self.add_cell_wires(vm_layer, vm_off + vm_tidx[0], vm_lower, vm_upper,
+                            row_range, (0, nx_tot + 1))
+        self.add_cell_wires(vm_layer, vm_off + vm_tidx[3], vm_lower, vm_upper,
+                            row_range, col_range)
+        self.add_cell_wires(vm_layer, vm_off + vm_tidx[-4], vm_lower, vm_upper,
+                            row_range, col_range)
+
+        # draw vm layer wires between adjacent rows.  Each block has a wire going down to the
+        # block below and a wire going up to the block above, so the wire going down from row
+        # N is the same as the wire going up from row N - 1.
+        vm_y2 = min(grid.get_wire_bounds(hm_layer, hm_off + min(tp_idx, tcon_idx),
+                                         unit_mode=True)[0] - vm_ext,
+                    grid.get_wire_bounds(xm_layer, xm_off + xm_bot_idx + nx - 1,
+                                         unit_mode=True)[0] - vmx_ext)
+        self.add_cell_wires(vm_layer, vm_off + vm_tidx[1], vm_y2, vm_y1 + blk_h,
+                            (-1, ny_tot), col_range, num=2, pitch=1)
+        self.add_cell_wires(vm_layer, vm_off + vm_tidx[-3], vm_y2, vm_y1 + blk_h,
+                            (-1, ny_tot), col_range, num=2, pitch=1)
 
         # draw and export output ports
-        for row in range(ny + 2 * ndum):
-            tr_off = self.get_track_offsets(row, 0)[2]
-            for tidx in range(nx):
-                warr = self.add_wires(xm_layer, tr_off + xm_bot_idx + tidx, lower=xm_lower,
-                                      upper=xm_upper,
-                                      fill_type='VSS', unit_mode=True)
+        xm_pitch = self.get_cell_track_pitch(xm_layer)
+        for row in range(ny_tot):
+            warr = self.add_wires(xm_layer, xm_off + row * xm_pitch + xm_bot_idx, xm_lower,
+                                  xm_upper, num=nx, pitch=1, fill_type='VSS', unit_mode=True)
+            for tidx, pin_warr in enumerate(warr.to_warr_list()):
                 if row < ndum or (row == ndum and tidx == 0):
                     net_name = 'VSS'
                 elif row >= ny + ndum:
                     net_name = 'VDD'
                 else:
                     net_name = 'out<%d>' % (tidx + (row - ndum) * nx)
-                self.add_pin(net_name, warr, show=False)
+                self.add_pin(net_name, pin_warr, show=False)
 
         return [bcon_idx, tcon_idx], vm_tidx, xm_bot_idx, num_xm_sup
 
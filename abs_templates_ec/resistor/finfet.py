@@ -10,11 +10,11 @@ import math
 
 from bag.layout.util import BBox
 from bag.layout.routing import TrackID, WireArray
-from bag.layout.routing.fill import fill_symmetric_max_density, \
-    fill_symmetric_min_density_info, fill_symmetric_interval
+from bag.layout.routing.fill import fill_symmetric_interval
 from bag.layout.template import TemplateBase
 
-from .base import ResTech
+from .base import ResTech, fill_symmetric_max_density_cached, \
+    fill_symmetric_min_density_info_cached
 
 if TYPE_CHECKING:
     from bag.layout.tech import TechInfoConfig
@@ -179,8 +179,9 @@ class ResTechFinfetBase(ResTech, metaclass=abc.ABCMeta):
         od_sp = -(-(od_sp + fin_h) // fin_p)
         # compute OD Y coordinates for left/right edge.
         h_core_nfin = height // fin_p
-        core_lr_od_loc = fill_symmetric_max_density(h_core_nfin, h_core_nfin, nfin_min, nfin_max,
-                                                    od_sp, fill_on_edge=False, cyclic=True)[0]
+        core_lr_od_loc = fill_symmetric_max_density_cached(h_core_nfin, h_core_nfin, nfin_min,
+                                                           nfin_max, od_sp, fill_on_edge=False,
+                                                           cyclic=True)[0]
         # compute OD Y coordinates for top/bottom edge.
         # compute fin offset for top edge dummies
         bnd_spy = (height - lres) // 2
@@ -188,8 +189,9 @@ class ResTechFinfetBase(ResTech, metaclass=abc.ABCMeta):
         # find the fin pitch index of the lower bound of the empty space.
         pitch_index = -(-(top_dummy_bnd - fin_p2 + fin_h2) // fin_p)
         tot_space = 2 * (h_core_nfin - pitch_index)
-        core_tb_od_loc = fill_symmetric_max_density(tot_space, tot_space, nfin_min, nfin_max, od_sp,
-                                                    fill_on_edge=True, cyclic=False)[0]
+        core_tb_od_loc = fill_symmetric_max_density_cached(tot_space, tot_space, nfin_min,
+                                                           nfin_max, od_sp, fill_on_edge=True,
+                                                           cyclic=False)[0]
 
         # compute dummy number of fingers for left/right edge
         bnd_spx = (width - wres) // 2
@@ -290,15 +292,17 @@ class ResTechFinfetBase(ResTech, metaclass=abc.ABCMeta):
                 # compute fill Y coordinates between ports inside the cell
                 area = top_yb - bot_yt
                 tarea = int(math.ceil(area * density_1d))
-                mid_info = fill_symmetric_min_density_info(area, tarea, h, h, sp_min, sp_max=sp_max,
-                                                           fill_on_edge=False)
+                mid_info = fill_symmetric_min_density_info_cached(area, tarea, h, h, sp_min,
+                                                                  sp_max=sp_max,
+                                                                  fill_on_edge=False)
                 core_mid_y = fill_symmetric_interval(*mid_info[0][2], offset=bot_yt,
                                                      invert=mid_info[1])[0]
                 # compute fill Y coordinates between ports outside the cell
                 area = bot_yb + height - top_yt
                 tarea = int(math.ceil(area * density_1d))
-                top_info = fill_symmetric_min_density_info(area, tarea, h, h, sp_min, sp_max=sp_max,
-                                                           fill_on_edge=False)
+                top_info = fill_symmetric_min_density_info_cached(area, tarea, h, h, sp_min,
+                                                                  sp_max=sp_max,
+                                                                  fill_on_edge=False)
                 core_top_y = fill_symmetric_interval(*top_info[0][2], offset=top_yt,
                                                      invert=top_info[1])[0]
 
@@ -316,8 +320,8 @@ class ResTechFinfetBase(ResTech, metaclass=abc.ABCMeta):
 
                 area = sp_xr - sp_xl
                 tarea = int(math.ceil(area * density_1d))
-                x_info = fill_symmetric_min_density_info(area, tarea, w, w, sp_min,
-                                                         sp_max=sp_max, fill_on_edge=False)
+                x_info = fill_symmetric_min_density_info_cached(area, tarea, w, w, sp_min,
+                                                                sp_max=sp_max, fill_on_edge=False)
                 core_x = fill_symmetric_interval(*x_info[0][2], offset=sp_xl, invert=x_info[1])[0]
 
                 core_x.append((xl, xr))
@@ -431,8 +435,8 @@ class ResTechFinfetBase(ResTech, metaclass=abc.ABCMeta):
 
             area = sp_xr - sp_xl
             tarea = int(math.ceil(area * density ** 0.5))
-            c_info = fill_symmetric_min_density_info(area, tarea, w, w, sp_min, sp_max=sp_max,
-                                                     fill_on_edge=False)
+            c_info = fill_symmetric_min_density_info_cached(area, tarea, w, w, sp_min,
+                                                            sp_max=sp_max, fill_on_edge=False)
             edge_x = fill_symmetric_interval(*c_info[0][2], offset=sp_xl, invert=c_info[1])[0]
             edge_x.insert(0, (sp_bnd, sp_xl))
             fill_edge_x_list.append(edge_x)
@@ -523,8 +527,9 @@ class ResTechFinfetBase(ResTech, metaclass=abc.ABCMeta):
         top_dummy_bnd = hedge - spy - lres_tb - po_res_spy - po_od_exty
         top_pitch_index = (top_dummy_bnd - fin_p2 - fin_h2) // fin_p
         tot_space = top_pitch_index - bot_pitch_index + 1
-        edge_bot_od_loc = fill_symmetric_max_density(tot_space, tot_space, nfin_min, nfin_max,
-                                                     od_sp, fill_on_edge=True, cyclic=False)[0]
+        edge_bot_od_loc = fill_symmetric_max_density_cached(tot_space, tot_space, nfin_min,
+                                                            nfin_max, od_sp, fill_on_edge=True,
+                                                            cyclic=False)[0]
         # compute fin 0 offset and convert fin location to Y coordinates
         fin_offset = bot_pitch_index * fin_p + fin_p2
         edge_bot_od_loc = self._compute_od_y_loc(edge_bot_od_loc, fin_p, fin_h, fin_offset)
@@ -541,8 +546,9 @@ class ResTechFinfetBase(ResTech, metaclass=abc.ABCMeta):
         top_pitch_index = (adj_top_od_yb - fin_p2 + fin_h2) // fin_p - od_sp
         # compute total space and fill
         tot_space = top_pitch_index - bot_pitch_index + 1
-        edge_lr_od_loc = fill_symmetric_max_density(tot_space, tot_space, nfin_min, nfin_max, od_sp,
-                                                    fill_on_edge=True, cyclic=False)[0]
+        edge_lr_od_loc = fill_symmetric_max_density_cached(tot_space, tot_space, nfin_min,
+                                                           nfin_max, od_sp, fill_on_edge=True,
+                                                           cyclic=False)[0]
         # compute fin 0 offset and convert fin location to Y coordinates
         fin_offset = bot_pitch_index * fin_p + fin_p2
         edge_lr_od_loc = self._compute_od_y_loc(edge_lr_od_loc, fin_p, fin_h, fin_offset)
@@ -569,8 +575,8 @@ class ResTechFinfetBase(ResTech, metaclass=abc.ABCMeta):
 
             area = sp_yt - sp_yb
             tarea = int(math.ceil(area * density ** 0.5))
-            c_info = fill_symmetric_min_density_info(area, tarea, h, h, sp_min, sp_max=sp_max,
-                                                     fill_on_edge=False)
+            c_info = fill_symmetric_min_density_info_cached(area, tarea, h, h, sp_min,
+                                                            sp_max=sp_max, fill_on_edge=False)
             edge_y = fill_symmetric_interval(*c_info[0][2], offset=sp_yb, invert=c_info[1])[0]
             edge_y.insert(0, (sp_bnd, sp_yb))
             fill_edge_y_list.append(edge_y)
@@ -11,9 +11,11 @@ from bag.layout.util import BBox
 from bag.layout.template import TemplateBase
 
 from ..analog_core.base import AnalogBase, AnalogBaseInfo
+from .mosaic import get_fill_mosaics, rasterize_intervals
 
 if TYPE_CHECKING:
     from bag.layout.objects import Instance
+    from bag.layout.routing import RoutingGrid
     from bag.layout.template import TemplateDB
 
 
@@ -105,14 +107,36 @@ class PowerFill(TemplateBase):
                         bot_layer,  # type: int
                         top_layer,  # type: int
                         orient_mode=0,  # type: int
+                        mosaic_mode='greedy',  # type: str
                         ):
         # type: (...) -> List[List[Instance]]
-        # TODO: This method does not work when if fill size changes as layer changes.
-        # TODO: Fix in the future.
-
-        # number of wire types per fill block
-        ntype = 2
-
+        """Fill the given bounding box with power fill blocks wherever possible.
+
+        Parameters
+        ----------
+        template : TemplateBase
+            the template to add fill blocks to.
+        bound_box : BBox
+            the fill region.  Must be on the power fill grid.
+        fill_config : Dict[int, Tuple[int, int, int, int]]
+            the fill configuration dictionary.
+        bot_layer : int
+            the bottom fill layer.
+        top_layer : int
+            the top fill layer.
+        orient_mode : int
+            the fill block orientation mode.
+        mosaic_mode : str
+            the algorithm used to group usable fill blocks into arrayed instances.
+            'greedy' uses a cell-by-cell greedy scan, 'rle' uses vectorized run-length
+            merging, which is much faster and produces a similar or smaller number of
+            instances on large fill regions.
+
+        Returns
+        -------
+        inst_list2 : List[List[Instance]]
+            list of fill instances for each pair of adjacent fill layers.
+        """
         # error checking
         if top_layer <= bot_layer:
             raise ValueError('Must have top_layer > bot_layer.')
@@ -127,61 +151,28 @@ class PowerFill(TemplateBase):
         if xl % blk_w != 0 or xr % blk_w != 0 or yb % blk_h != 0 or yt % blk_h != 0:
             raise ValueError('%s is not on power fill grid.' % bound_box)
 
-        # figure out where we can draw fill blocks.
-        tot_w = xr - xl
-        tot_h = yt - yb
-        nx = tot_w // blk_w
-        ny = tot_h // blk_h
-        use_fill_list = []
-        shape = (nx, ny)
+        # collect blockages of each layer once
+        blk_intv_list = [cls._get_blockage_intervals(template, bound_box, fill_config, lay)
+                         for lay in range(bot_layer, top_layer + 1)]
+
+        # figure out where we can draw fill blocks.  The fill block of each pair of layers
+        # may be smaller than the fill block of the whole stack, so compute usable fill
+        # matrix on the block grid of each layer pair.
         inst_info_list2 = []
-        for layer in range(bot_layer, top_layer + 1):
-            fill_w, fill_sp, sp, sp_le = fill_config[layer]
-            cur_dir = grid.get_direction(layer)
-            cur_pitch = grid.get_track_pitch(layer, unit_mode=True)
-
-            fill_pitch = fill_w + fill_sp
-            is_horiz = cur_dir == 'x'
-            uf_mat = np.ones(shape, dtype=bool)
-            if is_horiz:
-                perp_dir = 'y'
-                blk_dim = blk_w
-                num_tr = tot_h // (cur_pitch * fill_pitch)
-                tr_c0 = yb
-                spx = sp_le
-                spy = sp
-                uf_mat_set = uf_mat.transpose()
-            else:
-                perp_dir = 'x'
-                blk_dim = blk_h
-                num_tr = tot_w // (cur_pitch * fill_pitch)
-                tr_c0 = xl
-                spx = sp
-                spy = sp_le
-                uf_mat_set = uf_mat
-
-            cur_tr = grid.coord_to_track(layer, tr_c0, unit_mode=True) + fill_pitch / 2
-            for idx in range(num_tr):
-                blk_idx = idx // ntype
-                wl, wu = grid.get_wire_bounds(layer, cur_tr, width=fill_w, unit_mode=True)
-                test_box = bound_box.with_interval(perp_dir, wl, wu, unit_mode=True)
-                for block_box in template.blockage_iter(layer, test_box, spx=spx, spy=spy):
-                    bl, bu = block_box.get_interval(cur_dir, unit_mode=True)
-                    nstart = max(bl - tr_c0, 0) // blk_dim
-                    nstop = max(bu - tr_c0, 0) // blk_dim
-                    uf_mat_set[blk_idx, nstart:nstop + 1] = False
-
-                cur_tr += fill_pitch
-
-            if layer > bot_layer:
-                prev_uf_mat = use_fill_list[-1]
-                uf_tot = prev_uf_mat & uf_mat
-                inst_info_list = []
-                for x0, y0, nx, ny in cls._get_fill_mosaics(uf_tot):
-                    inst_info_list.append((x0, y0, nx, ny))
-                inst_info_list2.append(inst_info_list)
-
-            use_fill_list.append(uf_mat)
+        for idx in range(top_layer - bot_layer):
+            cur_bot = bot_layer + idx
+            cur_blk_w, cur_blk_h = grid.get_fill_size(cur_bot + 1, fill_config, unit_mode=True)
+            uf_tot = None
+            for lay in (cur_bot, cur_bot + 1):
+                uf_mat = cls._get_usable_fill_matrix(grid, bound_box, fill_config, lay,
+                                                     cur_blk_w, cur_blk_h,
+                                                     blk_intv_list[lay - bot_layer])
+                uf_tot = uf_mat if uf_tot is None else uf_tot & uf_mat
+
+            inst_info_list = []
+            for x0, y0, nx, ny in cls._get_fill_mosaics(uf_tot, mode=mosaic_mode):
+                inst_info_list.append((x0, y0, nx, ny))
+            inst_info_list2.append((cur_blk_w, cur_blk_h, inst_info_list))
 
         inst_params = dict(
             fill_config=fill_config,
@@ -191,46 +182,108 @@ class PowerFill(TemplateBase):
         yinc = 0 if (orient_mode & 2 == 0) else 1
         inst_list2 = []
         orient = cls.get_fill_orient(orient_mode)
-        for idx, inst_info_list in enumerate(inst_info_list2):
+        for idx, (cur_blk_w, cur_blk_h, inst_info_list) in enumerate(inst_info_list2):
             inst_list = []
             inst_params['bot_layer'] = bot_layer + idx
             master = template.new_template(params=inst_params, temp_cls=PowerFill)
             for x0, y0, nx, ny in inst_info_list:
-                loc = xl + (x0 + xinc) * blk_w, yb + (y0 + yinc) * blk_h
+                loc = xl + (x0 + xinc) * cur_blk_w, yb + (y0 + yinc) * cur_blk_h
                 inst = template.add_instance(master, loc=loc, orient=orient, nx=nx, ny=ny,
-                                             spx=blk_w, spy=blk_h, unit_mode=True)
+                                             spx=cur_blk_w, spy=cur_blk_h, unit_mode=True)
                 inst_list.append(inst)
             inst_list2.append(inst_list)
         return inst_list2
 
     @classmethod
-    def _get_fill_mosaics(cls, uf_mat):
-        # TODO: use Eppestein's Polygon dissection instead of greedy algorithm
-        nx, ny = uf_mat.shape
-        idx_mat = np.full((nx, ny, 2), -1)
-        for xidx in range(nx):
-            for yidx in range(ny):
-                if uf_mat[xidx, yidx]:
-                    if xidx > 0 and idx_mat[xidx - 1, yidx, 1] == yidx:
-                        cur_xl = idx_mat[xidx, yidx, 0] = idx_mat[xidx - 1, yidx, 0]
-                        idx_mat[xidx - 1, yidx, :] = -1
-                    else:
-                        cur_xl = idx_mat[xidx, yidx, 0] = xidx
-                    if yidx > 0 and idx_mat[xidx, yidx - 1, 0] == cur_xl:
-                        cur_yb = idx_mat[xidx, yidx, 1] = idx_mat[xidx, yidx - 1, 1]
-                        idx_mat[xidx, yidx - 1, :] = -1
-                        if xidx > 0 and idx_mat[xidx - 1, yidx, 1] == cur_yb:
-                            idx_mat[xidx, yidx, 0] = idx_mat[xidx - 1, yidx, 0]
-                            idx_mat[xidx - 1, yidx, :] = -1
-                    else:
-                        idx_mat[xidx, yidx, 1] = yidx
-
-        x_list, y_list = np.nonzero(idx_mat[:, :, 0] >= 0)
-        for xidx, yidx in zip(x_list, y_list):
-            x0, y0 = idx_mat[xidx, yidx, :]
-            nx = xidx - x0 + 1
-            ny = yidx - y0 + 1
-            yield x0, y0, nx, ny
+    def _get_blockage_intervals(cls, template, bound_box, fill_config, layer):
+        # type: (TemplateBase, BBox, Dict[int, Tuple[int, int, int, int]], int) -> np.ndarray
+        """Returns all blockages on the given layer that may interfere with fill.
+
+        Returns
+        -------
+        intv_arr : np.ndarray
+            a N x 4 integer array.  Each row contains the lower/upper coordinates of a
+            blockage perpendicular to the track direction, followed by the lower/upper
+            coordinates along the track direction.
+        """
+        fill_w, fill_sp, sp, sp_le = fill_config[layer]
+        if template.grid.get_direction(layer) == 'x':
+            perp_dir, cur_dir = 'y', 'x'
+            spx, spy = sp_le, sp
+        else:
+            perp_dir, cur_dir = 'x', 'y'
+            spx, spy = sp, sp_le
+
+        intv_list = []
+        for block_box in template.blockage_iter(layer, bound_box, spx=spx, spy=spy):
+            intv_list.append(block_box.get_interval(perp_dir, unit_mode=True) +
+                             block_box.get_interval(cur_dir, unit_mode=True))
+        return np.array(intv_list, dtype=int).reshape(-1, 4)
+
+    @classmethod
+    def _get_usable_fill_matrix(cls,
+                                grid,  # type: RoutingGrid
+                                bound_box,  # type: BBox
+                                fill_config,  # type: Dict[int, Tuple[int, int, int, int]]
+                                layer,  # type: int
+                                blk_w,  # type: int
+                                blk_h,  # type: int
+                                blk_intv,  # type: np.ndarray
+                                ):
+        # type: (...) -> np.ndarray
+        """Rasterizes blockages of the given layer onto the given fill block grid.
+
+        Returns
+        -------
+        uf_mat : np.ndarray
+            a boolean matrix indexed by X/Y fill block index.  True if the fill block
+            is not blocked on the given layer.
+        """
+        fill_w, fill_sp, sp, sp_le = fill_config[layer]
+        cur_pitch = grid.get_track_pitch(layer, unit_mode=True)
+        fill_pitch = fill_w + fill_sp
+
+        xl = bound_box.left_unit
+        yb = bound_box.bottom_unit
+        nx = (bound_box.right_unit - xl) // blk_w
+        ny = (bound_box.top_unit - yb) // blk_h
+        is_horiz = grid.get_direction(layer) == 'x'
+        if is_horiz:
+            blk_perp, blk_dim = blk_h, blk_w
+            tr_c0, along_c0 = yb, xl
+            shape = (ny, nx)
+        else:
+            blk_perp, blk_dim = blk_w, blk_h
+            tr_c0, along_c0 = xl, yb
+            shape = (nx, ny)
+
+        # fill track number idx spans [wl0 + idx * tr_pitch, wu0 + idx * tr_pitch]
+        tr_pitch = cur_pitch * fill_pitch
+        num_tr = shape[0] * blk_perp // tr_pitch
+        tr_per_blk = blk_perp // tr_pitch
+        cur_tr = grid.coord_to_track(layer, tr_c0, unit_mode=True) + fill_pitch / 2
+        wl0, wu0 = grid.get_wire_bounds(layer, cur_tr, width=fill_w, unit_mode=True)
+
+        # find the range of tracks each blockage is too close to
+        perp_l, perp_u, bl, bu = blk_intv.T
+        tr_start = np.maximum((perp_l - wu0 - sp) // tr_pitch + 1, 0)
+        tr_stop = np.minimum(-(-(perp_u - wl0 + sp) // tr_pitch), num_tr)
+        valid = tr_stop > tr_start
+        # convert to fill block index ranges
+        perp_start = tr_start[valid] // tr_per_blk
+        perp_stop = (tr_stop[valid] - 1) // tr_per_blk + 1
+        along_start = np.maximum(bl[valid] - along_c0, 0) // blk_dim
+        along_stop = np.maximum(bu[valid] - along_c0, 0) // blk_dim + 1
+
+        blocked = rasterize_intervals(shape, perp_start, perp_stop, along_start, along_stop)
+        if is_horiz:
+            blocked = blocked.transpose()
+        return np.logical_not(blocked)
+
+    @classmethod
+    def _get_fill_mosaics(cls, uf_mat, mode='greedy'):
+        # type: (np.ndarray, str) -> List[Tuple[int, int, int, int]]
+        return get_fill_mosaics(uf_mat, mode=mode)
 
 
 class DecapFillCore(AnalogBase):
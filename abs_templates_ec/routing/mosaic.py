@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines functions that work with boolean fill block matrices.
+
+These are used to find the usable regions of a fill grid, and to place arrayed fill
+instances over them.  Each rectangle is represented as a tuple of (x0, y0, nx, ny),
+where x0/y0 are indices along the first/second axis of the matrix.
+"""
+
+from typing import Iterable, Tuple, List
+
+import numpy as np
+
+
+def rasterize_intervals(shape, row_start, row_stop, col_start, col_stop):
+    # type: (Tuple[int, int], np.ndarray, np.ndarray, np.ndarray, np.ndarray) -> np.ndarray
+    """Marks all cells covered by the given index rectangles in a boolean matrix.
+
+    The rectangles are accumulated into a 2D difference array with np.add.at, and the
+    coverage is recovered with prefix sums, so the cost is independent of rectangle size.
+    Rectangles are clipped to the matrix.
+
+    Parameters
+    ----------
+    shape : Tuple[int, int]
+        the matrix shape.
+    row_start : np.ndarray
+        rectangle start indices along the first axis.
+    row_stop : np.ndarray
+        rectangle stop indices (exclusive) along the first axis.
+    col_start : np.ndarray
+        rectangle start indices along the second axis.
+    col_stop : np.ndarray
+        rectangle stop indices (exclusive) along the second axis.
+
+    Returns
+    -------
+    covered : np.ndarray
+        boolean matrix.  True if the cell is covered by any rectangle.
+    """
+    nrow, ncol = shape
+    row_start = np.clip(row_start, 0, nrow)
+    row_stop = np.clip(row_stop, 0, nrow)
+    col_start = np.clip(col_start, 0, ncol)
+    col_stop = np.clip(col_stop, 0, ncol)
+    valid = (row_stop > row_start) & (col_stop > col_start)
+    row_start, row_stop = row_start[valid], row_stop[valid]
+    col_start, col_stop = col_start[valid], col_stop[valid]
+
+    diff = np.zeros((nrow + 1, ncol + 1), dtype=int)
+    np.add.at(diff, (row_start, col_start), 1)
+    np.add.at(diff, (row_start, col_stop), -1)
+    np.add.at(diff, (row_stop, col_start), -1)
+    np.add.at(diff, (row_stop, col_stop), 1)
+    return np.cumsum(np.cumsum(diff, axis=0), axis=1)[:nrow, :ncol] > 0
+
+
+def get_mosaics_greedy(uf_mat):
+    # type: (np.ndarray) -> Iterable[Tuple[int, int, int, int]]
+    """Dissects the given boolean matrix into rectangles with a greedy cell-by-cell scan.
+
+    Parameters
+    ----------
+    uf_mat : np.ndarray
+        the 2D boolean matrix.
+
+    Yields
+    ------
+    rect : Tuple[int, int, int, int]
+        the (x0, y0, nx, ny) rectangle tuple.
+    """
+    nx, ny = uf_mat.shape
+    idx_mat = np.full((nx, ny, 2), -1)
+    for xidx in range(nx):
+        for yidx in range(ny):
+            if uf_mat[xidx, yidx]:
+                if xidx > 0 and idx_mat[xidx - 1, yidx, 1] == yidx:
+                    cur_xl = idx_mat[xidx, yidx, 0] = idx_mat[xidx - 1, yidx, 0]
+                    idx_mat[xidx - 1, yidx, :] = -1
+                else:
+                    cur_xl = idx_mat[xidx, yidx, 0] = xidx
+                if yidx > 0 and idx_mat[xidx, yidx - 1, 0] == cur_xl:
+                    cur_yb = idx_mat[xidx, yidx, 1] = idx_mat[xidx, yidx - 1, 1]
+                    idx_mat[xidx, yidx - 1, :] = -1
+                    if xidx > 0 and idx_mat[xidx - 1, yidx, 1] == cur_yb:
+                        idx_mat[xidx, yidx, 0] = idx_mat[xidx - 1, yidx, 0]
+                        idx_mat[xidx - 1, yidx, :] = -1
+                else:
+                    idx_mat[xidx, yidx, 1] = yidx
+
+    x_list, y_list = np.nonzero(idx_mat[:, :, 0] >= 0)
+    for xidx, yidx in zip(x_list, y_list):
+        x0, y0 = idx_mat[xidx, yidx, :]
+        nx = xidx - x0 + 1
+        ny = yidx - y0 + 1
+        yield x0, y0, nx, ny
+
+
+def _get_run_mosaics(uf_mat):
+    # type: (np.ndarray) -> np.ndarray
+    """Dissects the matrix by merging identical runs along the second axis across lines.
+
+    Parameters
+    ----------
+    uf_mat : np.ndarray
+        the 2D boolean matrix.
+
+    Returns
+    -------
+    rect_arr : np.ndarray
+        a N x 4 integer array of (x0, y0, nx, ny) rectangles.
+    """
+    nx, ny = uf_mat.shape
+    if nx == 0 or ny == 0:
+        return np.empty((0, 4), dtype=int)
+
+    # find all runs of True along the second axis
+    pad = np.zeros((nx, 1), dtype=np.int8)
+    delta = np.diff(np.hstack((pad, uf_mat.astype(np.int8), pad)), axis=1)
+    run_x, run_y0 = np.nonzero(delta == 1)
+    _, run_y1 = np.nonzero(delta == -1)
+    if run_x.size == 0:
+        return np.empty((0, 4), dtype=int)
+
+    # sort runs by (y0, y1, x), then merge runs with identical span in adjacent columns
+    order = np.lexsort((run_x, run_y1, run_y0))
+    run_x = run_x[order]
+    run_y0 = run_y0[order]
+    run_y1 = run_y1[order]
+    is_new = np.ones(run_x.size, dtype=bool)
+    is_new[1:] = ((run_y0[1:] != run_y0[:-1]) | (run_y1[1:] != run_y1[:-1]) |
+                  (run_x[1:] != run_x[:-1] + 1))
+    starts = np.flatnonzero(is_new)
+    stops = np.append(starts[1:], run_x.size)
+
+    x0 = run_x[starts]
+    y0 = run_y0[starts]
+    return np.column_stack((x0, y0, run_x[stops - 1] - x0 + 1, run_y1[starts] - y0))
+
+
+def get_mosaics_rle(uf_mat):
+    # type: (np.ndarray) -> List[Tuple[int, int, int, int]]
+    """Dissects the given boolean matrix into rectangles using vectorized run-length merging.
+
+    Runs of usable blocks are computed along one axis and identical runs in adjacent lines
+    are merged into rectangles.  Both axes are tried, and the dissection with fewer
+    rectangles is returned.  The result is never worse than the better of the two row/column
+    strip decompositions, and is optimal for matrices made of aligned rectangular regions.
+
+    Parameters
+    ----------
+    uf_mat : np.ndarray
+        the 2D boolean matrix.
+
+    Returns
+    -------
+    rect_list : List[Tuple[int, int, int, int]]
+        list of (x0, y0, nx, ny) rectangle tuples.
+    """
+    uf_mat = np.asarray(uf_mat, dtype=bool)
+    rect_y = _get_run_mosaics(uf_mat)
+    rect_x = _get_run_mosaics(uf_mat.transpose())
+    if rect_x.shape[0] < rect_y.shape[0]:
+        rect_arr = rect_x[:, [1, 0, 3, 2]]
+    else:
+        rect_arr = rect_y
+    return [(int(x0), int(y0), int(nx), int(ny)) for x0, y0, nx, ny in rect_arr]
+
+
+def get_fill_mosaics(uf_mat, mode='greedy'):
+    # type: (np.ndarray, str) -> List[Tuple[int, int, int, int]]
+    """Dissects the given boolean matrix into rectangles.
+
+    Parameters
+    ----------
+    uf_mat : np.ndarray
+        the 2D boolean matrix.
+    mode : str
+        the dissection algorithm.  'greedy' for cell-by-cell greedy scan, 'rle' for
+        vectorized run-length merging.
+
+    Returns
+    -------
+    rect_list : List[Tuple[int, int, int, int]]
+        list of (x0, y0, nx, ny) rectangle tuples.
+    """
+    if mode == 'greedy':
+        return [(int(x0), int(y0), int(nx), int(ny))
+                for x0, y0, nx, ny in get_mosaics_greedy(uf_mat)]
+    elif mode == 'rle':
+        return get_mosaics_rle(uf_mat)
+    else:
+        raise ValueError('Unknown fill mosaic mode: %s' % mode)
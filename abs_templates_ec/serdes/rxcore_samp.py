@@ -6,6 +6,7 @@ from bag.layout.template import TemplateBase, TemplateDB
 from bag.layout.objects import Instance
 from bag.layout.routing import TrackID
 
+from ..parallel import new_templates, TemplateRequest
 from .base import SerdesRXBase, SerdesRXBaseInfo
 
 
@@ -1757,13 +1758,14 @@ class RXCore(TemplateBase):
         return self._sch_params
 
     def draw_layout(self):
-        half_params = self.params.copy()
-        half_params['datapath_parity'] = 0
-        half_params['show_pins'] = False
-        even_master = self.new_template(params=half_params, temp_cls=RXHalf)
-        half_params['datapath_parity'] = 1
-        half_params['show_pins'] = False
-        odd_master = self.new_template(params=half_params, temp_cls=RXHalf)
+        even_params = self.params.copy()
+        even_params['datapath_parity'] = 0
+        even_params['show_pins'] = False
+        odd_params = self.params.copy()
+        odd_params['datapath_parity'] = 1
+        odd_params['show_pins'] = False
+        even_master, odd_master = new_templates(self, [TemplateRequest(RXHalf, even_params),
+                                                       TemplateRequest(RXHalf, odd_params)])
         odd_inst = self.add_instance(odd_master, 'X1', orient='MX')
         odd_inst.move_by(dy=odd_master.bound_box.height)
         even_inst = self.add_instance(even_master, 'X0')
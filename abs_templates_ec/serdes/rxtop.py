@@ -7,6 +7,7 @@ from bag.layout.routing import TrackID
 from bag.layout.util import BBox
 
 from ..analog_core import AnalogBase
+from ..parallel import new_templates, TemplateRequest
 from .rxpassive import RXClkArray, BiasBusIO, CTLE, DLevCap
 from .rxcore import RXCore
 
@@ -202,26 +203,31 @@ class RXFrontendCore(TemplateBase):
         bus_margin = self.params['bus_margin']
         show_pins = self.params['show_pins']
 
-        # create template masters
-        rxclk_params['parity'] = 0
+        # create template masters.  Only CTLE depends on another master, so create the
+        # others together.
         rxclk_params['show_pins'] = False
-        clk_master0 = self.new_template(params=rxclk_params, temp_cls=RXClkArray)
-        rxclk_params['parity'] = 1
-        clk_master1 = self.new_template(params=rxclk_params, temp_cls=RXClkArray)
+        rxclk_params0 = rxclk_params.copy()
+        rxclk_params0['parity'] = 0
+        rxclk_params1 = rxclk_params.copy()
+        rxclk_params1['parity'] = 1
 
         core_params['show_pins'] = False
-        core_master = self.new_template(params=core_params, temp_cls=RXCore)
+
+        dlev_cap_params['show_pins'] = False
+        dlev_cap_params['io_width'] = core_params['hm_cur_width']
+        dlev_cap_params['io_space'] = core_params['diff_space']
+
+        master_list = new_templates(self, [TemplateRequest(RXClkArray, rxclk_params0),
+                                           TemplateRequest(RXClkArray, rxclk_params1),
+                                           TemplateRequest(RXCore, core_params),
+                                           TemplateRequest(DLevCap, dlev_cap_params)])
+        clk_master0, clk_master1, core_master, dcap_master = master_list
 
         in_xm_offset = core_master.in_offset
         ctle_params['cap_port_offset'] = in_xm_offset
         ctle_params['show_pins'] = False
         ctle_master = self.new_template(params=ctle_params, temp_cls=CTLE)
 
-        dlev_cap_params['show_pins'] = False
-        dlev_cap_params['io_width'] = core_params['hm_cur_width']
-        dlev_cap_params['io_space'] = core_params['diff_space']
-        dcap_master = self.new_template(params=dlev_cap_params, temp_cls=DLevCap)
-
         clkw, clkh = self.grid.get_size_dimension(clk_master0.size, unit_mode=True)
         corew, coreh = self.grid.get_size_dimension(core_master.size, unit_mode=True)
         ctlew, ctleh = self.grid.get_size_dimension(ctle_master.size, unit_mode=True)
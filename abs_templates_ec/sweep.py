@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+"""This module defines a batch parameter sweep engine for layout templates.
+
+A sweep is described by a base parameter dictionary and a dictionary of axes.  Each axis maps
+a parameter name to the list of values to sweep.  Nested parameters are specified with dotted
+names, for example 'fg_dict.load' sweeps params['fg_dict']['load'].
+
+Variants are generated in groups.  All variants in a group have the same values for the
+group parameters, which by default are the parameters that determine transistor and substrate
+primitives and AnalogBase row placement (channel length, widths, thresholds, and so on).
+Variants in the same group therefore share primitive masters in the TemplateDB, and hit the
+process-wide technology and row placement caches.
+
+Results are emitted one variant at a time.  If a TemplateDB factory is given, every group is
+generated in a new TemplateDB, so masters of previous groups can be garbage collected and
+memory stays bounded by the size of one group.
+
+Example::
+
+    axes = dict(lch=[16e-9, 20e-9], w=[4, 6], fg=[2, 4, 8])
+    for result in sweep_templates(Transistor, base_params, axes, db_factory=make_tdb):
+        print(result.index, result.elapsed)
+"""
+
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, \
+    Tuple
+
+import copy
+import time
+import itertools
+from collections import namedtuple, OrderedDict
+
+if TYPE_CHECKING:
+    from bag.layout.template import TemplateBase, TemplateDB
+
+# parameters that determine transistor/substrate primitives and AnalogBase row placement.
+DEFAULT_GROUP_KEYS = ('lch', 'w', 'w_dict', 'nw_list', 'pw_list', 'intent', 'th_dict',
+                      'nth_list', 'pth_list', 'threshold', 'ptap_w', 'ntap_w', 'sub_w', 'mos_type',
+                      'stack', 'guard_ring_nf', 'top_layer', 'tr_w_dict', 'tr_sp_dict',
+                      'ng_tracks', 'nds_tracks', 'pg_tracks', 'pds_tracks')
+
+SweepResult = namedtuple('SweepResult', ['index', 'group', 'values', 'params', 'master',
+                                         'elapsed', 'num_new_masters'])
+SweepResult.__doc__ = """A parameter sweep result.
+
+Attributes
+----------
+index : int
+    index of this variant in the full sweep, where the first axis varies slowest.
+group : int
+    the variant group index.
+values : Tuple[Any, ...]
+    axis values of this variant, in the order of the axes.
+params : Dict[str, Any]
+    the variant parameters.
+master : TemplateBase
+    the generated template master.
+elapsed : float
+    time to generate this variant, in seconds.
+num_new_masters : int
+    number of masters created by this variant, including itself.  -1 if unknown.
+"""
+
+
+def set_param(params, name, value):
+    # type: (Dict[str, Any], str, Any) -> None
+    """Sets a parameter value, where nested dictionary entries are separated by dots.
+
+    Parameters
+    ----------
+    params : Dict[str, Any]
+        the parameter dictionary.  Nested dictionaries on the path are copied, so other
+        dictionaries that share them are not modified.
+    name : str
+        the parameter name.
+    value : Any
+        the parameter value.
+    """
+    path = name.split('.')
+    for key in path[:-1]:
+        params[key] = params[key].copy()
+        params = params[key]
+    params[path[-1]] = value
+
+
+def get_sweep_groups(axes, group_keys=DEFAULT_GROUP_KEYS):
+    # type: (Dict[str, Sequence[Any]], Sequence[str]) -> Iterator[List[Tuple[int, Tuple[Any, ...]]]]
+    """Iterates over groups of sweep variants.
+
+    Axes whose top-level parameter name is in group_keys are group axes.  Every combination
+    of group axis values forms a group, and the remaining axes are swept within each group.
+
+    Parameters
+    ----------
+    axes : Dict[str, Sequence[Any]]
+        dictionary from parameter name to values to sweep.
+    group_keys : Sequence[str]
+        parameter names that determine primitive masters.
+
+    Yields
+    ------
+    variant_list : List[Tuple[int, Tuple[Any, ...]]]
+        list of (variant index, axis values) in one group.
+    """
+    names = list(axes.keys())
+    val_lists = [list(axes[name]) for name in names]
+    group_set = set(group_keys)
+    group_axes = [idx for idx, name in enumerate(names) if name.split('.')[0] in group_set]
+    inner_axes = [idx for idx in range(len(names)) if idx not in group_axes]
+
+    # stride of each axis in the variant index, where the first axis varies slowest.
+    strides = [1] * len(names)
+    for idx in range(len(names) - 2, -1, -1):
+        strides[idx] = strides[idx + 1] * len(val_lists[idx + 1])
+
+    for group_idx in itertools.product(*(range(len(val_lists[idx])) for idx in group_axes)):
+        variant_list = []
+        for inner_idx in itertools.product(*(range(len(val_lists[idx])) for idx in inner_axes)):
+            idx_list = [0] * len(names)
+            for axis, val_idx in itertools.chain(zip(group_axes, group_idx),
+                                                 zip(inner_axes, inner_idx)):
+                idx_list[axis] = val_idx
+            index = sum((val_idx * stride for val_idx, stride in zip(idx_list, strides)))
+            values = tuple((val_lists[axis][val_idx] for axis, val_idx in enumerate(idx_list)))
+            variant_list.append((index, values))
+        yield variant_list
+
+
+def iter_sweep_params(base_params, axes, group_keys=DEFAULT_GROUP_KEYS):
+    # type: (Dict[str, Any], Dict[str, Sequence[Any]], Sequence[str]) -> Iterator[Tuple[int, int, Tuple[Any, ...], Dict[str, Any]]]
+    """Iterates over the parameters of all sweep variants, group by group.
+
+    Parameters
+    ----------
+    base_params : Dict[str, Any]
+        the base parameter dictionary.
+    axes : Dict[str, Sequence[Any]]
+        dictionary from parameter name to values to sweep.
+    group_keys : Sequence[str]
+        parameter names that determine primitive masters.
+
+    Yields
+    ------
+    group : int
+        the variant group index.
+    index : int
+        the variant index.
+    values : Tuple[Any, ...]
+        axis values of this variant.
+    params : Dict[str, Any]
+        the variant parameters.
+    """
+    axes = OrderedDict(axes)
+    names = list(axes.keys())
+    for group_idx, variant_list in enumerate(get_sweep_groups(axes, group_keys=group_keys)):
+        for index, values in variant_list:
+            params = copy.copy(base_params)
+            for name, val in zip(names, values):
+                set_param(params, name, val)
+            yield group_idx, index, values, params
+
+
+def _get_num_masters(temp_db):
+    # type: (TemplateDB) -> int
+    """Returns the number of masters in the given TemplateDB, or -1 if unknown."""
+    master_table = getattr(temp_db, '_master_lookup', None)
+    return -1 if master_table is None else len(master_table)
+
+
+def sweep_templates(temp_cls,  # type: type
+                    base_params,  # type: Dict[str, Any]
+                    axes,  # type: Dict[str, Sequence[Any]]
+                    temp_db=None,  # type: Optional[TemplateDB]
+                    db_factory=None,  # type: Optional[Callable[[], TemplateDB]]
+                    group_keys=DEFAULT_GROUP_KEYS,  # type: Sequence[str]
+                    debug=False,  # type: bool
+                    ):
+    # type: (...) -> Iterator[SweepResult]
+    """Generates all variants of a template parameter sweep.
+
+    Exactly one of temp_db and db_factory must be given.  With temp_db, all variants are
+    generated in the same TemplateDB, so every master is kept until the TemplateDB is
+    deleted.  With db_factory, every group of variants is generated in a new TemplateDB.
+
+    Parameters
+    ----------
+    temp_cls : type
+        the template class.
+    base_params : Dict[str, Any]
+        the base parameter dictionary.
+    axes : Dict[str, Sequence[Any]]
+        dictionary from parameter name to values to sweep.  Use an OrderedDict to control
+        the variant index order.
+    temp_db : Optional[TemplateDB]
+        the template database.
+    db_factory : Optional[Callable[[], TemplateDB]]
+        function that creates a new template database.
+    group_keys : Sequence[str]
+        parameter names that determine primitive masters.  Variants are grouped by the
+        values of these parameters.
+    debug : bool
+        True to print debug messages.
+
+    Yields
+    ------
+    result : SweepResult
+        the sweep result of each variant.  Variants are yielded group by group, so they
+        are not in variant index order.
+    """
+    if (temp_db is None) == (db_factory is None):
+        raise ValueError('Exactly one of temp_db and db_factory must be given.')
+
+    cur_db = temp_db
+    cur_group = -1
+    for group_idx, index, values, params in iter_sweep_params(base_params, axes,
+                                                              group_keys=group_keys):
+        if db_factory is not None and group_idx != cur_group:
+            # drop the previous TemplateDB first, so it can be garbage collected.
+            cur_db = None
+            cur_db = db_factory()
+            cur_group = group_idx
+
+        num_start = _get_num_masters(cur_db)
+        t_start = time.perf_counter()
+        master = cur_db.new_template(params=params, temp_cls=temp_cls, debug=debug)
+        elapsed = time.perf_counter() - t_start
+        num_stop = _get_num_masters(cur_db)
+        num_new = num_stop - num_start if num_start >= 0 else -1
+        if debug:
+            print('sweep variant %d (group %d): %.4f s, %d new masters' %
+                  (index, group_idx, elapsed, num_new))
+        yield SweepResult(index, group_idx, values, params, master, elapsed, num_new)
+
+
+def get_sweep_summary(result_list):
+    # type: (Sequence[SweepResult]) -> Dict[str, Any]
+    """Returns timing statistics of parameter sweep results.
+
+    Parameters
+    ----------
+    result_list : Sequence[SweepResult]
+        the sweep results.
+
+    Returns
+    -------
+    summary : Dict[str, Any]
+        dictionary with total, mean, minimum and maximum variant time, number of variants,
+        number of groups, and the index of the slowest variant.
+    """
+    if not result_list:
+        return dict(num_variants=0, num_groups=0, tot_time=0.0)
+    times = [res.elapsed for res in result_list]
+    slowest = max(result_list, key=lambda res: res.elapsed)
+    return dict(
+        num_variants=len(result_list),
+        num_groups=len(set((res.group for res in result_list))),
+        tot_time=sum(times),
+        mean_time=sum(times) / len(times),
+        min_time=min(times),
+        max_time=slowest.elapsed,
+        slowest_index=slowest.index,
+    )
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+"""This module compiles technology parameter YAML files into binary snapshots.
+
+Technology parameter files are large, and parsing them is a significant part of the startup
+time of short generator processes.  A snapshot is a pickle file that stores the parsed
+configuration dictionary, including the layer tables, together with precomputed
+channel-length dependent technology constants of MOSTech objects.
+
+load_tech_config() is a drop-in replacement for parsing the YAML file.  It returns the
+configuration stored in the snapshot if the snapshot is fresh, and otherwise parses the YAML
+file and writes a new snapshot.  A snapshot is fresh if it has the current format version,
+it was compiled from a YAML file with identical content, and the layout generator source
+code did not change.  Constants stored in the snapshot are used by
+MOSTech.get_mos_tech_constants() when the technology class source and configuration match.
+
+Snapshots are stored next to the YAML file by default.  Set the
+ABS_TEMPLATES_EC_TECH_SNAPSHOT environment variable to 0 to disable snapshots.
+
+Example::
+
+    config = load_tech_config('tech_params.yaml')
+    mos_tech = MOSTechFinfet(config, tech_info)
+    # store constants of the channel lengths used by the generators.
+    compile_tech_snapshot('tech_params.yaml', tech_list=[mos_tech], lch_list=[14, 16, 20])
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Tuple
+
+import os
+import sys
+import pickle
+import hashlib
+import tempfile
+
+import yaml
+
+from .cache import get_package_fingerprint
+
+if TYPE_CHECKING:
+    from .analog_mos.core import MOSTech
+
+# environment variable that enables or disables snapshots.
+SNAPSHOT_ENV = 'ABS_TEMPLATES_EC_TECH_SNAPSHOT'
+# file name suffix of snapshots stored next to the YAML file.
+SNAPSHOT_SUFFIX = '.snapshot.pkl'
+# snapshot file format version.
+SNAPSHOT_VERSION = 1
+
+# technology constants loaded from snapshots, keyed by technology table key and lch_unit.
+_snapshot_constants = {}  # type: Dict[Tuple[Any, ...], Dict[str, Any]]
+# source code fingerprint of each technology class.
+_class_fingerprints = {}  # type: Dict[type, str]
+
+
+def snapshot_enabled():
+    # type: () -> bool
+    """Returns True if technology snapshots are enabled."""
+    return os.environ.get(SNAPSHOT_ENV, '1').strip().lower() not in ('0', 'false', 'no', '')
+
+
+def get_snapshot_path(yaml_fname):
+    # type: (str) -> str
+    """Returns the default snapshot file name of the given technology YAML file."""
+    return os.path.abspath(yaml_fname) + SNAPSHOT_SUFFIX
+
+
+def get_class_fingerprint(tech_cls):
+    # type: (type) -> str
+    """Returns a hash of the source files that define the given technology class.
+
+    Parameters
+    ----------
+    tech_cls : type
+        the technology class.
+
+    Returns
+    -------
+    fingerprint : str
+        the hash of the source files of all classes in the method resolution order.
+    """
+    ans = _class_fingerprints.get(tech_cls, None)
+    if ans is None:
+        md5 = hashlib.md5()
+        file_set = set()
+        for cls in tech_cls.__mro__:
+            mod = sys.modules.get(cls.__module__, None)
+            fname = getattr(mod, '__file__', None)
+            if fname and fname not in file_set:
+                file_set.add(fname)
+                md5.update(cls.__module__.encode('utf-8'))
+                try:
+                    with open(fname, 'rb') as f:
+                        md5.update(f.read())
+                except OSError:
+                    md5.update(fname.encode('utf-8'))
+        ans = _class_fingerprints[tech_cls] = md5.hexdigest()
+    return ans
+
+
+def get_tech_table_key(tech):
+    # type: (MOSTech) -> Tuple[Any, ...]
+    """Returns the key of technology constant tables of the given technology object.
+
+    The key contains the technology class name and source fingerprint, and the configuration
+    part of the technology configuration key, so it can be stored in snapshots.
+    """
+    tech_cls = type(tech)
+    cls_name = '%s.%s' % (tech_cls.__module__, tech_cls.__qualname__)
+    return (cls_name, get_class_fingerprint(tech_cls)) + tuple(tech.get_config_key()[1:])
+
+
+def get_snapshot_constants(tech, lch_unit):
+    # type: (MOSTech, int) -> Optional[Dict[str, Any]]
+    """Returns the technology constants of the given channel length loaded from a snapshot.
+
+    Parameters
+    ----------
+    tech : MOSTech
+        the technology object.
+    lch_unit : int
+        the channel length, in resolution units.
+
+    Returns
+    -------
+    constants : Optional[Dict[str, Any]]
+        the technology constants dictionary, or None if no snapshot has them.  The dictionary
+        is shared, and must not be modified.
+    """
+    if not _snapshot_constants:
+        return None
+    return _snapshot_constants.get(get_tech_table_key(tech) + (lch_unit, ), None)
+
+
+def _hash_file(fname):
+    # type: (str) -> Tuple[bytes, str]
+    with open(fname, 'rb') as f:
+        data = f.read()
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def _parse_yaml(data):
+    # type: (bytes) -> Dict[str, Any]
+    # technology files use python tags such as !!python/tuple.
+    return yaml.load(data, Loader=yaml.FullLoader)
+
+
+def _read_snapshot(snapshot_fname, src_hash):
+    # type: (str, str) -> Optional[Dict[str, Any]]
+    """Returns the snapshot content if it is fresh, None otherwise."""
+    try:
+        with open(snapshot_fname, 'rb') as f:
+            content = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # corrupted or incompatible snapshot.
+        return None
+
+    if (not isinstance(content, dict) or content.get('version') != SNAPSHOT_VERSION or
+            content.get('src_hash') != src_hash or
+            content.get('pkg_fingerprint') != get_package_fingerprint()):
+        return None
+    return content
+
+
+def _write_snapshot(snapshot_fname, content):
+    # type: (str, Dict[str, Any]) -> bool
+    """Writes the given snapshot content atomically.  Returns True on success."""
+    try:
+        data = pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return False
+
+    dir_name = os.path.dirname(os.path.abspath(snapshot_fname))
+    try:
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=dir_name)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, snapshot_fname)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    except OSError:
+        return False
+    return True
+
+
+def _register_constants(content):
+    # type: (Dict[str, Any]) -> None
+    for table_key, table in content.get('constants', {}).items():
+        for lch_unit, constants in table.items():
+            _snapshot_constants[table_key + (lch_unit, )] = constants
+
+
+def load_tech_config(yaml_fname, snapshot_fname=None, update=True):
+    # type: (str, Optional[str], bool) -> Dict[str, Any]
+    """Returns the technology configuration in the given YAML file, using the snapshot if fresh.
+
+    Parameters
+    ----------
+    yaml_fname : str
+        the technology YAML file name.
+    snapshot_fname : Optional[str]
+        the snapshot file name.  Defaults to get_snapshot_path(yaml_fname).
+    update : bool
+        True to write a new snapshot if the snapshot is missing or stale.
+
+    Returns
+    -------
+    config : Dict[str, Any]
+        the technology configuration dictionary.
+    """
+    data, src_hash = _hash_file(yaml_fname)
+    if not snapshot_enabled():
+        return _parse_yaml(data)
+
+    if snapshot_fname is None:
+        snapshot_fname = get_snapshot_path(yaml_fname)
+    content = _read_snapshot(snapshot_fname, src_hash)
+    if content is not None:
+        _register_constants(content)
+        return content['config']
+
+    config = _parse_yaml(data)
+    if update:
+        _write_snapshot(snapshot_fname, dict(
+            version=SNAPSHOT_VERSION,
+            pkg_fingerprint=get_package_fingerprint(),
+            src_hash=src_hash,
+            config=config,
+            constants={},
+        ))
+    return config
+
+
+def compile_tech_snapshot(yaml_fname,  # type: str
+                          snapshot_fname=None,  # type: Optional[str]
+                          tech_list=None,  # type: Optional[Sequence[MOSTech]]
+                          lch_list=None,  # type: Optional[Sequence[int]]
+                          ):
+    # type: (...) -> str
+    """Compiles the given technology YAML file into a snapshot.
+
+    Constants already stored in a fresh snapshot are kept, so constants of different
+    technology objects can be added by separate calls.
+
+    Parameters
+    ----------
+    yaml_fname : str
+        the technology YAML file name.
+    snapshot_fname : Optional[str]
+        the snapshot file name.  Defaults to get_snapshot_path(yaml_fname).
+    tech_list : Optional[Sequence[MOSTech]]
+        technology objects whose channel-length dependent constants are stored.
+    lch_list : Optional[Sequence[int]]
+        channel lengths, in resolution units, of the stored constants.
+
+    Returns
+    -------
+    snapshot_fname : str
+        the snapshot file name.
+    """
+    if snapshot_fname is None:
+        snapshot_fname = get_snapshot_path(yaml_fname)
+
+    data, src_hash = _hash_file(yaml_fname)
+    content = _read_snapshot(snapshot_fname, src_hash)
+    if content is None:
+        content = dict(
+            version=SNAPSHOT_VERSION,
+            pkg_fingerprint=get_package_fingerprint(),
+            src_hash=src_hash,
+            config=_parse_yaml(data),
+            constants={},
+        )
+
+    constants = content['constants']
+    for tech in (tech_list or []):
+        table = constants.setdefault(get_tech_table_key(tech), {})
+        for lch_unit in (lch_list or []):
+            # store plain dictionaries; read-only mapping proxies cannot be pickled.
+            table[lch_unit] = dict(tech.get_mos_tech_constants(lch_unit))
+
+    if not _write_snapshot(snapshot_fname, content):
+        raise ValueError('Cannot write technology snapshot %s' % snapshot_fname)
+    _register_constants(content)
+    return snapshot_fname
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+
+"""Layout generator benchmark suite.
+
+This script generates the templates listed in a benchmark specification file, and reports
+wall time, peak memory, number of masters created, and number of shapes drawn for each of them.
+Masters are generated with a TemplateDB and RoutingGrid built from the technology of the
+current BAG configuration, so no layout database connection is needed; batch_layout() is never
+called.  The technology should follow one of the sample tech params in tech_params_sample.
+
+The suite needs a BAG installation with a configured technology package, and cannot run on
+tech_params_sample alone: those files are examples of technology parameters, and the
+MOSTech/ResTech/TechInfo implementations that draw the primitives live in the technology
+package.  To run it in CI, run it in an environment with the BAG project and technology
+package checked out, and keep baseline results per technology.
+
+The suite deliberately uses the real BAG TemplateDB and RoutingGrid instead of local
+stand-ins.  The benchmarked templates derive from BAG's TemplateBase, and call RoutingGrid,
+WireArray and TechInfo methods throughout, so a stand-in would have to reimplement most of
+BAG's layout engine, and its timings would not show the cost of generation with BAG.
+
+Every run starts with empty process-wide caches (technology constants, extension widths,
+resistor density, laygo row stacks, and AnalogBase row placement plans), and the on-disk
+primitive cache is disabled, so runs and result files are comparable.  Wall times are
+measured without profiling; master and shape counts are collected in one extra run under
+LayoutProfiler.
+
+A case with a sweep entry generates all variants of a parameter sweep in one TemplateDB, and
+reports how many AnalogBase row placement plans were reused between variants.  The summary
+table also lists the number of transistor connection (AnalogMOSConn) masters of each case.
+
+If a profile directory is given, each case is also generated once under LayoutProfiler, and
+a flame-graph-compatible collapsed stack file and a summary table are saved per case.
+
+Results are saved as JSON.  If a baseline result file is given, the wall times are compared
+with the baseline and the script exits with a non-zero status on regressions.
+
+Usage::
+
+    python scripts_test/benchmark.py specs_test/benchmark.yaml -o bench.json
+    python scripts_test/benchmark.py specs_test/benchmark.yaml -b bench.json -t 0.1
+"""
+
+from typing import Dict, Any, List
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import importlib
+import tracemalloc
+from collections import Counter
+
+import yaml
+
+from bag.layout import RoutingGrid, TemplateDB
+from bag.layout.util import BBox
+from bag.layout.template import TemplateBase
+
+from abs_templates_ec.cache import get_package_fingerprint, set_primitive_disk_cache
+from abs_templates_ec.parallel import set_num_workers
+from abs_templates_ec.profiling import LayoutProfiler
+from abs_templates_ec.sweep import sweep_templates
+from abs_templates_ec.analog_mos.core import MOSTech
+from abs_templates_ec.analog_core.base import AnalogBase
+from abs_templates_ec.laygo.core import LaygoBase
+from abs_templates_ec.resistor.base import ResTech
+from abs_templates_ec.resistor.core import ResArrayBase
+from abs_templates_ec.routing.fill import PowerFill
+
+
+class BenchAnalogBase(AnalogBase):
+    """An AnalogBase that draws the transistor rows and fills dummies.
+
+    If conn_margin is given, a transistor connection is drawn in every transistor row over all
+    fingers except conn_margin fingers on each side.
+    """
+
+    def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
+        AnalogBase.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
+
+    @classmethod
+    def get_params_info(cls):
+        return dict(
+            base_params='draw_base() parameters.',
+            conn_margin='number of unconnected fingers on each side of transistor rows.',
+        )
+
+    @classmethod
+    def get_default_param_values(cls):
+        return dict(
+            conn_margin=None,
+        )
+
+    def draw_layout(self):
+        base_params = self.params['base_params']
+        conn_margin = self.params['conn_margin']
+        self.draw_base(**base_params)
+        if conn_margin is not None:
+            conn_fg = self.fg_tot - 2 * conn_margin
+            for mos_type, w_list in (('nch', base_params['nw_list']),
+                                     ('pch', base_params['pw_list'])):
+                for row_idx in range(len(w_list)):
+                    self.draw_mos_conn(mos_type, row_idx, conn_margin, conn_fg, 0, 2)
+        self.fill_dummy()
+
+
+class BenchLaygoBase(LaygoBase):
+    """A LaygoBase that draws the given rows and fills all spaces."""
+
+    def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
+        LaygoBase.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
+
+    @classmethod
+    def get_params_info(cls):
+        return dict(
+            config='laygo configuration dictionary.',
+            row_params='set_row_types() parameters.',
+            num_col='number of columns.',
+        )
+
+    def draw_layout(self):
+        num_col = self.params['num_col']
+        row_params = self.params['row_params'].copy()
+        row_params['num_col'] = num_col
+        self.set_row_types(**row_params)
+        self.set_laygo_size(num_col=num_col)
+        self.fill_space()
+
+
+class BenchResArrayBase(ResArrayBase):
+    """A ResArrayBase that draws a resistor array."""
+
+    def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
+        ResArrayBase.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
+
+    @classmethod
+    def get_params_info(cls):
+        return dict(
+            array_params='draw_array() parameters.',
+        )
+
+    def draw_layout(self):
+        self.draw_array(**self.params['array_params'])
+
+
+class BenchPowerFillBlocks(TemplateBase):
+    """A template that draws wire blockages and fills the rest with power fill blocks.
+
+    The blockages are num_block wires on the bottom fill layer, at random tracks and
+    locations given by a fixed seed.
+    """
+
+    def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
+        TemplateBase.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
+
+    @classmethod
+    def get_params_info(cls):
+        return dict(
+            fill_config='the fill configuration dictionary.',
+            bot_layer='the bottom fill layer.',
+            top_layer='the top fill layer.',
+            nx='number of fill blocks in X direction.',
+            ny='number of fill blocks in Y direction.',
+            num_block='number of blockage wires.',
+            mosaic_mode='the add_fill_blocks() mosaic mode.',
+            seed='the blockage random seed.',
+        )
+
+    @classmethod
+    def get_default_param_values(cls):
+        return dict(
+            mosaic_mode='greedy',
+            seed=0,
+        )
+
+    def draw_layout(self):
+        fill_config = self.params['fill_config']
+        bot_layer = self.params['bot_layer']
+        top_layer = self.params['top_layer']
+        rng = random.Random(self.params['seed'])
+
+        blk_w, blk_h = self.grid.get_fill_size(top_layer, fill_config, unit_mode=True)
+        width, height = self.params['nx'] * blk_w, self.params['ny'] * blk_h
+        bnd_box = BBox(0, 0, width, height, self.grid.resolution, unit_mode=True)
+        self.set_size_from_bound_box(top_layer, bnd_box)
+        self.array_box = bnd_box
+
+        if self.grid.get_direction(bot_layer) == 'x':
+            perp_len, wire_len = height, blk_w
+        else:
+            perp_len, wire_len = width, blk_h
+        num_tr = perp_len // self.grid.get_track_pitch(bot_layer, unit_mode=True) - 1
+        tot_len = height + width - perp_len
+        for _ in range(self.params['num_block']):
+            lower = rng.randrange(0, tot_len - wire_len)
+            self.add_wires(bot_layer, rng.randrange(0, num_tr), lower, lower + wire_len,
+                           unit_mode=True)
+
+        PowerFill.add_fill_blocks(self, bnd_box, fill_config, bot_layer, top_layer,
+                                  mosaic_mode=self.params['mosaic_mode'])
+
+
+def clear_caches():
+    # type: () -> None
+    """Clears all process-wide caches, so every run starts from the same state."""
+    MOSTech.clear_mos_constants_cache()
+    ResTech.clear_density_cache()
+    LaygoBase.clear_row_stack_cache()
+    AnalogBase.clear_placement_plan_cache()
+
+
+def get_tech_info():
+    """Returns the TechInfo object of the current BAG configuration."""
+    try:
+        from bag.core import create_tech_info
+    except ImportError:
+        from bag.core import BagProject
+        return BagProject().tech_info
+    return create_tech_info()
+
+
+def make_tdb(tech_info, lib_name, grid_specs):
+    routing_grid = RoutingGrid(tech_info, grid_specs['layers'], grid_specs['spaces'],
+                               grid_specs['widths'], grid_specs['bot_dir'],
+                               width_override=grid_specs.get('width_override', None))
+    return TemplateDB('template_libs.def', routing_grid, lib_name, use_cybagoa=True)
+
+
+def get_template_class(class_path):
+    """Returns the template class given its full name, or its name in this script."""
+    if '.' not in class_path:
+        return getattr(sys.modules[__name__], class_path)
+    module_name, class_name = class_path.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def get_case_params(case_specs):
+    """Returns the template parameters of a benchmark case."""
+    if 'params_file' in case_specs:
+        with open(case_specs['params_file'], 'r') as f:
+            file_specs = yaml.safe_load(f)
+        params = {}
+        for key in case_specs.get('params_keys', ['params']):
+            params.update(file_specs[key])
+        if 'routing_grid' in file_specs:
+            case_specs.setdefault('routing_grid', file_specs['routing_grid'])
+    else:
+        params = {}
+    params.update(case_specs.get('params', {}))
+    return params
+
+
+def generate(temp_db, temp_cls, params, sweep_axes):
+    """Generates the template, or all variants of the parameter sweep if given."""
+    if sweep_axes is None:
+        temp_db.new_template(params=params, temp_cls=temp_cls, debug=False)
+    else:
+        for _ in sweep_templates(temp_cls, params, sweep_axes, temp_db=temp_db):
+            pass
+
+
+def run_case(tech_info, name, case_specs, grid_specs, num_repeat, measure_memory, prof_dir=''):
+    # type: (Any, str, Dict[str, Any], Dict[str, Any], int, bool, str) -> Dict[str, Any]
+    """Generates one benchmark case and returns the measured results."""
+    temp_cls = get_template_class(case_specs['class'])
+    params = get_case_params(case_specs)
+    sweep_axes = case_specs.get('sweep', None)
+    grid_specs = case_specs.get('routing_grid', grid_specs)
+    lib_name = 'AAAFOO_BENCH_%s' % name.upper()
+
+    # every run uses a new TemplateDB and empty caches, so nothing is shared between runs.
+    # placement table statistics are recorded in the first run.
+    place_stats = None
+    times = []
+    for _ in range(num_repeat):
+        clear_caches()
+        temp_db = make_tdb(tech_info, lib_name, grid_specs)
+        t_start = time.perf_counter()
+        generate(temp_db, temp_cls, params, sweep_axes)
+        times.append(time.perf_counter() - t_start)
+        if place_stats is None:
+            place_stats = dict(plans=AnalogBase.get_placement_plan_cache_stats(),
+                               rows=AnalogBase.get_placement_row_cache_stats())
+
+    # master and shape counts are recorded in a separate run, without technology method
+    # profiling.
+    clear_caches()
+    temp_db = make_tdb(tech_info, lib_name, grid_specs)
+    with LayoutProfiler(profile_tech=False) as prof:
+        generate(temp_db, temp_cls, params, sweep_axes)
+
+    peak_mem = None
+    if measure_memory:
+        clear_caches()
+        temp_db = make_tdb(tech_info, lib_name, grid_specs)
+        tracemalloc.start()
+        try:
+            generate(temp_db, temp_cls, params, sweep_axes)
+            peak_mem = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    if prof_dir:
+        clear_caches()
+        temp_db = make_tdb(tech_info, lib_name, grid_specs)
+        with LayoutProfiler() as tech_prof:
+            generate(temp_db, temp_cls, params, sweep_axes)
+        os.makedirs(prof_dir, exist_ok=True)
+        tech_prof.write_collapsed(os.path.join(prof_dir, name + '.folded'))
+        with open(os.path.join(prof_dir, name + '.txt'), 'w') as f:
+            f.write(tech_prof.get_summary())
+            f.write('\n')
+
+    times.sort()
+    stats = prof.get_stats()
+    masters = {temp_name: val['num_masters'] for temp_name, val in stats['templates'].items()}
+    shapes = Counter()
+    shapes_by_class = {}
+    for temp_name, val in stats['templates'].items():
+        shapes.update(val['shapes'])
+        shapes_by_class[temp_name] = sum(val['shapes'].values())
+    num_created = sum(masters.values())
+    # number of templates generated by TemplateDB.new_template() directly.
+    num_top = 1
+    for val_list in (sweep_axes or {}).values():
+        num_top *= len(val_list)
+    return dict(
+        template=case_specs['class'],
+        wall_time=dict(min=times[0], median=times[len(times) // 2], runs=times),
+        peak_memory=peak_mem,
+        new_template_calls=stats['new_template_calls'],
+        masters_created=num_created,
+        master_hits=stats['new_template_calls'] + num_top - num_created,
+        masters_by_class=masters,
+        num_shapes=sum(shapes.values()),
+        shapes=dict(shapes),
+        shapes_by_class=shapes_by_class,
+        placement_cache=place_stats,
+    )
+
+
+def compare_results(results, baseline, tolerance):
+    # type: (Dict[str, Any], Dict[str, Any], float) -> List[str]
+    """Prints a comparison table, returns the names of regressed benchmark cases."""
+    regressed = []
+    print('%-24s %12s %12s %8s' % ('case', 'baseline(s)', 'current(s)', 'ratio'))
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        t_base = baseline[name]['wall_time']['min']
+        t_cur = result['wall_time']['min']
+        ratio = t_cur / t_base if t_base > 0 else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressed.append(name)
+            flag = '  REGRESSION'
+        print('%-24s %12.4f %12.4f %8.3f%s' % (name, t_base, t_cur, ratio, flag))
+    return regressed
+
+
+def print_summary(results):
+    # type: (Dict[str, Any]) -> None
+    print('%-24s %10s %12s %8s %8s %6s %10s %12s' % ('case', 'time(s)', 'peak_mem(MB)',
+                                                       'created', 'hits', 'conn', 'shapes',
+                                                       'plan hit/miss'))
+    for name, result in results.items():
+        peak_mem = result['peak_memory']
+        mem_str = '-' if peak_mem is None else '%.2f' % (peak_mem / 1024 / 1024)
+        plan_stats = result['placement_cache']['plans']
+        plan_str = '%d/%d' % (plan_stats['hits'], plan_stats['misses'])
+        num_conn = result['masters_by_class'].get('AnalogMOSConn', 0)
+        print('%-24s %10.4f %12s %8d %8d %6d %10d %12s' % (name, result['wall_time']['min'],
+                                                           mem_str, result['masters_created'],
+                                                           result['master_hits'], num_conn,
+                                                           result['num_shapes'], plan_str))
+
+
+def run_main():
+    parser = argparse.ArgumentParser(description='Run layout generator benchmarks.')
+    parser.add_argument('specs', help='benchmark specification YAML file.')
+    parser.add_argument('-o', '--output', default='', help='result JSON file name.')
+    parser.add_argument('-b', '--baseline', default='', help='baseline result JSON file name.')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.2,
+                        help='allowed relative wall time increase over baseline.')
+    parser.add_argument('-n', '--repeat', type=int, default=0,
+                        help='number of runs per case.  Overrides the specification file.')
+    parser.add_argument('-c', '--cases', nargs='*', default=None, help='cases to run.')
+    parser.add_argument('--no-memory', action='store_true', help='skip peak memory measurement.')
+    parser.add_argument('-p', '--profile', default='',
+                        help='directory to save collapsed stack profiles and summaries.')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='number of worker processes for parallel master generation.')
+    args = parser.parse_args()
+    set_num_workers(args.jobs)
+    # the on-disk primitive cache persists between runs, so it is disabled.
+    set_primitive_disk_cache(None)
+
+    with open(args.specs, 'r') as f:
+        specs = yaml.safe_load(f)
+
+    num_repeat = args.repeat if args.repeat > 0 else specs.get('repeat', 3)
+    grid_specs = specs['routing_grid']
+    tech_info = get_tech_info()
+
+    results = {}
+    for name, case_specs in specs['cases'].items():
+        if args.cases is None or name in args.cases:
+            print('running %s' % name)
+            results[name] = run_case(tech_info, name, case_specs, grid_specs, num_repeat,
+                                     not args.no_memory, prof_dir=args.profile)
+
+    print_summary(results)
+    mos_tech = tech_info.tech_params['layout']['mos_tech_class']
+    output = dict(
+        meta=dict(
+            timestamp=time.strftime('%Y-%m-%dT%H:%M:%S'),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            package_fingerprint=get_package_fingerprint(),
+            tech_config=mos_tech.get_config_key()[2],
+            specs=os.path.abspath(args.specs),
+            repeat=num_repeat,
+            jobs=args.jobs,
+        ),
+        results=results,
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+        print('results saved to %s' % args.output)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+        regressed = compare_results(results, baseline, args.tolerance)
+        if regressed:
+            print('performance regressions: %s' % ', '.join(regressed))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    run_main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""Compiles a technology parameter YAML file into a binary snapshot.
+
+The snapshot stores the parsed technology configuration.  If channel lengths are given, the
+technology constants of the transistor technology class of the current BAG configuration are
+also computed and stored, so generator processes that load the configuration with
+abs_templates_ec.tech_snapshot.load_tech_config() skip both YAML parsing and constants
+computation.
+
+Usage::
+
+    python scripts_test/compile_tech_snapshot.py tech_params.yaml
+    python scripts_test/compile_tech_snapshot.py tech_params.yaml -l 14e-9 16e-9 20e-9
+"""
+
+import time
+import argparse
+
+from abs_templates_ec.tech_snapshot import compile_tech_snapshot, load_tech_config
+
+
+def get_tech_info():
+    """Returns the TechInfo object of the current BAG configuration."""
+    try:
+        from bag.core import create_tech_info
+    except ImportError:
+        from bag.core import BagProject
+        return BagProject().tech_info
+    return create_tech_info()
+
+
+def run_main():
+    parser = argparse.ArgumentParser(description='Compile a technology parameter snapshot.')
+    parser.add_argument('tech_yaml', help='technology parameter YAML file.')
+    parser.add_argument('-o', '--output', default=None,
+                        help='snapshot file name.  Defaults to a file next to the YAML file.')
+    parser.add_argument('-l', '--lch', nargs='*', type=float, default=[],
+                        help='channel lengths, in meters, of the technology constants to store.')
+    args = parser.parse_args()
+
+    tech_list = []
+    lch_list = []
+    if args.lch:
+        tech_info = get_tech_info()
+        res = tech_info.resolution
+        tech_list.append(tech_info.tech_params['layout']['mos_tech_class'])
+        lch_list.extend((int(round(lch / tech_info.layout_unit / res)) for lch in args.lch))
+
+    fname = compile_tech_snapshot(args.tech_yaml, snapshot_fname=args.output,
+                                  tech_list=tech_list, lch_list=lch_list)
+    print('snapshot saved to %s' % fname)
+
+    t_start = time.perf_counter()
+    load_tech_config(args.tech_yaml, snapshot_fname=args.output, update=False)
+    print('snapshot load time: %.4f s' % (time.perf_counter() - t_start))
+
+
+if __name__ == '__main__':
+    run_main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""Checks the AnalogBase dummy connection bitmap engine against the IntervalSet algorithm.
+
+Random row usage patterns are generated, dummy connection intervals are selected with both
+the original IntervalSet based algorithm and the column bitmap engine, and the results are
+compared.  Afterwards, the runtime of both implementations is reported.
+"""
+
+import time
+
+import numpy as np
+
+from bag.util.interval import IntervalSet
+
+from abs_templates_ec.analog_core.dummy import intervals_to_mask, get_runs
+from abs_templates_ec.analog_core.dummy import remove_overlapping_runs
+from abs_templates_ec.analog_core.dummy import get_dummy_connections, select_dummy_connections
+
+
+def make_used_intervals(num_rows, fg_tot, max_fg, rng):
+    """Returns a list of random used finger IntervalSets."""
+    intv_set_list = []
+    for _ in range(num_rows):
+        intv_set = IntervalSet()
+        col = rng.randint(0, max_fg)
+        while col < fg_tot:
+            fg = rng.randint(1, max_fg + 1)
+            stop = min(col + fg, fg_tot)
+            intv_set.add((col, stop))
+            col = stop + rng.randint(0, max_fg)
+        intv_set_list.append(intv_set)
+    return intv_set_list
+
+
+def get_dummy_connections_intv(intv_set_list):
+    """The IntervalSet implementation of finding dummy connections."""
+    conn_list = []
+    for intv_set in intv_set_list:
+        if not conn_list:
+            conn_list.append(intv_set.copy())
+        else:
+            conn_list.append(intv_set.get_intersection(conn_list[-1]))
+
+    for idx in range(len(conn_list) - 1):
+        cur_intvs, next_intvs = conn_list[idx], conn_list[idx + 1]
+        for intv in next_intvs:
+            cur_intvs.subtract(intv)
+
+    return conn_list
+
+
+def select_dummy_connections_intv(conn_list, unconnected):
+    """The IntervalSet implementation of selecting dummy connections."""
+    select_list = [[] for _ in range(len(conn_list))]
+    for idx in range(len(conn_list) - 1, -1, -1):
+        cur_select_list = []
+        for intv in conn_list[idx]:
+            if any(unconnected[j].has_overlap(intv) for j in range(idx + 1)):
+                cur_select_list.append(intv)
+        for intv in cur_select_list:
+            for j in range(idx + 1):
+                unconnected[j].remove_all_overlaps(intv)
+        select_list[idx] = cur_select_list
+    return select_list
+
+
+def run_intv(used_list, fg_tot):
+    """Run the IntervalSet implementation with both substrates present."""
+    total_intv = (0, fg_tot)
+    unused_list = [intv_set.get_complement(total_intv) for intv_set in used_list]
+    bot_conn = get_dummy_connections_intv(unused_list)
+    top_conn = get_dummy_connections_intv(unused_list[::-1])
+    unconnected = [intv_set.copy() for intv_set in unused_list]
+    all_conn_set = bot_conn[-1]
+    del bot_conn[-1]
+    del top_conn[-1]
+    for all_conn_intv in all_conn_set:
+        for intv_set in unconnected:
+            intv_set.remove_all_overlaps(all_conn_intv)
+
+    bot_sel = select_dummy_connections_intv(bot_conn, unconnected)
+    top_sel = select_dummy_connections_intv(top_conn, unconnected[::-1])
+    return list(all_conn_set), bot_sel, top_sel
+
+
+def run_mask(used_list, fg_tot):
+    """Run the bitmap implementation with both substrates present."""
+    unused_mat = ~intervals_to_mask(used_list, fg_tot)
+    bot_conn = get_dummy_connections(unused_mat)
+    top_conn = get_dummy_connections(unused_mat[::-1])
+    unconnected_mat = unused_mat.copy()
+    all_conn_mask = bot_conn[-1]
+    remove_overlapping_runs(unconnected_mat, all_conn_mask)
+
+    bot_sel = select_dummy_connections(bot_conn[:-1], unconnected_mat)
+    top_sel = select_dummy_connections(top_conn[:-1], unconnected_mat[::-1])
+    return get_runs(all_conn_mask), bot_sel, top_sel
+
+
+def run_check(num_trials=500, seed=0):
+    """Compare both implementations on random row patterns."""
+    rng = np.random.RandomState(seed)
+    for trial in range(num_trials):
+        num_rows = rng.randint(1, 11)
+        fg_tot = rng.randint(4, 200)
+        used_list = make_used_intervals(num_rows, fg_tot, rng.randint(1, 20), rng)
+        expect = run_intv(used_list, fg_tot)
+        actual = run_mask(used_list, fg_tot)
+        if expect != actual:
+            raise ValueError('Mismatch on trial %d:\nexpect: %s\nactual: %s' %
+                             (trial, expect, actual))
+    print('%d random row patterns matched.' % num_trials)
+
+
+def run_benchmark(num_rows=10, fg_tot=400, num_iter=20, seed=1):
+    """Time both implementations."""
+    rng = np.random.RandomState(seed)
+    used_list = make_used_intervals(num_rows, fg_tot, 8, rng)
+    for name, fun in (('IntervalSet', run_intv), ('bitmap', run_mask)):
+        t_start = time.perf_counter()
+        for _ in range(num_iter):
+            fun(used_list, fg_tot)
+        t_elapsed = (time.perf_counter() - t_start) / num_iter
+        print('%-12s %d rows x %d fingers: %.3f ms' % (name, num_rows, fg_tot, t_elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    run_check()
+    run_benchmark()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""Checks that get_ext_group_arrays() draws every extension group at its own offset.
+
+Each test case is a list of extension groups, as returned by get_row_extension_info().  The
+extension arrays are expanded back to one group per instance, and compared with the original
+groups.  Some cases have gaps between groups, which DigitalBase leaves at multi-row blocks.
+The script exits with a non-zero status on mismatches.
+"""
+
+import sys
+
+from abs_templates_ec.laygo.tech import get_ext_group_arrays
+
+
+def expand_arrays(ext_arrays):
+    """Returns the extension groups drawn by the given extension arrays."""
+    ans = []
+    for fg_off, fg, bot_info, top_info, nx, pitch in ext_arrays:
+        for idx in range(nx):
+            ans.append((fg_off + idx * pitch, fg, bot_info, top_info))
+    return sorted(ans, key=lambda group: group[0])
+
+
+def make_groups(spec):
+    """Returns extension groups from a list of (finger offset, number of fingers, info)."""
+    return [(fg_off, fg, 'b%s' % info, 't%s' % info) for fg_off, fg, info in spec]
+
+
+def get_test_cases():
+    """Returns a dictionary from test case name to extension groups."""
+    return dict(
+        contiguous=make_groups([(0, 4, 0), (4, 4, 0), (8, 4, 0), (12, 4, 0)]),
+        single_gap=make_groups([(0, 4, 0), (14, 4, 0)]),
+        uneven_gaps=make_groups([(0, 4, 0), (4, 4, 0), (10, 4, 0), (14, 4, 0), (18, 4, 0)]),
+        periodic_gap=make_groups([(0, 2, 0), (2, 4, 1), (10, 2, 0), (12, 4, 1),
+                                  (20, 2, 0), (22, 4, 1)]),
+        period_two=make_groups([(0, 2, 0), (2, 3, 1), (5, 2, 0), (7, 3, 1), (10, 1, 2)]),
+        mixed=make_groups([(0, 3, 0), (3, 3, 0), (6, 3, 1), (12, 3, 1), (15, 3, 1)]),
+    )
+
+
+def run_main():
+    errors = []
+    for name, ext_groups in get_test_cases().items():
+        ext_arrays = get_ext_group_arrays(ext_groups)
+        drawn = expand_arrays(ext_arrays)
+        ok = drawn == ext_groups
+        # the right-most finger of each array must match the right-most group it draws.
+        num_cols = ext_groups[-1][0] + ext_groups[-1][1]
+        num_right = sum(1 for fg_off, fg, _, _, nx, pitch in ext_arrays
+                        if fg_off + (nx - 1) * pitch + fg == num_cols)
+        ok = ok and num_right == 1
+        print('%-16s %2d groups, %2d arrays: %s' % (name, len(ext_groups), len(ext_arrays),
+                                                    'pass' if ok else 'FAIL'))
+        if not ok:
+            errors.append('%s: groups %s drawn as %s' % (name, ext_groups, drawn))
+
+    for msg in errors:
+        print(msg)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run_main()
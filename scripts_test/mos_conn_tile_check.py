@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+
+"""Checks that tiled transistor connections match connections drawn with one master.
+
+For every combination of finger count, source/drain direction, gate_pref_loc, and flip_lr,
+an AnalogBase with one transistor connection is generated twice: once with the connection
+tiled with unit masters, and once with one AnalogMOSConn master (tile_conn=False).  The
+connection ports are compared, and the flattened geometries of both templates are compared
+layer by layer as merged regions, so shapes that are split differently still match.  The
+script exits with a non-zero status on mismatches.
+
+The check uses the mos_conn_tile_seg value of the technology; it fails if no connection is
+tiled.  Like scripts_test/benchmark.py, this script needs the technology of the current BAG
+configuration, and reads the AnalogBase parameters and routing grid of a benchmark case.
+
+Usage::
+
+    python scripts_test/mos_conn_tile_check.py specs_test/benchmark.yaml -f 8 16 17 23 30
+"""
+
+from typing import Dict, Any, List, Tuple, Iterable
+
+import sys
+import argparse
+from collections import defaultdict
+
+import yaml
+
+from bag.layout import RoutingGrid, TemplateDB
+
+from abs_templates_ec.analog_core.base import AnalogBase
+
+from benchmark import get_tech_info, get_case_params
+
+_orient_table = {
+    'R0': (1, 1),
+    'MX': (1, -1),
+    'MY': (-1, 1),
+    'R180': (-1, -1),
+}
+
+
+class MOSConnTileCheck(AnalogBase):
+    """An AnalogBase with one transistor connection in the bottom NMOS row."""
+
+    def __init__(self, temp_db, lib_name, params, used_names, **kwargs):
+        AnalogBase.__init__(self, temp_db, lib_name, params, used_names, **kwargs)
+        self.conn_ports = None
+
+    @classmethod
+    def get_params_info(cls):
+        return dict(
+            base_params='draw_base() parameters.',
+            col_idx='left-most finger index of the connection.',
+            fg='number of fingers of the connection.',
+            sdir='source connection direction.',
+            ddir='drain connection direction.',
+            conn_kwargs='additional draw_mos_conn() arguments.',
+        )
+
+    def draw_layout(self):
+        self.draw_base(**self.params['base_params'])
+        self.conn_ports = self.draw_mos_conn('nch', 0, self.params['col_idx'], self.params['fg'],
+                                             self.params['sdir'], self.params['ddir'],
+                                             **self.params['conn_kwargs'])
+        self.fill_dummy()
+
+
+def make_tdb(tech_info, lib_name, grid_specs):
+    """Returns a TemplateDB that keeps layout content as Python objects."""
+    routing_grid = RoutingGrid(tech_info, grid_specs['layers'], grid_specs['spaces'],
+                               grid_specs['widths'], grid_specs['bot_dir'],
+                               width_override=grid_specs.get('width_override', None))
+    return TemplateDB('template_libs.def', routing_grid, lib_name, use_cybagoa=False)
+
+
+def transform_box(box, xform):
+    # type: (Tuple[int, int, int, int], Tuple[int, int, int, int]) -> Tuple[int, int, int, int]
+    """Applies the transform (dx, dy, sx, sy) to the given box."""
+    xl, yb, xr, yt = box
+    dx, dy, sx, sy = xform
+    x0, x1 = sx * xl + dx, sx * xr + dx
+    y0, y1 = sy * yb + dy, sy * yt + dy
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
+
+def compose(xform, loc, orient):
+    # type: (Tuple[int, int, int, int], Tuple[int, int], str) -> Tuple[int, int, int, int]
+    """Returns the transform of a child placed at loc with orient under xform."""
+    dx, dy, sx, sy = xform
+    csx, csy = _orient_table[orient]
+    return sx * loc[0] + dx, sy * loc[1] + dy, sx * csx, sy * csy
+
+
+def iter_array(content, nx_key, ny_key, spx_key, spy_key, res):
+    # type: (Dict[str, Any], str, str, str, str, float) -> Iterable[Tuple[int, int]]
+    """Iterates over the offsets of an arrayed object."""
+    nx, ny = content.get(nx_key, 1), content.get(ny_key, 1)
+    spx = int(round(content.get(spx_key, 0) / res))
+    spy = int(round(content.get(spy_key, 0) / res))
+    for xidx in range(nx):
+        for yidx in range(ny):
+            yield xidx * spx, yidx * spy
+
+
+def get_via_boxes(content, res):
+    # type: (Dict[str, Any], float) -> List[Tuple[str, Tuple[int, int, int, int]]]
+    """Returns the cut and enclosure boxes of a via, relative to its center."""
+    nrow, ncol = content['num_rows'], content['num_cols']
+    cut_w = int(round(content['cut_width'] / res))
+    cut_h = int(round(content['cut_height'] / res))
+    sp_col = int(round(content['sp_cols'] / res))
+    sp_row = int(round(content['sp_rows'] / res))
+    arr_w = ncol * cut_w + (ncol - 1) * sp_col
+    arr_h = nrow * cut_h + (nrow - 1) * sp_row
+    xl, yb = -arr_w // 2, -arr_h // 2
+    ans = []
+    for col in range(ncol):
+        for row in range(nrow):
+            cxl = xl + col * (cut_w + sp_col)
+            cyb = yb + row * (cut_h + sp_row)
+            ans.append(('cut', (cxl, cyb, cxl + cut_w, cyb + cut_h)))
+    for name, enc_key in (('bot', 'enc1'), ('top', 'enc2')):
+        el, er, et, eb = (int(round(val / res)) for val in content[enc_key])
+        ans.append((name, (xl - el, yb - eb, xl + arr_w + er, yb + arr_h + et)))
+    return ans
+
+
+def flatten(master, lib_name, master_table, res, xform=(0, 0, 1, 1), shapes=None):
+    # type: (Any, str, Dict[str, Any], float, Tuple[int, int, int, int], Any) -> Dict[Any, List]
+    """Returns the flattened geometry of a master as boxes per layer.
+
+    Rectangles are keyed by their layer, via cuts and enclosures are keyed by the via ID, and
+    primitive instances are keyed by their library, cell, and orientation, with their
+    locations stored as zero-size boxes.
+    """
+    if shapes is None:
+        shapes = defaultdict(list)
+    content = master.get_content(lib_name, lambda name: name)
+    inst_list, rect_list, via_list = content[1], content[2], content[3]
+    for rect in rect_list:
+        (xl, yb), (xr, yt) = rect['bbox']
+        box = tuple(int(round(val / res)) for val in (xl, yb, xr, yt))
+        for dx, dy in iter_array(rect, 'arr_nx', 'arr_ny', 'arr_spx', 'arr_spy', res):
+            shapes[tuple(rect['layer'])].append(
+                transform_box((box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy), xform))
+    for via in via_list:
+        loc = tuple(int(round(val / res)) for val in via['loc'])
+        for dx, dy in iter_array(via, 'arr_nx', 'arr_ny', 'arr_spx', 'arr_spy', res):
+            via_xform = compose(xform, (loc[0] + dx, loc[1] + dy), via.get('orient', 'R0'))
+            for name, box in get_via_boxes(via, res):
+                shapes[(via['id'], name)].append(transform_box(box, via_xform))
+    for inst in inst_list:
+        loc = tuple(int(round(val / res)) for val in inst['loc'])
+        child = master_table.get(inst['cell'], None) if inst['lib'] == lib_name else None
+        for dx, dy in iter_array(inst, 'num_cols', 'num_rows', 'sp_cols', 'sp_rows', res):
+            inst_xform = compose(xform, (loc[0] + dx, loc[1] + dy), inst['orient'])
+            if child is None:
+                key = (inst['lib'], inst['cell'], inst_xform[2:])
+                shapes[key].append(inst_xform[:2] * 2)
+            else:
+                flatten(child, lib_name, master_table, res, xform=inst_xform, shapes=shapes)
+    return shapes
+
+
+def merge_boxes(box_list):
+    # type: (List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, Tuple[int, ...]]]
+    """Returns a canonical representation of the union of the given boxes.
+
+    The union is cut into vertical slabs, and each slab stores its merged Y intervals.
+    Adjacent slabs with the same intervals are merged.  Zero-size boxes are kept as points.
+    """
+    points = sorted(set(box for box in box_list if box[0] == box[2] or box[1] == box[3]))
+    box_list = [box for box in box_list if box[0] < box[2] and box[1] < box[3]]
+    xs = sorted(set(x for box in box_list for x in (box[0], box[2])))
+    slabs = []
+    for x0, x1 in zip(xs[:-1], xs[1:]):
+        intvs = sorted((box[1], box[3]) for box in box_list if box[0] <= x0 and box[2] >= x1)
+        merged = []
+        for yb, yt in intvs:
+            if merged and yb <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], yt)
+            else:
+                merged.append([yb, yt])
+        merged = tuple(val for intv in merged for val in intv)
+        if merged and slabs and slabs[-1][1] == x0 and slabs[-1][2] == merged:
+            slabs[-1] = (slabs[-1][0], x1, merged)
+        elif merged:
+            slabs.append((x0, x1, merged))
+    return [tuple(points)] + slabs
+
+
+def get_port_info(ports):
+    # type: (Dict[str, Any]) -> Dict[str, Tuple]
+    """Returns the tracks and extents of transistor connection ports."""
+    ans = {}
+    for name, warr in ports.items():
+        tid = warr.track_id
+        ans[name] = (tid.layer_id, tid.base_index, tid.num, tid.pitch, tid.width,
+                     warr.lower_unit, warr.upper_unit)
+    return ans
+
+
+def compare(temp_db, params, lib_name, res):
+    # type: (Any, Dict[str, Any], str, float) -> Tuple[List[str], bool]
+    """Generates the tiled and the single master connection.
+
+    Returns the mismatches, and True if the connection was tiled.
+    """
+    masters = []
+    for tile_conn in (True, False):
+        cur_params = params.copy()
+        cur_params['conn_kwargs'] = dict(params['conn_kwargs'], tile_conn=tile_conn)
+        masters.append(temp_db.new_template(params=cur_params, temp_cls=MOSConnTileCheck,
+                                            debug=False))
+
+    errors = []
+    tiled, ref = masters
+    tiled_ports, ref_ports = get_port_info(tiled.conn_ports), get_port_info(ref.conn_ports)
+    for name in sorted(ref_ports.keys()):
+        if tiled_ports.get(name, None) != ref_ports[name]:
+            errors.append('port %s: tiled %s, reference %s' % (name, tiled_ports.get(name, None),
+                                                               ref_ports[name]))
+
+    master_table = {master.cell_name: master for master in temp_db._master_lookup.values()}
+    tiled_shapes = flatten(tiled, lib_name, master_table, res)
+    ref_shapes = flatten(ref, lib_name, master_table, res)
+    for layer in sorted(set(tiled_shapes.keys()) | set(ref_shapes.keys()), key=repr):
+        if merge_boxes(tiled_shapes.get(layer, [])) != merge_boxes(ref_shapes.get(layer, [])):
+            errors.append('layer %s geometries differ.' % (layer, ))
+    is_tiled = getattr(tiled, 'children', None) != getattr(ref, 'children', None)
+    return errors, is_tiled
+
+
+def run_main():
+    parser = argparse.ArgumentParser(description='Compare tiled and single master '
+                                                 'transistor connections.')
+    parser.add_argument('specs', help='benchmark specification YAML file.')
+    parser.add_argument('-c', '--case', default='analogbase',
+                        help='benchmark case with AnalogBase base_params.')
+    parser.add_argument('-f', '--fingers', type=int, nargs='*',
+                        default=[8, 16, 17, 18, 22, 23, 30],
+                        help='connection finger counts.  Odd counts check flipped source '
+                             'parity.')
+    parser.add_argument('-k', '--stack', type=int, default=1, help='transistor stack number.')
+    args = parser.parse_args()
+
+    with open(args.specs, 'r') as f:
+        specs = yaml.safe_load(f)
+
+    case_specs = specs['cases'][args.case]
+    grid_specs = case_specs.get('routing_grid', specs['routing_grid'])
+    base_params = get_case_params(case_specs)['base_params'].copy()
+    margin = 2
+    base_params['fg_tot'] = max(args.fingers) + 2 * margin
+
+    lib_name = 'AAAFOO_MOS_CONN_TILE'
+    temp_db = make_tdb(get_tech_info(), lib_name, grid_specs)
+    res = temp_db.grid.resolution
+    num_conn = num_tiled = 0
+    errors = []
+    for fg in args.fingers:
+        for sdir, ddir in ((0, 2), (2, 0), (1, 1)):
+            for gate_pref_loc in ('s', 'd'):
+                for flip_lr in (False, True):
+                    params = dict(
+                        base_params=base_params,
+                        col_idx=margin,
+                        fg=fg,
+                        sdir=sdir,
+                        ddir=ddir,
+                        conn_kwargs=dict(gate_pref_loc=gate_pref_loc, flip_lr=flip_lr,
+                                         stack=args.stack),
+                    )
+                    cur_errors, is_tiled = compare(temp_db, params, lib_name, res)
+                    num_conn += 1
+                    num_tiled += int(is_tiled)
+                    name = 'fg=%d sdir=%d ddir=%d gate_pref_loc=%s flip_lr=%s' % (
+                        fg, sdir, ddir, gate_pref_loc, flip_lr)
+                    print('%s: tiled=%s, %d errors' % (name, is_tiled, len(cur_errors)))
+                    errors.extend('%s: %s' % (name, msg) for msg in cur_errors)
+
+    if num_tiled == 0:
+        errors.append('no connection was tiled; check mos_conn_tile_seg of the technology.')
+
+    for msg in errors:
+        print(msg)
+    print('%d connections checked, %d tiled, %d errors' % (num_conn, num_tiled, len(errors)))
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run_main()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""Checks that parallel master generation creates the same cells as serial generation.
+
+Each selected case of a benchmark specification file is generated twice, each time in a new
+TemplateDB: once serially, and once with the given number of worker processes.  The cell
+names and master keys of both TemplateDBs are compared, and every child master is checked to
+be registered.  The instance cell names recorded in the layout content of each master are
+also compared, since masters generated in worker processes are finalized before they are
+renamed.  The script exits with a non-zero status on mismatches.
+
+Like scripts_test/benchmark.py, this script needs the technology of the current BAG
+configuration.
+
+Usage::
+
+    python scripts_test/parallel_check.py specs_test/benchmark.yaml -c rxcore -j 2
+"""
+
+from typing import Dict, Any, List, Tuple
+
+import sys
+import argparse
+
+import yaml
+
+from abs_templates_ec.parallel import set_num_workers
+
+from benchmark import get_tech_info, make_tdb, get_template_class, get_case_params
+
+
+def get_cell_table(temp_db):
+    # type: (Any) -> Dict[str, Any]
+    """Returns a dictionary from cell name to master key of all masters in the given DB."""
+    cell_table = {}
+    for key, master in temp_db._master_lookup.items():
+        if master.cell_name in cell_table:
+            raise ValueError('Cell name %s is used by more than one master.' % master.cell_name)
+        cell_table[master.cell_name] = key
+    return cell_table
+
+
+def check_children(temp_db):
+    # type: (Any) -> List[str]
+    """Returns error messages for child masters that are not registered in the given DB."""
+    errors = []
+    for master in temp_db._master_lookup.values():
+        for child_key in (getattr(master, 'children', None) or ()):
+            if temp_db.find_master(child_key) is None:
+                errors.append('%s: child master %s is not registered.' %
+                              (master.cell_name, child_key))
+    return errors
+
+
+def get_inst_table(temp_db):
+    # type: (Any) -> Dict[str, List[Tuple[str, str]]]
+    """Returns a dictionary from cell name to the instance names and cells of each master.
+
+    The instance cell names are read from the layout content recorded when the master was
+    finalized, which is what is written to the layout database.
+    """
+    inst_table = {}
+    for master in temp_db._master_lookup.values():
+        inst_list = master._layout._raw_content[0]
+        inst_table[master.cell_name] = sorted((inst['name'], inst['cell']) for inst in inst_list)
+    return inst_table
+
+
+def check_inst_cells(inst_table):
+    # type: (Dict[str, List[Tuple[str, str]]]) -> List[str]
+    """Returns error messages for instances of cells that are not in the given table."""
+    errors = []
+    for cell_name, inst_list in inst_table.items():
+        for inst_name, inst_cell in inst_list:
+            if inst_cell not in inst_table:
+                errors.append('%s: instance %s refers to unknown cell %s.' %
+                              (cell_name, inst_name, inst_cell))
+    return errors
+
+
+def run_case(tech_info, name, case_specs, grid_specs, num_workers):
+    # type: (Any, str, Dict[str, Any], Dict[str, Any], int) -> List[str]
+    """Generates one case serially and in parallel, returns error messages."""
+    temp_cls = get_template_class(case_specs['class'])
+    params = get_case_params(case_specs)
+    grid_specs = case_specs.get('routing_grid', grid_specs)
+    lib_name = 'AAAFOO_PARALLEL_%s' % name.upper()
+
+    cell_tables = []
+    inst_tables = []
+    errors = []
+    for cur_workers in (1, num_workers):
+        set_num_workers(cur_workers)
+        temp_db = make_tdb(tech_info, lib_name, grid_specs)
+        temp_db.new_template(params=params, temp_cls=temp_cls, debug=False)
+        cell_table = get_cell_table(temp_db)
+        inst_table = get_inst_table(temp_db)
+        errors.extend(check_children(temp_db))
+        errors.extend(check_inst_cells(inst_table))
+        cell_tables.append(cell_table)
+        inst_tables.append(inst_table)
+
+    serial_table, par_table = cell_tables
+    for cell_name in sorted(set(serial_table.keys()) | set(par_table.keys())):
+        if cell_name not in par_table:
+            errors.append('cell %s is missing in parallel run.' % cell_name)
+        elif cell_name not in serial_table:
+            errors.append('cell %s is missing in serial run.' % cell_name)
+        elif serial_table[cell_name] != par_table[cell_name]:
+            errors.append('cell %s has different masters.' % cell_name)
+        elif inst_tables[0][cell_name] != inst_tables[1][cell_name]:
+            errors.append('cell %s has different instances: serial %s, parallel %s' %
+                          (cell_name, inst_tables[0][cell_name], inst_tables[1][cell_name]))
+    print('%s: %d cells, %d errors' % (name, len(serial_table), len(errors)))
+    return errors
+
+
+def run_main():
+    parser = argparse.ArgumentParser(description='Compare parallel and serial generation.')
+    parser.add_argument('specs', help='benchmark specification YAML file.')
+    parser.add_argument('-c', '--cases', nargs='*', default=None, help='cases to check.')
+    parser.add_argument('-j', '--jobs', type=int, default=2,
+                        help='number of worker processes of the parallel run.')
+    args = parser.parse_args()
+
+    with open(args.specs, 'r') as f:
+        specs = yaml.safe_load(f)
+
+    grid_specs = specs['routing_grid']
+    tech_info = get_tech_info()
+
+    errors = []
+    for name, case_specs in specs['cases'].items():
+        if args.cases is None or name in args.cases:
+            errors.extend(run_case(tech_info, name, case_specs, grid_specs, args.jobs))
+
+    for msg in errors:
+        print(msg)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    run_main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+import yaml
+
+from bag.core import BagProject
+from bag.layout import RoutingGrid, TemplateDB
+
+from abs_templates_ec.mos_char import Transistor
+from abs_templates_ec.sweep import sweep_templates, get_sweep_summary
+
+
+def make_tdb(prj, target_lib, specs):
+    grid_specs = specs['routing_grid']
+    layers = grid_specs['layers']
+    spaces = grid_specs['spaces']
+    widths = grid_specs['widths']
+    bot_dir = grid_specs['bot_dir']
+
+    routing_grid = RoutingGrid(prj.tech_info, layers, spaces, widths, bot_dir)
+    tdb = TemplateDB('template_libs.def', routing_grid, target_lib, use_cybagoa=True)
+    return tdb
+
+
+def run_sweep(prj, specs):
+    params = specs['params']
+    axes = specs['sweep_axes']
+
+    result_list = []
+    for result in sweep_templates(Transistor, params, axes,
+                                  db_factory=lambda: make_tdb(prj, impl_lib, specs)):
+        print('variant %d: %s, %.4f s, %d new masters' %
+              (result.index, result.values, result.elapsed, result.num_new_masters))
+        # drop the master so memory is bounded by one group.
+        result_list.append(result._replace(master=None))
+
+    print(get_sweep_summary(result_list))
+
+
+if __name__ == '__main__':
+
+    impl_lib = 'AAAFOO'
+
+    with open('specs_test/transistor_sweep.yaml', 'r') as f:
+        block_specs = yaml.load(f)
+
+    local_dict = locals()
+    if 'bprj' not in local_dict:
+        print('creating BAG project')
+        bprj = BagProject()
+
+    else:
+        print('loading BAG project')
+        bprj = local_dict['bprj']
+
+    run_sweep(bprj, block_specs)